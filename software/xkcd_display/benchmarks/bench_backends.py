@@ -0,0 +1,58 @@
+""" benchmark: throughput of the rasterization backends
+
+renders the transcript corpus with every installed backend, once with
+an empty fit cache (searching and drawing) and once with all fits cached
+(drawing only)
+
+usage: python benchmarks/bench_backends.py [repetitions]
+"""
+
+import sys
+import time
+
+from corpus import load_corpus
+from xkcd_display.backends import BACKENDS
+from xkcd_display.renderer import FitCache, Renderer
+
+TEXTS = load_corpus()
+
+
+def render_all(xkcd_renderer):
+    """ renders all texts as frames """
+    for text in TEXTS:
+        xkcd_renderer.render_frame(text)
+
+
+def main(repetitions=3):
+    for name in sorted(BACKENDS):
+        xkcd_renderer = Renderer(backend=name)
+        try:
+            xkcd_renderer.backend
+        except (ImportError, OSError) as e:
+            print(f"{name:<8} not available: {e.__class__.__name__}")
+            continue
+        # load the font metrics table before timing
+        render_all(xkcd_renderer)
+
+        uncached = 0
+        for _ in range(repetitions):
+            xkcd_renderer.fit_cache = FitCache()
+            start = time.perf_counter()
+            render_all(xkcd_renderer)
+            uncached += time.perf_counter() - start
+        cached = 0
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            render_all(xkcd_renderer)
+            cached += time.perf_counter() - start
+        xkcd_renderer.close()
+
+        frames = repetitions * len(TEXTS)
+        print(
+            f"{name:<8} uncached {frames / uncached:8.1f} frames/s  "
+            f"cached {frames / cached:8.1f} frames/s"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,290 @@
+""" benchmark: the renderer functions over the transcript corpus
+
+runs every case on the short, medium and long lines of the corpus and
+reports the wall time (best of the repetitions), the number of font metric
+calls and the peak memory allocated. The peak memory is measured in a
+separate run, tracing allocations slows down the timed runs otherwise.
+
+Cases that need imagemagick are skipped if it is not installed. The public
+render functions use the backend set in the XKCD_DISPLAY_BACKEND
+environment variable.
+
+Results can be written as json and compared to the results of an earlier
+run, e.g. on the commit before a change, on the same machine:
+
+usage: python benchmarks/bench_renderer.py [-n 3] [-o new.json] [-c old.json]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+from pathlib import Path
+
+from corpus import grouped_corpus
+from xkcd_display import Size, backends, font_table, renderer
+from xkcd_display.font_size_model import FontSizeModel
+
+
+class MetricCallCounter:
+    """ counts the font metric calls of all text fit searches
+
+    Every probe passed to the line metrics memo is wrapped while counting,
+    lines already remembered are not counted. Estimated metrics are not
+    counted either, they don't need the backend.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self._measure = None
+
+    def __enter__(self):
+        self._measure = measure = renderer.LineMetricsMemo.measure
+
+        def counting_measure(memo, probe, *args, **kwargs):
+            def counting_probe(text, font_size):
+                self.calls += 1
+                return probe(text, font_size)
+
+            return measure(memo, counting_probe, *args, **kwargs)
+
+        renderer.LineMetricsMemo.measure = counting_measure
+        return self
+
+    def __exit__(self, *exc_info):
+        renderer.LineMetricsMemo.measure = self._measure
+
+
+def box_size():
+    """ the size of the area the texts are fitted into """
+    padding = renderer.XKCD_RENDER_PROPERTIES["padding"]
+    return Size(
+        renderer.XKCD_IMAGE_PROPERTIES["width"] - 2 * padding,
+        renderer.XKCD_IMAGE_PROPERTIES["height"] - 2 * padding,
+    )
+
+
+def wand_image():
+    """ a blank image like the ones rendered for the display """
+    from wand.color import Color
+    from wand.image import Image
+
+    properties = dict(renderer.XKCD_IMAGE_PROPERTIES)
+    properties["background"] = Color(properties["background"])
+    return Image(**properties)
+
+
+def case_unique_text_wraps():
+    def run(text):
+        list(renderer.unique_text_wraps(text))
+
+    return run
+
+
+def case_find_best_text_fit():
+    from wand.drawing import Drawing
+
+    properties = renderer.XKCD_RENDER_PROPERTIES
+    estimate = None
+    if properties["estimate"]:
+        estimate = font_table.load_font_metrics_table(renderer.XKCD_FONT_FILE)
+    img = wand_image()
+    sketch = Drawing()
+    sketch.font = renderer.XKCD_FONT_FILE
+    sketch.text_antialias = properties["antialias"]
+
+    def run(text):
+        sketch.font_size = properties["font_size_hint"]
+        renderer.find_best_text_fit(
+            sketch,
+            img,
+            box_size(),
+            text,
+            search=properties["search"],
+            estimate=estimate,
+        )
+
+    return run
+
+
+def case_render_text():
+    wand_image().close()  # fail early without imagemagick
+
+    def run(text):
+        with wand_image() as img:
+            renderer.render_text(
+                img,
+                text,
+                renderer.XKCD_FONT_FILE,
+                **renderer.XKCD_RENDER_PROPERTIES,
+            )
+
+    return run
+
+
+def case_render_xkcd_image_as_gif():
+    renderer.default_renderer().backend  # fail early without the backend
+
+    def run(text):
+        renderer.FIT_CACHE.clear()
+        renderer.default_renderer().line_metrics.clear()
+        renderer.render_xkcd_image_as_gif(text)
+
+    return run
+
+
+def case_render_xkcd_image_as_pixels():
+    renderer.default_renderer().backend  # fail early without the backend
+
+    def run(text):
+        renderer.FIT_CACHE.clear()
+        renderer.default_renderer().line_metrics.clear()
+        list(renderer.render_xkcd_image_as_pixels(text))
+
+    return run
+
+
+def case_render_frame_with_font_size_model():
+    """ the font size model learns the corpus during the warm up """
+    xkcd_renderer = renderer.Renderer(font_size_model=FontSizeModel())
+    xkcd_renderer.backend  # fail early without the backend
+
+    def run(text):
+        xkcd_renderer.fit_cache.clear()
+        xkcd_renderer.line_metrics.clear()
+        xkcd_renderer.render_frame(text)
+
+    return run
+
+
+CASES = {
+    "unique_text_wraps": case_unique_text_wraps,
+    "find_best_text_fit": case_find_best_text_fit,
+    "render_text": case_render_text,
+    "render_xkcd_image_as_gif": case_render_xkcd_image_as_gif,
+    "render_xkcd_image_as_pixels": case_render_xkcd_image_as_pixels,
+    "render_frame_with_font_size_model": (
+        case_render_frame_with_font_size_model
+    ),
+}
+
+
+def measure(run, texts, repetitions):
+    """ measures one case on a group of texts
+
+    :param function run: called with a text, runs the case once
+    :param list texts: the texts to run the case on
+    :param int repetitions: number of timed runs
+    :returns dict: the measurements
+    """
+    for text in texts:
+        run(text)  # warm up, e.g. load the font metrics table
+    best = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        for text in texts:
+            run(text)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    with MetricCallCounter() as counter:
+        tracemalloc.start()
+        for text in texts:
+            run(text)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "texts": len(texts),
+        "seconds": best,
+        "ms_per_text": 1000 * best / len(texts),
+        "metric_calls": counter.calls,
+        "peak_bytes": peak,
+    }
+
+
+def git_commit():
+    """ the commit of the checked out tree, if available """
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def run_benchmarks(repetitions=3):
+    """ runs all cases on all groups of the corpus
+
+    :param int repetitions: number of timed runs per case
+    :returns dict: the results, ready to be written as json
+    """
+    results = {}
+    skipped = {}
+    groups = grouped_corpus()
+    for name, setup in CASES.items():
+        try:
+            run = setup()
+        except (ImportError, OSError) as e:
+            reason = str(e).split("\n")[0]
+            skipped[name] = f"{e.__class__.__name__}: {reason}"
+            continue
+        for group, texts in groups.items():
+            results[f"{name}[{group}]"] = measure(run, texts, repetitions)
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": backends.DEFAULT_BACKEND,
+        "repetitions": repetitions,
+        "cases": results,
+        "skipped": skipped,
+    }
+
+
+def print_results(results, previous=None):
+    """ prints the results as a table
+
+    :param dict results: results of this run
+    :param dict previous: results of an earlier run to compare with
+    """
+    previous_cases = previous["cases"] if previous else {}
+    print(f"commit {results['commit']}, backend {results['backend']}")
+    for name, case in results["cases"].items():
+        line = (
+            f"{name:<44} {case['ms_per_text']:9.3f} ms/text "
+            f"{case['metric_calls']:6} metric calls "
+            f"{case['peak_bytes'] / 1024:9.1f} KiB peak"
+        )
+        if name in previous_cases:
+            ratio = case["seconds"] / previous_cases[name]["seconds"]
+            line += f"  {ratio:5.2f}x time"
+        print(line)
+    for name, reason in results["skipped"].items():
+        print(f"{name:<44} skipped, {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", "--repetitions", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write results as json")
+    parser.add_argument("-c", "--compare", help="json results to compare")
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+    results = run_benchmarks(args.repetitions)
+    print_results(results, previous)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
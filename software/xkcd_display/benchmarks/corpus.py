@@ -0,0 +1,41 @@
+""" the transcript lines the benchmarks are run on """
+
+from pathlib import Path
+
+CORPUS_FILE = Path(__file__).parent / "corpus.txt"
+
+# upper limits of the text length for grouping the corpus
+LENGTH_CLASSES = [("short", 20), ("medium", 80), ("long", None)]
+
+
+def load_corpus(path=CORPUS_FILE):
+    """ reads the transcript lines of the corpus
+
+    :param pathlib.Path path: path of the corpus file
+    :returns list: the transcript lines
+    """
+    lines = (line.strip() for line in Path(path).read_text().splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def length_class(text):
+    """ the name of the length class of a text
+
+    :param str text: a transcript line
+    :returns str: "short", "medium" or "long"
+    """
+    for name, max_length in LENGTH_CLASSES:
+        if max_length is None or len(text) <= max_length:
+            return name
+
+
+def grouped_corpus(path=CORPUS_FILE):
+    """ the transcript lines of the corpus, grouped by their length
+
+    :param pathlib.Path path: path of the corpus file
+    :returns dict: length class -> list of transcript lines
+    """
+    groups = {name: [] for name, _ in LENGTH_CLASSES}
+    for text in load_corpus(path):
+        groups[length_class(text)].append(text)
+    return groups
@@ -0,0 +1,178 @@
+import pytest
+import tempfile
+
+from pathlib import Path
+
+
+@pytest.fixture
+def tmp_path():
+    with tempfile.TemporaryDirectory() as tempdir:
+        yield Path(tempdir)
+
+
+@pytest.fixture
+def atlas():
+    from xkcd_display.atlas import Glyph, GlyphAtlas
+
+    glyphs = {
+        # a 3x2 block, one pixel left of the pen, on top of the baseline
+        "a": Glyph(advance=4, left=-1, top=-2, width=3, rows=[0b111, 0b101]),
+        # a single pixel below the baseline
+        "b": Glyph(advance=2.5, left=0, top=0, width=1, rows=[0b1]),
+        " ": Glyph(advance=3, left=0, top=0, width=0, rows=[]),
+    }
+    return GlyphAtlas("abc", 10, ascent=3, descent=1, glyphs=glyphs)
+
+
+@pytest.fixture
+def atlas_dir(mocker, tmp_path):
+    mocker.patch("xkcd_display.atlas.CACHE_DIR", tmp_path)
+    mocker.patch.dict("xkcd_display.atlas._loaded_atlases", clear=True)
+    return tmp_path / "atlas"
+
+
+def test_glyph_atlas_measure(atlas):
+    from xkcd_display import FontMetrics
+
+    assert atlas.line_width("ab a") == 13
+    assert atlas.measure("ab a") == FontMetrics(13, 4, 10)
+    assert atlas.measure("a\nab a\n") == FontMetrics(13, 12, 10)
+
+
+def test_glyph_atlas_draw(atlas):
+    from xkcd_display.atlas import BitCanvas
+
+    canvas = BitCanvas(8, 7)
+    atlas.draw(canvas, 1, 2, "ab\nb")
+
+    assert canvas.rows == [
+        0b11100000,
+        0b10100000,
+        0b00000100,
+        0,
+        0,
+        0,
+        0b01000000,
+    ]
+
+
+def test_bit_canvas_blit_clips(atlas):
+    from xkcd_display.atlas import BitCanvas
+
+    canvas = BitCanvas(4, 2)
+    glyph = atlas.glyph("a")
+    canvas.blit(glyph, -1, -1)
+    canvas.blit(glyph, 3, 1)
+
+    assert canvas.rows == [0b0100, 0b0001]
+
+
+def test_bit_canvas_export():
+    from xkcd_display.atlas import BitCanvas
+
+    canvas = BitCanvas(10, 2)
+    canvas.rows = [0b1000000001, 0b0100000000]
+
+    assert canvas.to_frame() == bytes(
+        [0b01111111, 0b10111111, 0b10111111, 0b11111111]
+    )
+    pixels = list(canvas.to_pixels())
+    assert len(pixels) == 20
+    assert [i for i, pixel in enumerate(pixels) if pixel == 0.0] == [0, 9, 11]
+
+
+def test_glyph_atlas_serialization(atlas, tmp_path):
+    from xkcd_display.atlas import GlyphAtlas
+
+    atlas.save(tmp_path / "test.atlas")
+    result = GlyphAtlas.load(tmp_path / "test.atlas", font_file="font")
+
+    assert result.font_hash == "abc"
+    assert result.font_size == 10
+    assert result.line_height == 4
+    assert result.font_file == "font"
+    assert result.glyphs == atlas.glyphs
+    assert list(tmp_path.iterdir()) == [tmp_path / "test.atlas"]
+
+
+def test_glyph_atlas_serialization_errors(atlas):
+    from xkcd_display.atlas import GlyphAtlas
+
+    data = atlas.to_bytes()
+
+    with pytest.raises(ValueError):
+        GlyphAtlas.from_bytes(data[:-3])
+    with pytest.raises(ValueError):
+        GlyphAtlas.from_bytes(data.replace(b'"version": 1', b'"version": 0'))
+
+
+def test_load_glyph_atlas(mocker, atlas_dir):
+    pytest.importorskip("PIL")
+    from xkcd_display import atlas
+    from xkcd_display.renderer import XKCD_FONT_FILE
+
+    mocker.spy(atlas, "build_glyph_atlas")
+
+    first = atlas.load_glyph_atlas(XKCD_FONT_FILE, 20)
+
+    assert first is atlas.load_glyph_atlas(XKCD_FONT_FILE, 20)
+    assert atlas.build_glyph_atlas.call_count == 1
+    assert first.measure("xkcd").character_height == 20
+    assert (atlas_dir / "xkcd-script-20.atlas").is_file()
+
+    # a persisted atlas is used in a new process
+    atlas._loaded_atlases.clear()
+    second = atlas.load_glyph_atlas(XKCD_FONT_FILE, 20)
+
+    assert atlas.build_glyph_atlas.call_count == 1
+    assert second.glyphs == first.glyphs
+
+    # the atlas of a different font version is rebuilt
+    atlas._loaded_atlases.clear()
+    atlas.load_glyph_atlas(XKCD_FONT_FILE, 20, font_hash="other")
+
+    assert atlas.build_glyph_atlas.call_count == 2
+
+
+def test_glyph_atlas_rasterizes_missing_characters(mocker, atlas_dir):
+    pytest.importorskip("PIL")
+    from xkcd_display.atlas import load_glyph_atlas
+    from xkcd_display.renderer import XKCD_FONT_FILE
+
+    atlas = load_glyph_atlas(XKCD_FONT_FILE, 20)
+    assert "€" not in atlas.glyphs
+
+    assert atlas.line_width("€") > 0
+    assert "€" in atlas.glyphs
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "yeah",
+        "Python! I learned it last night! Everything is so simple!",
+        "I dunno... Dynamic typing? Whitespace?",
+    ],
+)
+def test_atlas_backend_matches_pillow(atlas_dir, text):
+    """ the atlas backend places the glyphs like the pillow backend
+
+    Pillow aligns the glyphs of a line to a common sub pixel baseline,
+    some glyphs of the atlas are one pixel off.
+    """
+    pytest.importorskip("PIL")
+    from xkcd_display.renderer import Renderer
+
+    atlas_renderer = Renderer(backend="atlas")
+    pillow_renderer = Renderer(backend="pillow")
+
+    atlas_frame = atlas_renderer.render_frame(text)
+    pillow_frame = pillow_renderer.render_frame(text)
+
+    assert atlas_renderer.fit(text) == pillow_renderer.fit(text)
+    assert len(atlas_frame) == len(pillow_frame)
+    differences = sum(
+        bin(a ^ b).count("1") for a, b in zip(atlas_frame, pillow_frame)
+    )
+    black = sum(8 - bin(byte).count("1") for byte in pillow_frame)
+    assert differences <= 0.15 * black
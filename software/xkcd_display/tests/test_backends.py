@@ -0,0 +1,133 @@
+import pytest
+
+from unittest.mock import call
+
+from xkcd_display import FontMetrics
+
+CONFORMANCE_TEXTS = [
+    "yeah",
+    "You're flying! How?",
+    "Python! I learned it last night! Everything is so simple!",
+    "I dunno... I drank everything in the medicine cabinet for comparison. "
+    "But I think this is the python.",
+]
+
+
+@pytest.fixture
+def pillow_backend():
+    pytest.importorskip("PIL")
+    from xkcd_display.backends import PillowBackend
+    from xkcd_display.renderer import (
+        XKCD_FONT_FILE,
+        XKCD_IMAGE_PROPERTIES,
+        XKCD_RENDER_PROPERTIES,
+    )
+
+    backend = PillowBackend(
+        XKCD_FONT_FILE, XKCD_IMAGE_PROPERTIES, XKCD_RENDER_PROPERTIES
+    )
+    yield backend
+    backend.close()
+
+
+def _skip_without_imagemagick():
+    """ the wand bindings need the imagemagick library to be installed """
+    try:
+        from wand.version import MAGICK_VERSION  # noqa: F401
+    except (ImportError, OSError):
+        pytest.skip("imagemagick is not installed")
+
+
+def _black_pixels(frame):
+    """ counts the black pixels of a packed frame """
+    return sum(8 - bin(byte).count("1") for byte in frame)
+
+
+def test_create_backend(mocker):
+    from xkcd_display.backends import create_backend, Backend
+
+    mocker.patch.dict(
+        "xkcd_display.backends.BACKENDS", {"mock": mocker.Mock()}
+    )
+
+    result = create_backend("mock", "font", "image", "render")
+
+    from xkcd_display.backends import BACKENDS
+
+    assert result is BACKENDS["mock"].return_value
+    assert BACKENDS["mock"].call_args == call("font", "image", "render")
+    with pytest.raises(ValueError):
+        create_backend("unknown", "font", "image", "render")
+    with pytest.raises(NotImplementedError):
+        Backend("font", {"width": 1, "height": 1}, {}).measure("text", 12)
+
+
+def test_create_backend_default(mocker):
+    from xkcd_display.backends import create_backend
+
+    mocker.patch("xkcd_display.backends.DEFAULT_BACKEND", "mock")
+    mocker.patch.dict(
+        "xkcd_display.backends.BACKENDS", {"mock": mocker.Mock()}
+    )
+
+    create_backend(None, "font", "image", "render")
+
+    from xkcd_display.backends import BACKENDS
+
+    assert BACKENDS["mock"].call_count == 1
+
+
+def test_pillow_backend_measure(pillow_backend):
+    one_line = pillow_backend.measure("some text", 20)
+    two_lines = pillow_backend.measure("some text\nsome", 20)
+    larger = pillow_backend.measure("some text", 40)
+
+    assert isinstance(one_line, FontMetrics)
+    assert one_line.character_height == 20
+    assert two_lines.width == one_line.width
+    assert two_lines.height == 2 * one_line.height
+    assert one_line.width < larger.width
+
+
+def test_pillow_backend_frame(pillow_backend):
+    from xkcd_display.frames import FRAME_SIZE
+
+    with pillow_backend.canvas() as canvas:
+        blank = pillow_backend.export_frame(canvas)
+        pillow_backend.draw_text(canvas, 10, 100, "some text", 40)
+        frame = pillow_backend.export_frame(canvas)
+        pixels = list(pillow_backend.export_pixels(canvas))
+        gif = pillow_backend.export_gif(canvas)
+
+    assert blank == bytes([0xFF]) * FRAME_SIZE
+    assert len(frame) == FRAME_SIZE
+    assert 0 < _black_pixels(frame)
+    assert pixels.count(0.0) == _black_pixels(frame)
+    assert pixels.count(0.0) + pixels.count(1.0) == len(pixels)
+    assert gif.startswith(b"GIF")
+
+
+@pytest.mark.parametrize("backend", ["pillow", "atlas"])
+@pytest.mark.parametrize("text", CONFORMANCE_TEXTS)
+def test_backend_conformance(backend, text):
+    """ a backend renders a text like imagemagick within a tolerance
+
+    The engines hint and rasterize glyphs slightly different, the fits and
+    the amount of black pixels must be close but are not pixel-identical.
+    """
+    pytest.importorskip("PIL")
+    _skip_without_imagemagick()
+    from xkcd_display.renderer import Renderer
+
+    wand_renderer = Renderer(backend="wand")
+    other_renderer = Renderer(backend=backend)
+
+    wand_fit = wand_renderer.fit(text)
+    other_fit = other_renderer.fit(text)
+    wand_frame = wand_renderer.render_frame(text)
+    other_frame = other_renderer.render_frame(text)
+
+    assert len(other_frame) == len(wand_frame)
+    assert abs(other_fit.font_size - wand_fit.font_size) <= 2
+    wand_black = _black_pixels(wand_frame)
+    assert abs(_black_pixels(other_frame) - wand_black) <= 0.15 * wand_black
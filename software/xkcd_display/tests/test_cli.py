@@ -1,7 +1,8 @@
+import logging
 import pytest
 import click
 from click.testing import CliRunner
-from unittest.mock import call
+from unittest.mock import ANY, call
 
 
 def test_xkcd_start_already_running(mocker):
@@ -38,6 +39,25 @@ def test_xkcd_start_not_running(mocker):
     assert XKCDDisplayService.start.call_args == call()
 
 
+@pytest.mark.parametrize(
+    "args,level", [([], logging.INFO), (["--debug"], logging.DEBUG)]
+)
+def test_xkcd_start_log_level(mocker, args, level):
+    from xkcd_display.cli import xkcd
+    from xkcd_display.display import XKCDDisplayService
+
+    mocker.patch.object(XKCDDisplayService, "is_running", return_value=False)
+    mocker.patch.object(XKCDDisplayService, "start")
+    init = mocker.spy(XKCDDisplayService, "__init__")
+
+    runner = CliRunner()
+    result = runner.invoke(xkcd, ["start", "/tmp"] + args)
+
+    assert result.exit_code == 0
+    assert init.call_args[1]["log_level"] == level
+    assert XKCDDisplayService.start.call_count == 1
+
+
 def test_xkcd_quit_running(mocker):
     from xkcd_display.cli import xkcd
     from xkcd_display.display import XKCDDisplayService
@@ -103,6 +123,34 @@ def test_xkcd_status_not_running(mocker):
     assert XKCDDisplayService.is_running.call_args == call()
 
 
+def test_xkcd_status_does_not_import_rendering_dependencies():
+    import subprocess
+    import sys
+
+    script = (
+        "import sys\n"
+        "from xkcd_display.cli import xkcd\n"
+        "try:\n"
+        "    xkcd(['status'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sorted(sys.modules)))\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert "xkcd service" in result.stdout
+    modules = result.stdout.splitlines()[-1].split()
+    assert "wand" not in modules
+    assert "xkcd_epaper" not in modules
+    assert "xkcd_display.renderer" not in modules
+
+
 def test_xkcd_reload_running(mocker):
     from xkcd_display.cli import xkcd
     from xkcd_display.display import XKCDDisplayService
@@ -211,6 +259,52 @@ def test_xkcd_pause_not_running(mocker):
     assert XKCDDisplayService.send_signal.call_count == 0
 
 
+def test_xkcd_precompile(mocker):
+    from xkcd_display.cli import xkcd
+    from xkcd_display.precompile import PrecompileResult
+
+    mocker.patch(
+        "xkcd_display.precompile.precompile_dialogs",
+        return_value=PrecompileResult(20, 3, [], 2.0),
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(xkcd, ["precompile", "--jobs", "2", "/tmp"])
+
+    assert result.exit_code == 0
+    assert "rendered 20 frames in 2.0s (10.0 frames/s)" in result.output
+    assert "3 dialogs unchanged" in result.output
+    from xkcd_display.precompile import precompile_dialogs
+    from pathlib import Path
+
+    assert precompile_dialogs.call_args == call(
+        Path("/tmp"), backend=ANY, workers=2, pairwise_breaks=False
+    )
+
+    runner.invoke(xkcd, ["precompile", "--pairwise-breaks", "/tmp"])
+
+    assert precompile_dialogs.call_args == call(
+        Path("/tmp"), backend=ANY, workers=None, pairwise_breaks=True
+    )
+
+
+def test_xkcd_precompile_reports_failures(mocker):
+    from xkcd_display.cli import xkcd
+    from xkcd_display.precompile import PrecompileResult
+
+    failed = [("Too much text", "Could not find fitting font size")]
+    mocker.patch(
+        "xkcd_display.precompile.precompile_dialogs",
+        return_value=PrecompileResult(0, 0, failed, 0),
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(xkcd, ["precompile", "/tmp"])
+
+    assert result.exit_code == 1
+    assert "Could not find fitting font size: Too much text" in result.output
+
+
 @pytest.mark.parametrize(
     "cli_args, showed, slept",
     [
@@ -228,7 +322,9 @@ def test_xkcdtest_show_no_outdir(cli_args, showed, slept, mocker):
 
     mocker.patch.object(Path, "write_bytes")
     mocker.patch.object(
-        xkcd_display.renderer, "render_xkcd_image_as_gif", return_value=b"1"
+        xkcd_display.renderer.Renderer,
+        "render_dialog",
+        return_value=[b"1", b"2"],
     )
     mocker.patch.object(click, "launch")
     mocker.patch("time.sleep")
@@ -242,12 +338,18 @@ def test_xkcdtest_show_no_outdir(cli_args, showed, slept, mocker):
         print(result.output)
         assert result.exit_code == 0
 
-    assert Path.write_bytes.call_count == 2
-    assert xkcd_display.renderer.render_xkcd_image_as_gif.call_count == 2
-    assert xkcd_display.renderer.render_xkcd_image_as_gif.call_args_list == [
-        call("yeah"),
-        call("sigh"),
-    ]
+    assert Path.write_bytes.call_args_list == [call(b"1"), call(b"2")]
+    from xkcd_display.dialog import SpokenText
+    from xkcd_display.renderer import Renderer
+
+    assert Renderer.render_dialog.call_count == 1
+    assert Renderer.render_dialog.call_args == call(
+        [
+            SpokenText(speaker="cueball", text="yeah"),
+            SpokenText(speaker="megan", text="sigh"),
+        ],
+        export="gif",
+    )
     if showed:
         assert click.launch.call_count == 2
     else:
@@ -259,6 +361,44 @@ def test_xkcdtest_show_no_outdir(cli_args, showed, slept, mocker):
         time.sleep.call_count == 0
 
 
+def test_xkcdtest_backend(mocker):
+    from xkcd_display.cli import xkcdtest
+    import xkcd_display.renderer
+    from pathlib import Path
+
+    mocker.patch.object(Path, "write_bytes")
+    mocker.patch.object(
+        xkcd_display.renderer.Renderer,
+        "render_dialog",
+        return_value=[b"1", b"2"],
+    )
+    mocker.spy(xkcd_display.renderer.Renderer, "__init__")
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("text.txt", "w") as f:
+            f.write("m:yeah\nc:sigh")
+        cli_args = ["--backend", "pillow", "-o", ".", "text.txt"]
+        result = runner.invoke(xkcdtest, cli_args)
+        assert result.exit_code == 0
+
+    init = xkcd_display.renderer.Renderer.__init__
+    assert init.call_count == 1
+    assert init.call_args == call(ANY, backend="pillow")
+
+
+def test_xkcdtest_unknown_backend():
+    from xkcd_display.cli import xkcdtest
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("text.txt", "w") as f:
+            f.write("m:yeah\nc:sigh")
+        result = runner.invoke(xkcdtest, ["--backend", "?", "text.txt"])
+
+    assert result.exit_code == 2
+
+
 def test_get_directory_context_manager_with_dir():
     from xkcd_display.cli import _get_directory_context_manager
 
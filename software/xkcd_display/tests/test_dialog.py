@@ -90,3 +90,14 @@ def test_adjust_narrators_to_many_narrators():
         """
     with pytest.raises(ValueError):
         adjust_narrators(parse_dialog(dialog))
+
+
+def test_break_text():
+    from pathlib import Path
+    from xkcd_display.dialog import break_text
+
+    old = Path("dialogs/353.txt")
+    new = Path("dialogs/1319.txt")
+
+    assert break_text(None, new) == "Starting with 1319"
+    assert break_text(old, new) == "Goodbye 353, Hello 1319"
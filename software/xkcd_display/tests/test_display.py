@@ -1,3 +1,4 @@
+import logging
 import pytest
 import tempfile
 import time
@@ -19,6 +20,13 @@ def tmp_path():
         yield Path(tempdir)
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(mocker):
+    with tempfile.TemporaryDirectory() as tempdir:
+        mocker.patch("xkcd_display.display.CACHE_DIR", Path(tempdir))
+        yield Path(tempdir)
+
+
 def test_display_init():
     from xkcd_display.display import XKCDDisplayService
 
@@ -28,6 +36,136 @@ def test_display_init():
     assert instance.pid_file._path == "/tmp/xkcdd.pid"
     assert instance._epd is None
     assert instance.dialogs_directory == "some/dir/path"
+    assert instance._frame_cache is None
+
+
+def test_display_frame_cache_property(cache_dir):
+    from xkcd_display.display import XKCDDisplayService
+    from xkcd_display.frames import FrameCache
+
+    instance = XKCDDisplayService("some/dir/path")
+
+    cache = instance.frame_cache
+    assert isinstance(cache, FrameCache)
+    assert cache.directory == cache_dir / "frames"
+    assert instance.frame_cache is cache
+
+
+def test_display_renderer_property():
+    from xkcd_display.display import XKCDDisplayService
+    from xkcd_display.renderer import Renderer
+
+    instance = XKCDDisplayService("some/dir/path")
+
+    assert instance._renderer is None
+    xkcd_renderer = instance.renderer
+    assert isinstance(xkcd_renderer, Renderer)
+    assert instance.renderer is xkcd_renderer
+
+
+def test_render_frame_uses_cache(mocker):
+    from xkcd_display.display import XKCDDisplayService
+    from xkcd_display.frames import FRAME_SIZE
+
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.frame_key", return_value="some-key"
+    )
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.render_frame",
+        return_value=bytes(FRAME_SIZE),
+    )
+    instance = XKCDDisplayService()
+
+    first = instance.render_frame("*sigh*")
+    second = instance.render_frame("*sigh*")
+
+    assert first == second == bytes(FRAME_SIZE)
+    assert "some-key" in instance.frame_cache
+    from xkcd_display.renderer import Renderer
+
+    assert Renderer.render_frame.call_count == 1
+    assert Renderer.render_frame.call_args == call("*sigh*", stats=None)
+
+
+def test_render_frame_uses_precompiled_frames(mocker, cache_dir):
+    from xkcd_display.display import XKCDDisplayService
+    from xkcd_display.frames import FRAME_SIZE
+
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.frame_key",
+        side_effect=lambda text: f"key-{text}",
+    )
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.render_dialog",
+        side_effect=lambda texts, stats, cancelled: [
+            bytes(FRAME_SIZE) for t in texts
+        ],
+    )
+    instance = XKCDDisplayService()
+    instance.precompiled_frames.put("key-a", bytes([1]) * FRAME_SIZE)
+
+    assert instance.render_frame("a") == bytes([1]) * FRAME_SIZE
+    assert instance.render_frames(["a", "b"]) == [
+        bytes([1]) * FRAME_SIZE,
+        bytes(FRAME_SIZE),
+    ]
+    assert instance.precompiled_frames.directory == cache_dir / "precompiled"
+    assert "key-a" not in instance.frame_cache
+    assert "key-b" not in instance.precompiled_frames
+    from xkcd_display.renderer import Renderer
+
+    assert Renderer.render_dialog.call_args == call(
+        ["b"], stats=None, cancelled=None
+    )
+
+
+def test_render_frames_logs_stats_for_debugging(caplog):
+    pytest.importorskip("PIL")
+    from xkcd_display.display import XKCDDisplayService
+
+    instance = XKCDDisplayService(backend="pillow", log_level=logging.DEBUG)
+
+    with caplog.at_level(logging.DEBUG, logger="xkcdd"):
+        instance.render_frames(["yeah", "Python!"])
+        instance.render_frame("sigh")
+
+    messages = [record.getMessage() for record in caplog.records]
+    rendered = [m for m in messages if m.startswith("rendered")]
+    assert len(rendered) == 3
+    for message, text in zip(rendered, ["yeah", "Python!", "sigh"]):
+        assert message.startswith(f"rendered {text!r} at font size")
+
+
+@pytest.mark.parametrize("level", [logging.INFO, logging.DEBUG])
+def test_display_log_level(level):
+    from xkcd_display.display import XKCDDisplayService
+
+    instance = XKCDDisplayService(log_level=level)
+
+    assert instance.logger.level == level
+
+
+def test_display_logs_on_info_level_by_default():
+    from xkcd_display.display import XKCDDisplayService
+
+    instance = XKCDDisplayService()
+
+    assert instance.logger.level == logging.INFO
+    assert not instance.logger.isEnabledFor(logging.DEBUG)
+
+
+def test_display_persists_font_size_model(cache_dir):
+    from xkcd_display.display import XKCDDisplayService
+
+    instance = XKCDDisplayService()
+    instance._save_font_size_model()  # no renderer, nothing to save
+    instance.renderer.font_size_model.learn("sigh", 200)
+    instance._save_font_size_model()
+
+    other = XKCDDisplayService()
+
+    assert other.renderer.font_size_model.predict("yeah").font_size == 200
+    assert len(list((cache_dir / "font_sizes").iterdir())) == 1
 
 
 def test_display_epd_property_not_cached():
@@ -69,32 +207,124 @@ def test_display_dialog(tmp_path, mocker):
     from xkcd_display.dialog import SpokenText
 
     mocker.patch.object(XKCDDisplayService, "_display_image")
+    mocker.patch.object(
+        XKCDDisplayService, "render_frames", return_value=[b"2", b"3"]
+    )
     mocker.patch("time.sleep")
+    mocker.patch("time.monotonic", return_value=100)
     dialog_file = tmp_path / "one_dialog.txt"
     dialog_file.write_text(EXAMPLE_DIALOG)
 
     XKCDDisplayService()._display_dialog(dialog_file)
 
+    assert XKCDDisplayService.render_frames.call_count == 1
+    assert XKCDDisplayService.render_frames.call_args == call(
+        ["Python!", "I learned it last night!"]
+    )
     assert XKCDDisplayService._display_image.call_count == 3
     assert XKCDDisplayService._display_image.call_args_list == [
         call(
             SpokenText(speaker="cueball", text="You're flying! How?"),
             image_nr=0,
         ),
-        call(SpokenText(speaker="megan", text="Python!"), image_nr=1),
+        call(
+            SpokenText(speaker="megan", text="Python!"),
+            image_nr=1,
+            frame=b"2",
+        ),
         call(
             SpokenText(speaker="megan", text="I learned it last night!"),
             image_nr=2,
+            frame=b"3",
         ),
     ]
     assert time.sleep.call_count == 3
     assert time.sleep.call_args_list == [call(6), call(5), call(7)]
 
 
+def test_display_dialog_shows_first_frame_before_rendering(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+
+    calls = []
+    mocker.patch.object(
+        XKCDDisplayService,
+        "_display_image",
+        side_effect=lambda *a, **kw: calls.append("display"),
+    )
+    mocker.patch.object(
+        XKCDDisplayService,
+        "render_frames",
+        side_effect=lambda texts: calls.append("render") or [b"2", b"3"],
+    )
+    mocker.patch("time.sleep")
+    dialog_file = tmp_path / "one_dialog.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+
+    XKCDDisplayService()._display_dialog(dialog_file)
+
+    assert calls == ["display", "render", "display", "display"]
+
+
+def test_display_dialog_render_time_shortens_first_wait(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+
+    mocker.patch.object(XKCDDisplayService, "_display_image")
+    mocker.patch.object(
+        XKCDDisplayService, "render_frames", return_value=[b"2", b"3"]
+    )
+    mocker.patch("time.sleep")
+    # rendering the other frames takes 4 seconds, longer than the last one
+    mocker.patch(
+        "time.monotonic", side_effect=[100, 104, 104, 104, 104, 114]
+    )
+    dialog_file = tmp_path / "one_dialog.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+
+    XKCDDisplayService()._display_dialog(dialog_file)
+
+    assert time.sleep.call_args_list == [call(2), call(5), call(0)]
+
+
+def test_display_dialog_empty_transcript(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+
+    mocker.patch.object(XKCDDisplayService, "_display_image")
+    mocker.patch.object(
+        XKCDDisplayService, "_read_transcript", return_value=[]
+    )
+    mocker.patch.object(XKCDDisplayService, "render_frames")
+    dialog_file = tmp_path / "one_dialog.txt"
+
+    XKCDDisplayService()._display_dialog(dialog_file)
+
+    assert XKCDDisplayService._display_image.call_count == 0
+    assert XKCDDisplayService.render_frames.call_count == 0
+
+
+def test_display_dialog_renders_frames_on_error(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+
+    mocker.patch.object(XKCDDisplayService, "_display_image")
+    mocker.patch.object(
+        XKCDDisplayService, "render_frames", side_effect=ValueError("no fit")
+    )
+    mocker.patch("time.sleep")
+    dialog_file = tmp_path / "one_dialog.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+
+    XKCDDisplayService()._display_dialog(dialog_file)
+
+    assert XKCDDisplayService._display_image.call_count == 3
+    assert XKCDDisplayService._display_image.call_args[1]["frame"] is None
+
+
 def test_display_dialog_exit_on_sigterm(tmp_path, mocker):
     from xkcd_display.display import XKCDDisplayService
 
     mocker.patch.object(XKCDDisplayService, "_display_image")
+    mocker.patch.object(
+        XKCDDisplayService, "render_frames", return_value=[b"2", b"3"]
+    )
     mocker.patch.object(XKCDDisplayService, "got_sigterm", return_value=True)
     mocker.patch("time.sleep")
     dialog_file = tmp_path / "one_dialog.txt"
@@ -111,20 +341,23 @@ def test_display_image(mocker, img_nr, refresh):
     from xkcd_display.display import XKCDDisplayService
     from xkcd_display.dialog import SpokenText
 
-    mocker.patch("xkcd_display.renderer.render_xkcd_image_as_pixels")
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.render_frame",
+        return_value=b"frame",
+    )
     mocker.patch("xkcd_display.epd_dummy.EPDummy.show_and_move")
 
     XKCDDisplayService()._display_image(
         SpokenText(speaker="megan", text="*sigh*"), image_nr=img_nr
     )
-    from xkcd_display.renderer import render_xkcd_image_as_pixels
+    from xkcd_display.renderer import Renderer
     from xkcd_display.epd_dummy import EPDummy
 
-    assert render_xkcd_image_as_pixels.call_count == 1
-    assert render_xkcd_image_as_pixels.call_args == call("*sigh*")
+    assert Renderer.render_frame.call_count == 1
+    assert Renderer.render_frame.call_args == call("*sigh*", stats=None)
     assert EPDummy.show_and_move.call_count == 1
     assert EPDummy.show_and_move.call_args == call(
-        ANY, quick_refresh=refresh, move_to=10
+        b"frame", quick_refresh=refresh, move_to="megan"
     )
 
 
@@ -143,7 +376,10 @@ def test_run_no_reload(tmp_path, mocker):
     dialog_file.write_text(EXAMPLE_DIALOG)
 
     mocker.patch.object(
-        XKCDDisplayService, "got_sigterm", side_effect=[False, False, True]
+        XKCDDisplayService,
+        "got_sigterm",
+        # checked by the main loop and after waiting for the prefetch
+        side_effect=[False, False, False, False, True],
     )
     mocker.patch.object(
         XKCDDisplayService,
@@ -154,18 +390,15 @@ def test_run_no_reload(tmp_path, mocker):
     mocker.patch.object(XKCDDisplayService, "_display_dialog")
     mocker.patch.object(XKCDDisplayService, "_show_break_picture")
     mocker.patch.object(XKCDDisplayService, "_show_goodbye_picture")
+    mocker.patch.object(XKCDDisplayService, "_start_prefetch")
     mocker.patch.object(
         XKCDDisplayService, "_get_dialog_files", return_value=[dialog_file]
     )
 
     XKCDDisplayService(dialogs_directory=tmp_path).run()
 
-    assert XKCDDisplayService.got_sigterm.call_count == 3
-    assert XKCDDisplayService.got_sigterm.call_args_list == [
-        call(),
-        call(),
-        call(),
-    ]
+    assert XKCDDisplayService.got_sigterm.call_count == 5
+    assert XKCDDisplayService.got_sigterm.call_args_list == [call()] * 5
     assert XKCDDisplayService.got_signal.call_count == 6
     assert XKCDDisplayService.got_signal.call_args_list == [
         call(signal.SIGHUP, clear=True),
@@ -185,6 +418,11 @@ def test_run_no_reload(tmp_path, mocker):
         call(None, dialog_file),
         call(dialog_file, dialog_file),
     ]
+    assert XKCDDisplayService._start_prefetch.call_count == 2
+    assert XKCDDisplayService._start_prefetch.call_args_list == [
+        call(dialog_file, dialog_file),
+        call(dialog_file, dialog_file),
+    ]
     assert XKCDDisplayService._show_goodbye_picture.call_count == 1
     assert XKCDDisplayService._show_goodbye_picture.call_args == call()
     assert XKCDDisplayService._get_dialog_files.call_count == 1
@@ -199,7 +437,10 @@ def test_run_with_reload(tmp_path, mocker):
     dialog_file.write_text(EXAMPLE_DIALOG)
 
     mocker.patch.object(
-        XKCDDisplayService, "got_sigterm", side_effect=[False, False, True]
+        XKCDDisplayService,
+        "got_sigterm",
+        # checked by the main loop and after waiting for the prefetch
+        side_effect=[False, False, False, False, True],
     )
     mocker.patch.object(
         XKCDDisplayService,
@@ -207,21 +448,19 @@ def test_run_with_reload(tmp_path, mocker):
         # groups of three: SIGHUP (reload), SIGUSR2 (pause), SIGUSR1 (play)
         side_effect=[True, False, True, False, False, False],
     )
+    mocker.patch("xkcd_display.renderer.FitCache.clear")
     mocker.patch.object(XKCDDisplayService, "_display_dialog")
     mocker.patch.object(XKCDDisplayService, "_show_break_picture")
     mocker.patch.object(XKCDDisplayService, "_show_goodbye_picture")
+    mocker.patch.object(XKCDDisplayService, "_start_prefetch")
     mocker.patch.object(
         XKCDDisplayService, "_get_dialog_files", return_value=[dialog_file]
     )
 
     XKCDDisplayService(dialogs_directory=tmp_path).run()
 
-    assert XKCDDisplayService.got_sigterm.call_count == 3
-    assert XKCDDisplayService.got_sigterm.call_args_list == [
-        call(),
-        call(),
-        call(),
-    ]
+    assert XKCDDisplayService.got_sigterm.call_count == 5
+    assert XKCDDisplayService.got_sigterm.call_args_list == [call()] * 5
     assert XKCDDisplayService.got_signal.call_count == 6
     assert XKCDDisplayService.got_signal.call_args_list == [
         call(signal.SIGHUP, clear=True),
@@ -241,6 +480,11 @@ def test_run_with_reload(tmp_path, mocker):
         call(None, dialog_file),
         call(dialog_file, dialog_file),
     ]
+    assert XKCDDisplayService._start_prefetch.call_count == 2
+    assert XKCDDisplayService._start_prefetch.call_args_list == [
+        call(dialog_file, dialog_file),
+        call(dialog_file, dialog_file),
+    ]
     assert XKCDDisplayService._show_goodbye_picture.call_count == 1
     assert XKCDDisplayService._show_goodbye_picture.call_args == call()
     assert XKCDDisplayService._get_dialog_files.call_count == 2
@@ -248,6 +492,9 @@ def test_run_with_reload(tmp_path, mocker):
         call(tmp_path),
         call(tmp_path),
     ]
+    from xkcd_display.renderer import FitCache
+
+    assert FitCache.clear.call_count == 1
 
 
 def test_run_play_then_pause(tmp_path, mocker):
@@ -259,7 +506,10 @@ def test_run_play_then_pause(tmp_path, mocker):
     dialog_file.write_text(EXAMPLE_DIALOG)
 
     mocker.patch.object(
-        XKCDDisplayService, "got_sigterm", side_effect=[False, False, True]
+        XKCDDisplayService,
+        "got_sigterm",
+        # checked by the main loop and after waiting for the prefetch
+        side_effect=[False, False, False, True],
     )
     mocker.patch.object(
         XKCDDisplayService,
@@ -270,6 +520,7 @@ def test_run_play_then_pause(tmp_path, mocker):
     mocker.patch.object(XKCDDisplayService, "_display_dialog")
     mocker.patch.object(XKCDDisplayService, "_show_break_picture")
     mocker.patch.object(XKCDDisplayService, "_show_goodbye_picture")
+    mocker.patch.object(XKCDDisplayService, "_start_prefetch")
     mocker.patch.object(
         XKCDDisplayService, "_get_dialog_files", return_value=[dialog_file]
     )
@@ -277,12 +528,8 @@ def test_run_play_then_pause(tmp_path, mocker):
 
     XKCDDisplayService(dialogs_directory=tmp_path).run()
 
-    assert XKCDDisplayService.got_sigterm.call_count == 3
-    assert XKCDDisplayService.got_sigterm.call_args_list == [
-        call(),
-        call(),
-        call(),
-    ]
+    assert XKCDDisplayService.got_sigterm.call_count == 4
+    assert XKCDDisplayService.got_sigterm.call_args_list == [call()] * 4
     assert XKCDDisplayService.got_signal.call_count == 6
     assert XKCDDisplayService.got_signal.call_args_list == [
         call(signal.SIGHUP, clear=True),
@@ -306,6 +553,208 @@ def test_run_play_then_pause(tmp_path, mocker):
     assert XKCDDisplayService._get_dialog_files.call_args == call(tmp_path)
 
 
+def test_run_stopped_while_waiting_for_prefetch(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+
+    dialog_file = tmp_path / "123.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+
+    mocker.patch.object(
+        XKCDDisplayService, "got_sigterm", side_effect=[False, True]
+    )
+    mocker.patch.object(
+        XKCDDisplayService,
+        "got_signal",
+        # groups of three: SIGHUP (reload), SIGUSR2 (pause), SIGUSR1 (play)
+        side_effect=[False, False, True],
+    )
+    mocker.patch.object(XKCDDisplayService, "_wait_for_prefetch")
+    mocker.patch.object(XKCDDisplayService, "_display_dialog")
+    mocker.patch.object(XKCDDisplayService, "_show_break_picture")
+    mocker.patch.object(XKCDDisplayService, "_show_goodbye_picture")
+    mocker.patch.object(XKCDDisplayService, "_start_prefetch")
+    mocker.patch.object(
+        XKCDDisplayService, "_get_dialog_files", return_value=[dialog_file]
+    )
+
+    XKCDDisplayService(dialogs_directory=tmp_path).run()
+
+    assert XKCDDisplayService._wait_for_prefetch.call_count == 1
+    assert XKCDDisplayService._show_break_picture.call_count == 0
+    assert XKCDDisplayService._start_prefetch.call_count == 0
+    assert XKCDDisplayService._display_dialog.call_count == 0
+    assert XKCDDisplayService._show_goodbye_picture.call_count == 1
+
+
+def test_render_frames_uses_cache(mocker):
+    from xkcd_display.display import XKCDDisplayService
+    from xkcd_display.frames import FRAME_SIZE
+
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.frame_key",
+        side_effect=lambda text: f"key-{text}",
+    )
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.render_dialog",
+        side_effect=lambda texts, stats, cancelled: [
+            bytes(FRAME_SIZE) for t in texts
+        ],
+    )
+    instance = XKCDDisplayService()
+    instance.frame_cache.put("key-b", bytes([1]) * FRAME_SIZE)
+
+    result = instance.render_frames(["a", "b", "c"])
+
+    assert result == [
+        bytes(FRAME_SIZE),
+        bytes([1]) * FRAME_SIZE,
+        bytes(FRAME_SIZE),
+    ]
+    assert "key-a" in instance.frame_cache
+    assert "key-c" in instance.frame_cache
+    from xkcd_display.renderer import Renderer
+
+    assert Renderer.render_dialog.call_count == 1
+    assert Renderer.render_dialog.call_args == call(
+        ["a", "c"], stats=None, cancelled=None
+    )
+
+    instance.render_frames(["a", "b", "c"])
+
+    assert Renderer.render_dialog.call_count == 1
+
+
+def test_prefetch_frames(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+    import threading
+
+    dialog_file = tmp_path / "123.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+    mocker.patch.object(XKCDDisplayService, "render_frames")
+    mocker.patch.object(XKCDDisplayService, "render_frame")
+
+    cancelled = threading.Event()
+
+    XKCDDisplayService()._prefetch_frames(
+        Path("old.txt"), dialog_file, cancelled
+    )
+
+    assert XKCDDisplayService.render_frames.call_args_list == [
+        call(
+            [
+                "Goodbye old, Hello 123",
+                "You're flying! How?",
+                "Python!",
+                "I learned it last night!",
+            ],
+            cancelled=cancelled,
+        )
+    ]
+    assert XKCDDisplayService.render_frame.call_count == 0
+
+
+def test_prefetch_frames_one_by_one_on_error(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+    import threading
+
+    dialog_file = tmp_path / "123.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+    mocker.patch.object(
+        XKCDDisplayService, "render_frames", side_effect=ValueError("no fit")
+    )
+    mocker.patch.object(
+        XKCDDisplayService,
+        "render_frame",
+        side_effect=[b"", ValueError("no fit"), b"", b""],
+    )
+
+    XKCDDisplayService()._prefetch_frames(
+        Path("old.txt"), dialog_file, threading.Event()
+    )
+
+    assert XKCDDisplayService.render_frame.call_args_list == [
+        call("Goodbye old, Hello 123"),
+        call("You're flying! How?"),
+        call("Python!"),
+        call("I learned it last night!"),
+    ]
+
+
+def test_prefetch_frames_cancelled(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+    from xkcd_display.frames import FRAME_SIZE, FrameCache
+    from xkcd_display.renderer import RenderingFit
+    import threading
+
+    dialog_file = tmp_path / "123.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+    cancelled = threading.Event()
+
+    def render(text, export, start=None, stats=None):
+        if text == "You're flying! How?":
+            cancelled.set()  # cancelled while the second frame is rendered
+        return bytes(FRAME_SIZE), RenderingFit([text], 20, 0, 0, 20)
+
+    mocker.patch(
+        "xkcd_display.renderer.Renderer.frame_key",
+        side_effect=lambda text: f"key-{text}",
+    )
+    mocker.patch("xkcd_display.renderer.Renderer._render", side_effect=render)
+    mocker.patch.object(XKCDDisplayService, "render_frame")
+    instance = XKCDDisplayService()
+    instance._frame_cache = FrameCache(tmp_path / "cache")
+    instance._precompiled_frames = FrameCache(tmp_path / "precompiled")
+
+    instance._prefetch_frames(Path("old.txt"), dialog_file, cancelled)
+
+    from xkcd_display.renderer import Renderer
+
+    assert [c[0][0] for c in Renderer._render.call_args_list] == [
+        "Goodbye old, Hello 123",
+        "You're flying! How?",
+    ]
+    assert "key-Goodbye old, Hello 123" in instance.frame_cache
+    assert "key-You're flying! How?" in instance.frame_cache
+    assert "key-Python!" not in instance.frame_cache
+    assert "key-I learned it last night!" not in instance.frame_cache
+    assert XKCDDisplayService.render_frame.call_count == 0
+
+
+def test_start_and_wait_for_prefetch(tmp_path, mocker):
+    from xkcd_display.display import XKCDDisplayService
+
+    dialog_file = tmp_path / "123.txt"
+    dialog_file.write_text(EXAMPLE_DIALOG)
+    mocker.patch.object(XKCDDisplayService, "render_frames")
+
+    instance = XKCDDisplayService()
+    instance._start_prefetch(None, dialog_file)
+    instance._wait_for_prefetch()
+    instance._prefetch_executor.shutdown()
+
+    assert instance._prefetch is None
+    assert XKCDDisplayService.render_frames.call_count == 1
+    texts = XKCDDisplayService.render_frames.call_args[0][0]
+    assert len(texts) == 4
+    assert texts[0] == "Starting with 123"
+
+
+def test_cancel_prefetch(mocker):
+    from xkcd_display.display import XKCDDisplayService
+    import threading
+
+    future = mocker.Mock()
+    cancelled = threading.Event()
+    instance = XKCDDisplayService()
+    instance._prefetch = (future, cancelled)
+
+    instance._cancel_prefetch()
+
+    assert cancelled.is_set()
+    assert future.cancel.call_count == 1
+    assert instance._prefetch is None
+
+
 @pytest.mark.parametrize(
     "old,new", [(None, Path("1.txt")), (Path("2.txt"), Path("3.txt"))]
 )
@@ -313,25 +762,25 @@ def test_show_break_picture(mocker, old, new):
     from xkcd_display.display import XKCDDisplayService
 
     mocker.patch(
-        "xkcd_display.renderer.render_xkcd_image_as_pixels",
+        "xkcd_display.renderer.Renderer.render_frame",
         return_value="pixels",
     )
     mocker.patch("xkcd_display.epd_dummy.EPDummy.show_and_move")
     mocker.patch.object(time, "sleep")
 
     XKCDDisplayService()._show_break_picture(old, new)
-    from xkcd_display.renderer import render_xkcd_image_as_pixels
+    from xkcd_display.renderer import Renderer
     from xkcd_display.epd_dummy import EPDummy
 
-    assert render_xkcd_image_as_pixels.call_count == 1
+    assert Renderer.render_frame.call_count == 1
     if old is None:
-        assert "Starting" in render_xkcd_image_as_pixels.call_args[0][0]
+        assert "Starting" in Renderer.render_frame.call_args[0][0]
     else:
-        assert old.stem in render_xkcd_image_as_pixels.call_args[0][0]
-    assert new.stem in render_xkcd_image_as_pixels.call_args[0][0]
+        assert old.stem in Renderer.render_frame.call_args[0][0]
+    assert new.stem in Renderer.render_frame.call_args[0][0]
     assert EPDummy.show_and_move.call_count == 1
     assert EPDummy.show_and_move.call_args == call(
-        ANY, quick_refresh=False, move_to=7.5
+        ANY, quick_refresh=False, move_to="center"
     )
     assert time.sleep.call_count == 1
     assert time.sleep.call_args == call(5)
@@ -341,20 +790,41 @@ def test_show_goodbye_picture(mocker):
     from xkcd_display.display import XKCDDisplayService
 
     mocker.patch(
-        "xkcd_display.renderer.render_xkcd_image_as_pixels",
+        "xkcd_display.renderer.Renderer.render_frame",
         return_value="pixels",
     )
     mocker.patch("xkcd_display.epd_dummy.EPDummy.show_and_move")
 
     XKCDDisplayService()._show_goodbye_picture()
-    from xkcd_display.renderer import render_xkcd_image_as_pixels
+    from xkcd_display.renderer import Renderer
     from xkcd_display.epd_dummy import EPDummy
 
-    assert render_xkcd_image_as_pixels.call_count == 1
-    assert render_xkcd_image_as_pixels.call_args == call(
-        "Be excellent to each other"
+    assert Renderer.render_frame.call_count == 1
+    assert Renderer.render_frame.call_args == call(
+        "Be excellent to each other", stats=None
     )
     assert EPDummy.show_and_move.call_count == 1
     assert EPDummy.show_and_move.call_args == call(
-        ANY, quick_refresh=False, move_to=7.5
+        ANY, quick_refresh=False, move_to="center"
+    )
+
+
+def test_show_frame_logs_display_errors(mocker):
+    from xkcd_display.display import XKCDDisplayService
+
+    mocker.patch(
+        "xkcd_display.epd_dummy.EPDummy.show_and_move",
+        side_effect=OSError("spi bus gone"),
+    )
+    instance = XKCDDisplayService()
+    mocker.patch.object(instance.logger, "error")
+
+    future = instance._show_frame(
+        b"frame", quick_refresh=True, move_to="cueball"
+    )
+
+    assert future.done()
+    assert isinstance(future.exception(), OSError)
+    assert instance.logger.error.call_args == call(
+        "could not display frame: spi bus gone"
     )
@@ -0,0 +1,77 @@
+import pytest
+import tempfile
+
+from pathlib import Path
+
+
+@pytest.fixture
+def tmp_path():
+    with tempfile.TemporaryDirectory() as tempdir:
+        yield Path(tempdir)
+
+
+def test_text_features():
+    from xkcd_display.font_size_model import text_features, TextFeatures
+
+    assert text_features("Python! I learned it") == TextFeatures(20, 4, 7)
+    assert text_features("") == TextFeatures(0, 0, 0)
+
+
+def test_font_size_model_without_data():
+    from xkcd_display.font_size_model import FontSizeModel
+
+    assert FontSizeModel().predict("sigh") is None
+
+
+def test_font_size_model_predict():
+    from xkcd_display.font_size_model import FontSizeModel, Prediction
+
+    model = FontSizeModel()
+    model.learn("yeah", 200)
+    model.learn("Python! I learned it last night!", 60)
+
+    assert model.predict("sigh") == Prediction(200, known=True)
+    prediction = model.predict("Python! I learned it!")
+    assert not prediction.known
+    assert 60 < prediction.font_size < 200
+
+
+def test_font_size_model_forgets_least_recently_learned():
+    from xkcd_display.font_size_model import FontSizeModel
+
+    model = FontSizeModel(max_samples=2)
+    model.learn("a", 10)
+    model.learn("bb", 20)
+    model.learn("a", 11)
+    model.learn("ccc", 30)
+
+    assert len(model) == 2
+    assert model.predict("a").known
+    assert not model.predict("bb").known
+
+
+def test_font_size_model_save_and_load(tmp_path):
+    from xkcd_display.font_size_model import FontSizeModel
+
+    path = tmp_path / "model" / "sizes.json"
+    model = FontSizeModel()
+    model.learn("yeah", 200)
+    model.save(path)
+
+    assert not model.changed
+    assert FontSizeModel.load(path).predict("sigh") == model.predict("sigh")
+
+    # nothing new learned, nothing written
+    path.unlink()
+    model.save(path)
+
+    assert not path.exists()
+
+
+def test_font_size_model_load_falls_back_to_empty_model(tmp_path):
+    from xkcd_display.font_size_model import FontSizeModel
+
+    (tmp_path / "corrupt.json").write_text('{"version": 1, "samples": [[')
+
+    assert len(FontSizeModel.load(tmp_path / "missing.json")) == 0
+    assert len(FontSizeModel.load(tmp_path / "corrupt.json")) == 0
@@ -0,0 +1,134 @@
+import pytest
+import tempfile
+
+from collections import namedtuple
+from pathlib import Path
+from unittest.mock import call
+
+
+@pytest.fixture
+def tmp_path():
+    with tempfile.TemporaryDirectory() as tempdir:
+        yield Path(tempdir)
+
+
+@pytest.fixture
+def table():
+    from xkcd_display.font_table import FontMetricsTable
+
+    return FontMetricsTable(
+        font_hash="abc",
+        advances={"a": 10, "b": 20, " ": 5},
+        kerning={"ab": -2},
+        ascent=80,
+        descent=-20,
+        line_height=110,
+        character_height=100,
+        reference_size=100,
+    )
+
+
+def test_line_width(table):
+    assert table.line_width("a b") == 35
+    assert table.line_width("ab") == 28
+    # unknown characters are estimated with the widest advance
+    assert table.line_width("ax") == 30
+
+
+def test_measure(table):
+    from xkcd_display import FontMetrics
+
+    result = table.measure("ab\na b a", 50)
+
+    assert isinstance(result, FontMetrics)
+    assert result.width == 25
+    assert result.height == 110
+    assert result.character_height == 50
+
+
+def test_save_and_load(table, tmp_path):
+    from xkcd_display.font_table import FontMetricsTable
+
+    path = tmp_path / "font.metrics.json"
+    table.save(path)
+
+    result = FontMetricsTable.load(path)
+
+    assert result.to_dict() == table.to_dict()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_build_font_metrics_table(mocker):
+    from xkcd_display.font_table import build_font_metrics_table
+    from wand.drawing import Drawing
+
+    WandMetrics = namedtuple(
+        "WandMetrics",
+        ["text_width", "text_height", "character_height", "ascender"]
+        + ["descender"],
+    )
+
+    def mock_metrics(img, text, multiline=False):
+        # the enclosing character has a width of 1, every other one of 7
+        width = len(text) * 7 - 6 * text.count("|")
+        return WandMetrics(width, 12, 10, 9, -3)
+
+    mocker.patch.object(Drawing, "get_font_metrics", side_effect=mock_metrics)
+    mocker.patch(
+        "xkcd_display.font_table.font_file_hash", return_value="abc"
+    )
+
+    result = build_font_metrics_table("some.ttf", characters="ab ")
+
+    assert result.font_hash == "abc"
+    assert result.advances == {"a": 7, "b": 7, " ": 7}
+    assert result.kerning == {}
+    assert result.line_height == 12
+    assert result.character_height == 10
+    assert result.ascent == 9
+    assert result.descent == -3
+    # enclosure, three characters, one kerning check and the line height
+    assert Drawing.get_font_metrics.call_count == 6
+
+
+def test_load_font_metrics_table(mocker, table, tmp_path):
+    from xkcd_display import font_table
+
+    font_file = tmp_path / "font.ttf"
+    font_file.write_bytes(b"font data")
+    table.font_hash = font_table.font_file_hash(font_file)
+    mocker.patch.object(
+        font_table, "build_font_metrics_table", return_value=table
+    )
+    mocker.patch.dict(font_table._loaded_tables, clear=True)
+
+    first = font_table.load_font_metrics_table(font_file)
+    font_table._loaded_tables.clear()
+    second = font_table.load_font_metrics_table(font_file)
+
+    assert first is table
+    assert second.to_dict() == table.to_dict()
+    assert (tmp_path / "font.metrics.json").exists()
+    assert font_table.build_font_metrics_table.call_count == 1
+    assert font_table.build_font_metrics_table.call_args == call(
+        str(font_file)
+    )
+
+
+def test_load_font_metrics_table_rebuilds_outdated(mocker, table, tmp_path):
+    from xkcd_display import font_table
+
+    font_file = tmp_path / "font.ttf"
+    font_file.write_bytes(b"font data")
+    table.save(tmp_path / "font.metrics.json")
+    rebuilt = mocker.Mock()
+    mocker.patch.object(
+        font_table, "build_font_metrics_table", return_value=rebuilt
+    )
+    mocker.patch.dict(font_table._loaded_tables, clear=True)
+
+    result = font_table.load_font_metrics_table(font_file)
+
+    assert result is rebuilt
+    assert rebuilt.save.call_count == 1
+    assert font_table.build_font_metrics_table.call_count == 1
@@ -0,0 +1,137 @@
+import os
+import pytest
+import tempfile
+
+from pathlib import Path
+
+
+@pytest.fixture
+def tmp_path():
+    with tempfile.TemporaryDirectory() as tempdir:
+        yield Path(tempdir)
+
+
+def frame_of(value):
+    from xkcd_display.frames import FRAME_SIZE
+
+    return bytes([value]) * FRAME_SIZE
+
+
+def test_pack_pixels():
+    from xkcd_display.frames import pack_pixels
+
+    pixels = [1.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0] + [0.0, 0.5]
+
+    result = pack_pixels(pixels)
+
+    assert result == bytes([0b10110011, 0b01111111])
+
+
+def test_frame_cache_put_and_get(tmp_path):
+    from xkcd_display.frames import FrameCache
+
+    cache = FrameCache(tmp_path / "frames")
+    cache.put("abc", frame_of(0x0F))
+
+    assert "abc" in cache
+    assert len(cache) == 1
+    assert cache.get("abc") == frame_of(0x0F)
+    assert cache.get("unknown") is None
+    # no temporary files are left behind
+    assert [p.name for p in (tmp_path / "frames").iterdir()] == ["abc.frame"]
+
+
+def test_frame_cache_is_persistent(tmp_path):
+    from xkcd_display.frames import FrameCache
+
+    FrameCache(tmp_path).put("abc", frame_of(0x0F))
+
+    assert FrameCache(tmp_path).get("abc") == frame_of(0x0F)
+
+
+def test_frame_cache_put_raises_error_on_wrong_size(tmp_path):
+    from xkcd_display.frames import FrameCache
+
+    cache = FrameCache(tmp_path)
+
+    with pytest.raises(ValueError):
+        cache.put("abc", b"too short")
+    assert len(cache) == 0
+
+
+def test_frame_cache_ignores_corrupt_frames(tmp_path):
+    from xkcd_display.frames import FrameCache
+
+    (tmp_path / "abc.frame").write_bytes(b"corrupt")
+
+    assert FrameCache(tmp_path).get("abc") is None
+
+
+def test_frame_cache_evicts_least_recently_used(tmp_path):
+    from xkcd_display.frames import FrameCache, FRAME_SIZE
+
+    cache = FrameCache(tmp_path, max_bytes=2 * FRAME_SIZE)
+    cache.put("first", frame_of(1))
+    cache.put("second", frame_of(2))
+    cache.get("first")
+    cache.put("third", frame_of(3))
+
+    assert "first" in cache
+    assert "second" not in cache
+    assert "third" in cache
+    assert len(cache) == 2
+
+
+def test_frame_cache_eviction_order_survives_restart(tmp_path):
+    from xkcd_display.frames import FrameCache, FRAME_SIZE
+
+    cache = FrameCache(tmp_path)
+    cache.put("first", frame_of(1))
+    cache.put("second", frame_of(2))
+    os.utime(tmp_path / "first.frame", (1, 1))
+    os.utime(tmp_path / "second.frame", (2, 2))
+
+    cache = FrameCache(tmp_path, max_bytes=2 * FRAME_SIZE)
+    cache.put("third", frame_of(3))
+
+    assert "first" not in cache
+    assert "second" in cache
+    assert "third" in cache
+
+
+def test_frame_cache_clear(tmp_path):
+    from xkcd_display.frames import FrameCache
+
+    cache = FrameCache(tmp_path)
+    cache.put("first", frame_of(1))
+    cache.clear()
+
+    assert len(cache) == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_frame_cache_without_size_limit(tmp_path):
+    from xkcd_display.frames import FrameCache
+
+    cache = FrameCache(tmp_path, max_bytes=None)
+    for value in range(5):
+        cache.put(f"frame-{value}", frame_of(value))
+
+    assert len(cache) == 5
+
+
+def test_frame_cache_keys_and_discard(tmp_path):
+    from xkcd_display.frames import FrameCache
+
+    cache = FrameCache(tmp_path)
+    cache.put("first", frame_of(1))
+    cache.put("second", frame_of(2))
+    cache.get("first")
+
+    assert cache.keys() == ["second", "first"]
+
+    cache.discard("second")
+    cache.discard("unknown")
+
+    assert cache.keys() == ["first"]
+    assert list(tmp_path.iterdir()) == [tmp_path / "first.frame"]
@@ -0,0 +1,161 @@
+import pytest
+import tempfile
+
+from pathlib import Path
+
+
+EXAMPLE_DIALOG = """
+    Cueball 1: You're flying! How?
+    Megan: Python!
+    Megan: I learned it last night!
+    """
+
+
+@pytest.fixture
+def tmp_path():
+    with tempfile.TemporaryDirectory() as tempdir:
+        yield Path(tempdir)
+
+
+@pytest.fixture
+def dialogs_dir(tmp_path):
+    dialogs_dir = tmp_path / "dialogs"
+    dialogs_dir.mkdir()
+    (dialogs_dir / "353.txt").write_text(EXAMPLE_DIALOG)
+    (dialogs_dir / "1319.txt").write_text("Megan: yeah\nCueball: sigh")
+    return dialogs_dir
+
+
+def test_break_texts():
+    from xkcd_display.precompile import break_texts
+
+    texts = break_texts([Path("a.txt"), Path("b.txt")])
+
+    assert texts == [
+        "Starting with a",
+        "Starting with b",
+        "Be excellent to each other",
+    ]
+
+
+def test_break_texts_pairwise():
+    from xkcd_display.precompile import break_texts
+
+    texts = break_texts([Path("a.txt"), Path("b.txt")], pairwise=True)
+
+    assert texts == [
+        "Starting with a",
+        "Goodbye a, Hello a",
+        "Goodbye b, Hello a",
+        "Starting with b",
+        "Goodbye a, Hello b",
+        "Goodbye b, Hello b",
+        "Be excellent to each other",
+    ]
+
+
+def test_manifest_roundtrip(tmp_path):
+    from xkcd_display.precompile import load_manifest, save_manifest
+
+    dialogs = {"353.txt": {"hash": "abc", "keys": ["1", "2"]}}
+    save_manifest(tmp_path / "store", "renderer", dialogs)
+
+    assert load_manifest(tmp_path / "store", "renderer") == dialogs
+    assert load_manifest(tmp_path / "store", "other renderer") == {}
+    assert load_manifest(tmp_path / "missing", "renderer") == {}
+    assert list((tmp_path / "store").iterdir()) == [
+        tmp_path / "store" / "manifest.json"
+    ]
+
+
+def test_precompile_dialogs(dialogs_dir, tmp_path):
+    pytest.importorskip("PIL")
+    from xkcd_display.frames import FrameCache
+    from xkcd_display.precompile import precompile_dialogs
+    from xkcd_display.renderer import Renderer
+
+    store_dir = tmp_path / "store"
+
+    result = precompile_dialogs(
+        dialogs_dir, store_dir, backend="pillow", workers=2
+    )
+
+    assert result.rendered == 3 + 2 + 3
+    assert result.unchanged == 0
+    assert result.failed == []
+    xkcd_renderer = Renderer(backend="pillow")
+    store = FrameCache(store_dir)
+    for text in ["Python!", "sigh", "Starting with 353"]:
+        key = xkcd_renderer.frame_key(text)
+        assert store.get(key) == xkcd_renderer.render_frame(text)
+
+    # only changed dialogs and new break texts are rendered again
+    (dialogs_dir / "1319.txt").write_text("Megan: yeah\nCueball: *sigh*")
+
+    result = precompile_dialogs(
+        dialogs_dir, store_dir, backend="pillow", workers=2
+    )
+
+    assert result.rendered == 2
+    assert result.unchanged == 1
+
+    # frames of removed dialogs are removed from the store
+    (dialogs_dir / "1319.txt").unlink()
+
+    result = precompile_dialogs(dialogs_dir, store_dir, backend="pillow")
+
+    assert result.rendered == 0
+    assert result.unchanged == 1
+    assert len(FrameCache(store_dir)) == 3 + 2
+    assert xkcd_renderer.frame_key("sigh") not in store
+
+
+def test_precompile_dialogs_pairwise_breaks(dialogs_dir, tmp_path):
+    pytest.importorskip("PIL")
+    from xkcd_display.frames import FrameCache
+    from xkcd_display.precompile import precompile_dialogs
+    from xkcd_display.renderer import Renderer
+
+    store_dir = tmp_path / "store"
+
+    result = precompile_dialogs(
+        dialogs_dir, store_dir, backend="pillow", pairwise_breaks=True
+    )
+
+    assert result.rendered == 3 + 2 + 7
+    key = Renderer(backend="pillow").frame_key("Goodbye 1319, Hello 353")
+    assert key in FrameCache(store_dir)
+
+
+def test_precompile_dialogs_renders_repeated_texts_once(
+    dialogs_dir, tmp_path
+):
+    pytest.importorskip("PIL")
+    from xkcd_display.precompile import precompile_dialogs
+
+    (dialogs_dir / "42.txt").write_text("Megan: Python!\nCueball: sigh")
+
+    result = precompile_dialogs(
+        dialogs_dir, tmp_path / "store", backend="pillow", workers=2
+    )
+
+    assert result.rendered == 3 + 2 + 4
+    assert result.failed == []
+
+
+def test_precompile_dialogs_reports_failures(dialogs_dir, tmp_path):
+    pytest.importorskip("PIL")
+    from xkcd_display.precompile import precompile_dialogs
+
+    too_long = "x" * 3000
+    (dialogs_dir / "1319.txt").write_text(f"Megan: yeah\nCueball: {too_long}")
+    (dialogs_dir / "broken.txt").write_text("Megan: only one speaker")
+
+    result = precompile_dialogs(
+        dialogs_dir, tmp_path / "store", backend="pillow", workers=2
+    )
+
+    assert sorted(result.failed) == [
+        ("broken.txt", "Wrong number of speakers: 1"),
+        (too_long, "Could not find fitting font size"),
+    ]
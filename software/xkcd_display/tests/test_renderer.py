@@ -2,6 +2,8 @@ import pytest
 from collections import namedtuple
 from unittest.mock import ANY, call
 
+from pathlib import Path
+
 from xkcd_display import Size
 
 
@@ -104,6 +106,34 @@ def test_unique_text_wraps():
     assert result == expected
 
 
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "   ",
+        "Python!",
+        "Supercalifragilisticexpialidocious is a very long word",
+        "A well-known, self-explanatory  text\twith\ttabs -- and dashes",
+        "I I I I I I I I I I I I I I I I I I I I I I I I I I I I I I I I",
+    ],
+)
+def test_unique_text_wraps_matches_textwrap(text):
+    from xkcd_display.renderer import unique_text_wraps
+    import textwrap
+
+    expected = []
+    lines_checked = set()
+    for wrap_at in range(1, len(text) + 1):
+        wrapped_lines = textwrap.wrap(text, wrap_at, break_long_words=False)
+        if len(wrapped_lines) not in lines_checked:
+            lines_checked.add(len(wrapped_lines))
+            expected.append(wrapped_lines)
+
+    result = list(unique_text_wraps(text))
+
+    assert result == expected
+
+
 def test_find_best_fitting_text_wrap(mocker):
     from xkcd_display.renderer import find_best_fitting_text_wrap
     from wand.drawing import Drawing
@@ -133,6 +163,37 @@ def test_find_best_fitting_text_wrap(mocker):
     )
 
 
+@pytest.mark.parametrize("fitting_lines, expected_calls", [(3, 3), (1, 3)])
+def test_find_best_fitting_text_wrap_bisect(
+    mocker, fitting_lines, expected_calls
+):
+    from xkcd_display.renderer import find_best_fitting_text_wrap
+
+    text = "Python! I learned it last night! Everything is so simple!"
+
+    def mock_metrics(sketch, img, text):
+        # texts with more lines than fitting_lines are too narrow
+        narrow = text.count("\n") + 1 > fitting_lines
+        return Size(width=1, height=2) if narrow else Size(1, 1)
+
+    mocker.patch(
+        "xkcd_display.renderer.eval_text_metrics", side_effect=mock_metrics
+    )
+
+    class MockSketch:
+        def __init__(self):
+            self.font_size = 12
+
+    result = find_best_fitting_text_wrap(
+        MockSketch(), "image", Size(1, 1), text, search="bisect"
+    )
+
+    assert len(result) == fitting_lines
+    from xkcd_display.renderer import eval_text_metrics
+
+    assert eval_text_metrics.call_count == expected_calls
+
+
 @pytest.mark.parametrize(
     "start, stop, factor, expected",
     [
@@ -157,9 +218,7 @@ def test_find_best_text_fit(mocker):
     )
 
     lines = ["Python! I learned it", "last night! Everything", "is so simple!"]
-    mocker.patch(
-        "xkcd_display.renderer.find_best_fitting_text_wrap", return_value=lines
-    )
+    mocker.patch("xkcd_display.renderer.best_text_wrap", return_value=lines)
     effects = [
         FontMetrics(width=1, height=1, character_height=1),
         FontMetrics(width=2, height=2, character_height=2),
@@ -184,12 +243,13 @@ def test_find_best_text_fit(mocker):
     assert result.font_size == 3
     assert result.width == 3
     assert result.height == 3
+    assert result.probes == 3
     assert result.character_height == 3
-    from xkcd_display.renderer import find_best_fitting_text_wrap
+    from xkcd_display.renderer import best_text_wrap
 
-    assert find_best_fitting_text_wrap.call_count == 1
-    assert find_best_fitting_text_wrap.call_args == call(
-        sketch, "image", max_size, "text"
+    assert best_text_wrap.call_count == 1
+    assert best_text_wrap.call_args == call(
+        ANY, 1, max_size, "text", "linear"
     )
     from xkcd_display.renderer import eval_text_metrics
 
@@ -202,7 +262,7 @@ def test_find_best_text_fit(mocker):
 def test_find_best_raises_value_error(mocker):
     from xkcd_display.renderer import find_best_text_fit, FontMetrics
 
-    mocker.patch("xkcd_display.renderer.find_best_fitting_text_wrap")
+    mocker.patch("xkcd_display.renderer.best_text_wrap")
     mock_result = FontMetrics(width=2, height=2, character_height=1)
     mocker.patch(
         "xkcd_display.renderer.eval_text_metrics", return_value=mock_result
@@ -220,98 +280,776 @@ def test_find_best_raises_value_error(mocker):
         find_best_text_fit(sketch, "image", max_size, "text")
 
 
-def test_render_text(mocker):
-    from xkcd_display.renderer import (
-        render_text,
-        TextFitParameter,
-        RenderingFit,
-    )
+def test_find_best_text_fit_bisect(mocker):
+    from xkcd_display.renderer import find_best_text_fit, FontMetrics
 
     lines = ["Python! I learned it", "last night! Everything", "is so simple!"]
-    mock_result = TextFitParameter(
-        lines=lines, font_size=2, width=8, height=8, character_height=4
+    mocker.patch("xkcd_display.renderer.best_text_wrap", return_value=lines)
+    mocker.patch(
+        "xkcd_display.renderer.eval_text_metrics",
+        side_effect=lambda sketch, img, text: FontMetrics(
+            width=sketch.font_size * 3,
+            height=sketch.font_size,
+            character_height=sketch.font_size // 2,
+        ),
     )
+
+    class MockSketch:
+        def __init__(self):
+            self.font_size = 12
+
+    result = find_best_text_fit(
+        MockSketch(), "image", Size(100, 100), "text", search="bisect"
+    )
+
+    assert result.lines == lines
+    assert result.font_size == 33
+    assert result.width == 99
+    assert result.height == 33
+    assert result.character_height == 16
+
+
+def test_find_best_text_fit_estimated(mocker):
+    from xkcd_display.renderer import find_best_text_fit, FontMetrics
+
+    def mock_metrics(text, font_size, offset):
+        lines = text.split("\n")
+        return FontMetrics(
+            width=font_size * max(len(line) for line in lines) + offset,
+            height=font_size * len(lines) * 3,
+            character_height=font_size,
+        )
+
+    # the estimate is slightly too small, real metrics are a bit larger
     mocker.patch(
-        "xkcd_display.renderer.find_best_text_fit", return_value=mock_result
+        "xkcd_display.renderer.eval_text_metrics",
+        side_effect=lambda sketch, img, text: mock_metrics(
+            text, sketch.font_size, 20
+        ),
+    )
+
+    class MockTable:
+        def measure(self, text, font_size):
+            return mock_metrics(text, font_size, 0)
+
+    class MockSketch:
+        def __init__(self):
+            self.font_size = 12
+
+    result = find_best_text_fit(
+        MockSketch(),
+        "image",
+        Size(400, 300),
+        "Python! I learned it last night!",
+        search="bisect",
+        estimate=MockTable(),
+    )
+
+    assert result.lines == ["Python! I learned", "it last night!"]
+    assert result.font_size == 22
+    assert result.width == 22 * 17 + 20
+    from xkcd_display.renderer import eval_text_metrics
+
+    assert eval_text_metrics.call_count == 2
+
+
+def test_confirm_font_size_raises_value_error():
+    from xkcd_display.renderer import (
+        confirm_font_size,
+        FontMetrics,
+        FontSizeSearch,
     )
-    mocker.patch("wand.drawing.Drawing.text")
-    mocker.patch("wand.drawing.Drawing.draw")
+
+    def probe(text, font_size):
+        return FontMetrics(2, 2, 1)
+
+    estimated = FontSizeSearch(font_size=5, metrics=None, probes=3)
+
+    with pytest.raises(ValueError):
+        confirm_font_size(probe, Size(width=1, height=20), "text", estimated)
+
+
+def test_confirm_font_size_steps_up_from_a_low_estimate():
+    from xkcd_display.renderer import (
+        confirm_font_size,
+        FontMetrics,
+        FontSizeSearch,
+    )
+
+    def probe(text, font_size):
+        return FontMetrics(font_size, font_size, 1)
+
+    estimated = FontSizeSearch(font_size=15, metrics=None, probes=3)
+
+    result = confirm_font_size(
+        probe, Size(width=18, height=20), "text", estimated
+    )
+
+    assert result.font_size == 18
+    assert result.metrics == FontMetrics(18, 18, 1)
+    assert result.probes == 4
+
+
+def test_confirm_font_size_reduces_a_high_estimate():
+    from xkcd_display.renderer import (
+        confirm_font_size,
+        FontMetrics,
+        FontSizeSearch,
+    )
+
+    def probe(text, font_size):
+        return FontMetrics(font_size, font_size, 1)
+
+    estimated = FontSizeSearch(font_size=25, metrics=None, probes=3)
+
+    result = confirm_font_size(
+        probe, Size(width=18, height=20), "text", estimated
+    )
+
+    # the estimate is capped below the height, the next smaller size fits
+    assert result.font_size == 18
+    assert result.probes == 2
+
+
+def test_confirm_font_size_gallops_from_a_far_too_low_estimate():
+    from xkcd_display.renderer import (
+        confirm_font_size,
+        FontMetrics,
+        FontSizeSearch,
+    )
+
+    def probe(text, font_size):
+        return FontMetrics(font_size, font_size, 1)
+
+    estimated = FontSizeSearch(font_size=10, metrics=None, probes=3)
+
+    result = confirm_font_size(
+        probe, Size(width=70, height=200), "text", estimated
+    )
+
+    assert result.font_size == 70
+    assert result.probes <= 12
+
+
+def test_confirm_font_size_respects_the_height_limit():
+    from xkcd_display.renderer import (
+        confirm_font_size,
+        FontMetrics,
+        FontSizeSearch,
+    )
+
+    def probe(text, font_size):
+        return FontMetrics(1, 1, 1)
+
+    estimated = FontSizeSearch(font_size=18, metrics=None, probes=3)
+
+    result = confirm_font_size(
+        probe, Size(width=100, height=20), "text", estimated
+    )
+
+    assert result.font_size == 19
+
+
+def test_confirm_font_size_finds_font_size_one():
+    from xkcd_display.renderer import (
+        confirm_font_size,
+        FontMetrics,
+        FontSizeSearch,
+    )
+
+    def probe(text, font_size):
+        width = 5 if font_size == 1 else 1000
+        return FontMetrics(width, 1, 1)
+
+    estimated = FontSizeSearch(font_size=5, metrics=None, probes=3)
+
+    result = confirm_font_size(
+        probe, Size(width=10, height=20), "text", estimated
+    )
+
+    assert result.font_size == 1
+
+
+def test_fit_text_unknown_search():
+    from xkcd_display.renderer import fit_text
+
+    with pytest.raises(ValueError):
+        fit_text(None, Size(10, 10), "text", 12, search="?")
+
+
+@pytest.mark.parametrize("start", [1, 12, 40, 99, 500])
+@pytest.mark.parametrize("largest", [1, 2, 37, 98, 99])
+def test_bisect_font_size(start, largest):
+    from xkcd_display.renderer import bisect_font_size, FontMetrics
+
+    def probe(text, font_size):
+        # slightly non-linear to make the extrapolation imprecise
+        width = 10 * font_size + font_size ** 2 // 50
+        return FontMetrics(width, font_size, font_size)
+
+    max_size = Size(width=10 * largest + largest ** 2 // 50, height=100)
+
+    result = bisect_font_size(probe, max_size, "text", start)
+
+    assert result.font_size == largest
+    assert result.metrics == probe("text", largest)
+    assert 1 <= result.probes <= 10
+
+
+def test_bisect_font_size_raises_value_error():
+    from xkcd_display.renderer import bisect_font_size, FontMetrics
+
+    def probe(text, font_size):
+        return FontMetrics(2, 2, 1)
+
+    with pytest.raises(ValueError):
+        bisect_font_size(probe, Size(width=1, height=20), "text", 12)
+
+
+def test_render_text(mocker, mock_text_fit):
+    from xkcd_display.renderer import render_text, RenderingFit, fit_text
+    from xkcd_display.backends import WandBackend
 
     image = Size(width=20, height=20)
     result = render_text(image, "text", "font", padding=1)
 
     assert isinstance(result, RenderingFit)
-    assert result.lines == lines
+    assert result.lines == ["some", "text"]
     assert result.font_size == 2
     assert result.x == 5
     assert result.y == 9
     assert result.character_height == 4
-    from xkcd_display.renderer import find_best_text_fit
-
-    assert find_best_text_fit.call_count == 1
-    assert find_best_text_fit.call_args == call(
-        ANY, image, Size(width=18, height=18), "text"
+    assert fit_text.call_count == 1
+    assert fit_text.call_args == call(
+        ANY,
+        Size(width=18, height=18),
+        "text",
+        12,
+        "linear",
+        estimate=None,
+        start=None,
+        predicted=False,
+    )
+    assert WandBackend.draw_text.call_count == 1
+    assert WandBackend.draw_text.call_args == call(
+        image, 5, 9, "some\ntext", 2
     )
-    from wand.drawing import Drawing
 
-    assert Drawing.text.call_count == 1
-    assert Drawing.text.call_args == call(5, 9, "\n".join(lines))
-    assert Drawing.draw.call_count == 1
-    assert Drawing.draw.call_args == call(image)
 
+def test_render_text_uses_fit_cache(mocker, mock_text_fit):
+    from xkcd_display.renderer import render_text, FIT_CACHE, fit_text
+    from xkcd_display.backends import WandBackend
 
-def test_render_xkcd_image_as_gif(mocker):
-    from xkcd_display.renderer import render_xkcd_image_as_gif, XKCD_FONT_FILE
+    image = Size(width=20, height=20)
+    first = render_text(image, "some text", "font")
+    second = render_text(image, "some text", "font")
 
-    mocker.patch("xkcd_display.renderer.render_text")
-    mocker.patch("wand.image.Image.make_blob", return_value="some blob")
+    assert first == second
+    assert fit_text.call_count == 1
+    assert WandBackend.draw_text.call_count == 2
+    assert FIT_CACHE.info() == (1, 1, 256, 1)
 
-    result = render_xkcd_image_as_gif("text")
 
-    assert result == "some blob"
-    from xkcd_display.renderer import render_text
+def test_fit_cache():
+    from xkcd_display.renderer import FitCache
+
+    fit_cache = FitCache(maxsize=2)
+    fit_cache.put("a", 1)
+    fit_cache.put("b", 2)
+    assert fit_cache.get("a") == 1
+    fit_cache.put("c", 3)
+
+    assert fit_cache.get("b") is None
+    assert fit_cache.get("a") == 1
+    assert fit_cache.get("c") == 3
+    assert fit_cache.info() == (3, 1, 2, 2)
+
+    fit_cache.clear()
 
-    assert render_text.call_count == 1
-    assert render_text.call_args == call(
+    assert fit_cache.info() == (0, 0, 2, 0)
+    assert fit_cache.get("a") is None
+
+
+@pytest.fixture
+def mock_text_fit(mocker):
+    from xkcd_display.renderer import FIT_CACHE, TextFitParameter
+
+    FIT_CACHE.clear()
+    mock_result = TextFitParameter(
+        lines=["some", "text"],
+        font_size=2,
+        width=8,
+        height=8,
+        character_height=4,
+    )
+    mocker.patch("xkcd_display.renderer.fit_text", return_value=mock_result)
+    mocker.patch("xkcd_display.backends.load_font_metrics_table")
+    mocker.patch("xkcd_display.backends.WandBackend.draw_text")
+    yield mock_result
+    FIT_CACHE.clear()
+
+
+def assert_xkcd_text_fit():
+    from xkcd_display.renderer import fit_text
+    from xkcd_display.backends import WandBackend
+
+    assert fit_text.call_count == 1
+    assert fit_text.call_args == call(
         ANY,
+        Size(width=390, height=290),
         "text",
-        XKCD_FONT_FILE,
-        antialias=False,
-        color="black",
-        font_size_hint=12,
-        padding=5,
+        12,
+        "bisect",
+        estimate=ANY,
+        start=None,
+        predicted=False,
+    )
+    assert WandBackend.draw_text.call_count == 1
+    assert WandBackend.draw_text.call_args == call(
+        ANY, 191, 145, "some\ntext", 2
     )
+
+
+def test_render_xkcd_image_as_gif(mocker, mock_text_fit):
+    from xkcd_display.renderer import render_xkcd_image_as_gif
+
+    mocker.patch("wand.image.Image.make_blob", return_value="some blob")
+
+    result = render_xkcd_image_as_gif("text")
+
+    assert result == "some blob"
+    assert_xkcd_text_fit()
     from wand.image import Image
 
     assert Image.make_blob.call_count == 1
     assert Image.make_blob.call_args == call("gif")
 
 
-def test_render_render_xkcd_image_as_pixels(mocker):
-    from xkcd_display.renderer import (
-        render_xkcd_image_as_pixels,
-        XKCD_FONT_FILE,
-    )
+def test_render_render_xkcd_image_as_pixels(mocker, mock_text_fit):
+    from xkcd_display.renderer import render_xkcd_image_as_pixels
 
-    mocker.patch("xkcd_display.renderer.render_text")
     mocker.patch("wand.image.Image.export_pixels", return_value="some list")
 
     result = render_xkcd_image_as_pixels("text")
 
     assert "".join(result) == "some list"
-    from xkcd_display.renderer import render_text
-
-    assert render_text.call_count == 1
-    assert render_text.call_args == call(
-        ANY,
-        "text",
-        XKCD_FONT_FILE,
-        antialias=False,
-        color="black",
-        font_size_hint=12,
-        padding=5,
-    )
+    assert_xkcd_text_fit()
     from wand.image import Image
 
     assert Image.export_pixels.call_count == 1
     assert Image.export_pixels.call_args == call(channel_map="I")
+
+
+def test_xkcd_frame_key(mocker):
+    from xkcd_display import renderer
+
+    first = renderer.xkcd_frame_key("text")
+
+    assert first == renderer.xkcd_frame_key("text")
+    assert first != renderer.xkcd_frame_key("other text")
+    mocker.patch.object(renderer, "RENDERER_VERSION", -1)
+    assert first != renderer.xkcd_frame_key("text")
+    mocker.patch.dict(renderer.XKCD_RENDER_PROPERTIES, {"padding": 0})
+    assert first != renderer.xkcd_frame_key("text")
+
+
+@pytest.mark.parametrize("blob_size, packed", [(15000, False), (3, True)])
+def test_render_xkcd_image_as_frame(mocker, mock_text_fit, blob_size, packed):
+    from xkcd_display.renderer import render_xkcd_image_as_frame
+
+    mocker.patch(
+        "wand.image.Image.make_blob", return_value=bytes(blob_size)
+    )
+    mocker.patch(
+        "wand.image.Image.export_pixels", return_value=[1.0] * 120000
+    )
+
+    result = render_xkcd_image_as_frame("text")
+
+    assert result == bytes([0xFF if packed else 0x00]) * 15000
+    assert_xkcd_text_fit()
+    from wand.image import Image
+
+    assert Image.make_blob.call_args == call("gray")
+    assert Image.export_pixels.call_count == int(packed)
+
+
+def test_renderer_reuses_backend(mocker, mock_text_fit):
+    from xkcd_display.renderer import Renderer, FitCache, fit_text
+    from xkcd_display.backends import WandBackend
+    from wand.drawing import Drawing
+    from wand.image import Image
+
+    mocker.patch.object(Image, "make_blob", return_value=b"blob")
+    fit_cache = FitCache()
+    xkcd_renderer = Renderer(
+        font="some.ttf",
+        image_properties={"width": 10, "height": 20},
+        render_properties={"color": "black", "antialias": False},
+        fit_cache=fit_cache,
+        backend="wand",
+    )
+
+    assert xkcd_renderer.render_gif("one") == b"blob"
+    backend = xkcd_renderer.backend
+    assert xkcd_renderer.render_gif("two") == b"blob"
+    assert xkcd_renderer.render_gif("two") == b"blob"
+
+    assert xkcd_renderer.backend is backend
+    assert isinstance(backend, WandBackend)
+    assert isinstance(backend.sketch, Drawing)
+    assert backend.sketch.font == "some.ttf"
+    assert (backend.template.width, backend.template.height) == (10, 20)
+    # the fit of a text is only searched once
+    assert fit_text.call_count == 2
+    assert fit_text.call_args == call(
+        ANY,
+        Size(width=10, height=20),
+        "two",
+        12,
+        "linear",
+        estimate=None,
+        start=None,
+        predicted=False,
+    )
+    # the backend is probed through the line metrics memo
+    probe = fit_text.call_args[0][0]
+    assert probe.func == xkcd_renderer.line_metrics.measure
+    assert probe.args == (backend.measure,)
+    assert fit_cache.info().hits == 1
+    assert WandBackend.draw_text.call_count == 3
+    assert WandBackend.draw_text.call_args == call(
+        ANY, 1, 10, "some\ntext", 2
+    )
+    # the canvas is a copy of the template, not the template itself
+    assert WandBackend.draw_text.call_args[0][0] is not backend.template
+
+    xkcd_renderer.close()
+
+    assert xkcd_renderer._backend is None
+
+
+def test_renderer_frame_key_depends_on_backend():
+    from xkcd_display.renderer import Renderer
+
+    wand_key = Renderer(backend="wand").frame_key("text")
+
+    assert Renderer(backend="pillow").frame_key("text") != wand_key
+
+
+def test_renderer_frame_key_depends_on_font(mocker):
+    from xkcd_display.renderer import Renderer, XKCD_FONT_FILE
+    import xkcd_display
+
+    other_font = str(Path(xkcd_display.__file__).parent / "__init__.py")
+
+    default = Renderer().frame_key("text")
+
+    assert Renderer(font=XKCD_FONT_FILE).frame_key("text") == default
+    assert Renderer(font=other_font).frame_key("text") != default
+
+
+@pytest.mark.parametrize(
+    "text, neighbour, size, expected",
+    [("abcd", "abcd", 40, 40), ("a", "abcd", 40, 80), ("abcd", "a", 40, 20)],
+)
+def test_warm_start_font_size(text, neighbour, size, expected):
+    from xkcd_display.renderer import warm_start_font_size
+
+    assert warm_start_font_size(text, neighbour, size) == expected
+
+
+@pytest.mark.parametrize("search, start", [("bisect", 20), ("linear", None)])
+def test_renderer_fit_warm_start(mocker, mock_text_fit, search, start):
+    from xkcd_display.renderer import Renderer, fit_text
+
+    xkcd_renderer = Renderer(
+        image_properties={"width": 10, "height": 20},
+        render_properties={"search": search},
+        backend="wand",
+    )
+
+    xkcd_renderer.fit("text", start=20)
+
+    assert fit_text.call_args[1]["start"] == start
+
+
+def test_renderer_render_dialog(mocker):
+    from xkcd_display.dialog import SpokenText
+    from xkcd_display.renderer import Renderer, RenderingFit
+
+    fits = {
+        "long text": RenderingFit(["long text"], 20, 0, 0, 20),
+        "text": RenderingFit(["text"], 30, 0, 0, 30),
+    }
+    mocker.patch.object(
+        Renderer,
+        "_render",
+        side_effect=lambda text, export, start, stats: (
+            text.upper(),
+            fits[text],
+        ),
+    )
+    mocker.patch("xkcd_display.backends.create_backend")
+    transcript = [SpokenText("megan", "long text"), "text"]
+
+    result = Renderer().render_dialog(transcript, export="gif")
+
+    assert result == ["LONG TEXT", "TEXT"]
+    assert Renderer._render.call_args_list == [
+        call("long text", ANY, start=None, stats=None),
+        call("text", ANY, start=30, stats=None),
+    ]
+    with pytest.raises(ValueError):
+        Renderer().render_dialog(transcript, export="unknown")
+    with pytest.raises(ValueError):
+        Renderer().render_dialog(transcript, errors="unknown")
+
+
+def test_renderer_render_dialog_skips_errors(mocker):
+    from xkcd_display.renderer import Renderer, RenderingFit
+
+    def render(text, export, start, stats):
+        if text == "too long":
+            raise ValueError("Could not find fitting font size")
+        return text.upper(), RenderingFit([text], 20, 0, 0, 20)
+
+    mocker.patch.object(Renderer, "_render", side_effect=render)
+    mocker.patch("xkcd_display.backends.create_backend")
+    texts = ["text", "too long", "more"]
+
+    result = Renderer().render_dialog(texts, errors="skip")
+
+    assert result == ["TEXT", None, "MORE"]
+    with pytest.raises(ValueError):
+        Renderer().render_dialog(texts)
+
+
+def test_renderer_render_dialog_searches_every_fit_once():
+    pytest.importorskip("PIL")
+    from xkcd_display.renderer import Renderer, FitCache
+
+    fit_cache = FitCache()
+    xkcd_renderer = Renderer(fit_cache=fit_cache, backend="pillow")
+
+    xkcd_renderer.render_dialog(["yeah", "You're flying! How?", "Python!"])
+
+    assert fit_cache.info().hits == 0
+    assert fit_cache.info().misses == 3
+
+
+def test_renderer_render_dialog_in_worker_processes():
+    pytest.importorskip("PIL")
+    from xkcd_display.renderer import Renderer
+
+    texts = ["yeah", "You're flying! How?", "Python!", "sigh", "That's it?"]
+    xkcd_renderer = Renderer(backend="pillow")
+
+    result = xkcd_renderer.render_dialog(texts, workers=2)
+
+    assert result == [xkcd_renderer.render_frame(text) for text in texts]
+
+
+def test_renderer_settings_set_up_an_equal_renderer():
+    from xkcd_display.renderer import Renderer
+
+    xkcd_renderer = Renderer(font="some/font.ttf", backend="pillow")
+    other = Renderer(*xkcd_renderer.settings[:3], backend="pillow")
+
+    assert xkcd_renderer.settings == other.settings
+    assert xkcd_renderer.settings[-1] == "pillow"
+
+
+def test_render_stats_recording_probe():
+    from xkcd_display import FontMetrics
+    from xkcd_display.renderer import Probe, RenderStats
+
+    class MockTable:
+        def measure(self, text, font_size):
+            return FontMetrics(1, 2, font_size)
+
+    stats = RenderStats()
+    probe = stats.recording_probe(lambda text, size: FontMetrics(1, 2, size))
+    estimate = stats.recording_table(MockTable())
+
+    assert probe("some text", 12) == FontMetrics(1, 2, 12)
+    assert probe("some\ntext", 12) == FontMetrics(1, 2, 12)
+    assert estimate.measure("some text", 14) == FontMetrics(1, 2, 14)
+
+    assert stats.metric_calls == 2
+    assert stats.metric_seconds > 0
+    assert stats.probes == [
+        Probe("some text", 12, False),
+        Probe("some\ntext", 12, False),
+        Probe("some text", 14, True),
+    ]
+    assert stats.wraps_probed == 2
+    assert stats.font_sizes_probed == [12, 14]
+
+
+def test_renderer_records_stats():
+    pytest.importorskip("PIL")
+    from xkcd_display.renderer import Renderer, RenderStats
+
+    xkcd_renderer = Renderer(backend="pillow")
+    stats = RenderStats()
+
+    xkcd_renderer.render_frame("You're flying! How?", stats=stats)
+
+    assert stats.text == "You're flying! How?"
+    assert stats.rendering == xkcd_renderer.fit("You're flying! How?")
+    assert not stats.fit_cached
+    assert stats.metric_calls > 0
+    assert 0 < stats.font_size_probes <= stats.metric_calls
+    assert stats.wraps_probed > 0
+    assert stats.draw_seconds > 0
+    assert stats.export_seconds > 0
+    assert "You're flying! How?" in stats.summary()
+
+    cached = RenderStats()
+    xkcd_renderer.render_frame("You're flying! How?", stats=cached)
+
+    assert cached.fit_cached
+    assert cached.metric_calls == 0
+    assert "cached fit" in cached.summary()
+    assert cached.font_size_probes == 0
+
+
+def test_renderer_render_dialog_records_stats_in_workers():
+    pytest.importorskip("PIL")
+    from xkcd_display.renderer import Renderer
+
+    texts = ["yeah", "You're flying! How?", "Python!"]
+    stats = []
+
+    Renderer(backend="pillow").render_dialog(texts, workers=2, stats=stats)
+
+    assert [text_stats.text for text_stats in stats] == texts
+    assert all(text_stats.metric_calls > 0 for text_stats in stats)
+
+
+@pytest.mark.parametrize("start", [20, 49, 50, 51, 80])
+def test_bisect_font_size_without_extrapolation(start):
+    from xkcd_display import FontMetrics, Size
+    from xkcd_display.renderer import bisect_font_size
+
+    def probe(text, font_size):
+        return FontMetrics(font_size * 2, font_size, font_size)
+
+    result = bisect_font_size(
+        probe, Size(100, 90), "text", start, margin=0, extrapolate=False
+    )
+
+    assert result.font_size == 50
+    if start == 50:
+        assert result.probes == 2
+
+
+def test_renderer_learns_font_sizes():
+    pytest.importorskip("PIL")
+    from xkcd_display.font_size_model import FontSizeModel
+    from xkcd_display.renderer import Renderer, RenderStats
+
+    texts = ["yeah", "You're flying! How?", "I learned it last night!"]
+    model = FontSizeModel()
+    first = Renderer(backend="pillow", font_size_model=model)
+    first_stats = [RenderStats() for text in texts]
+    for text, stats in zip(texts, first_stats):
+        first.render_frame(text, stats=stats)
+
+    assert len(model) == 3
+
+    second = Renderer(backend="pillow", font_size_model=model)
+    for text, stats in zip(texts, first_stats):
+        second_stats = RenderStats()
+        assert second.render_frame(text, stats=second_stats) == (
+            Renderer(backend="pillow").render_frame(text)
+        )
+        assert second_stats.metric_calls < stats.metric_calls
+
+
+def composable_probe(calls, leading=2):
+    """ a probe with lines of 10 pixels height and a leading in between """
+    from xkcd_display import FontMetrics
+
+    def probe(text, font_size):
+        calls.append((text, font_size))
+        lines = text.split("\n")
+        return FontMetrics(
+            width=max(len(line) for line in lines) * font_size,
+            height=10 * len(lines) + leading * (len(lines) - 1),
+            character_height=font_size,
+        )
+
+    return probe
+
+
+def test_line_metrics_memo_composes_multiline_texts():
+    from xkcd_display.renderer import LineMetricsMemo
+
+    calls = []
+    probe = composable_probe(calls)
+    memo = LineMetricsMemo()
+    texts = ["a\nbb\nccc", "a bb\nccc", "a\nbb ccc", "a bb ccc"]
+
+    results = [memo.measure(probe, text, 12) for text in texts]
+
+    assert calls == [
+        ("a\nbb\nccc", 12),  # first text, measured as a whole
+        ("a bb\nccc", 12),  # second text, checks the composition
+        ("a bb", 12),
+        ("ccc", 12),
+        ("a", 12),  # third text, composed from its lines
+        ("bb ccc", 12),
+        ("a bb ccc", 12),
+    ]
+    assert results == [probe(text, 12) for text in texts]
+    assert memo.measure(probe, "a\nbb", 12) == probe("a\nbb", 12)
+    assert calls[-2:] == [("bb", 12), ("a\nbb", 12)]
+
+
+def test_line_metrics_memo_falls_back_to_whole_texts():
+    from xkcd_display import FontMetrics
+    from xkcd_display.renderer import LineMetricsMemo
+
+    calls = []
+    composable = composable_probe(calls)
+
+    def probe(text, font_size):
+        # the height of a text does not add up from its lines
+        metrics = composable(text, font_size)
+        return metrics._replace(height=metrics.height + len(text) % 3)
+
+    memo = LineMetricsMemo()
+    texts = ["a\nbb\nccc", "a bb\nccc", "a\nbb ccc", "a\nbb\nccc"]
+
+    results = [memo.measure(probe, text, 12) for text in texts]
+
+    assert results == [probe(text, 12) for text in texts]
+    assert memo.measure(probe, "a", 14) == FontMetrics(14, 11, 14)
+    assert ("a\nbb ccc", 12) in calls
+    assert ("a\nbb\nccc", 12) in calls[-4:]
+
+
+def test_line_metrics_memo_is_bounded():
+    from xkcd_display.renderer import LineMetricsMemo
+
+    calls = []
+    probe = composable_probe(calls)
+    memo = LineMetricsMemo(maxsize=2)
+
+    for text in ["a", "bb", "a", "ccc", "bb", "a"]:
+        memo.measure(probe, text, 12)
+
+    assert calls == [
+        ("a", 12),
+        ("bb", 12),
+        ("ccc", 12),
+        ("bb", 12),  # forgotten by remembering "ccc"
+        ("a", 12),
+    ]
+
+    memo.clear()
+    memo.measure(probe, "a", 12)
+
+    assert calls[-1] == ("a", 12)
@@ -1,5 +1,46 @@
+import os
+import pytest
+import tempfile
+
+from pathlib import Path
+
 from xkcd_display import __version__
 
 
+@pytest.fixture
+def tmp_path():
+    with tempfile.TemporaryDirectory() as tempdir:
+        yield Path(tempdir)
+
+
 def test_version():
     assert __version__ == "0.1.0"
+
+
+def test_atomic_write(tmp_path, mocker):
+    from xkcd_display import atomic_write
+
+    fsync = mocker.spy(os, "fsync")
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"old")
+
+    atomic_write(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert list(tmp_path.iterdir()) == [path]
+    # the file and the directory are synced
+    assert fsync.call_count == 2
+
+
+def test_atomic_write_keeps_old_file_on_error(tmp_path, mocker):
+    from xkcd_display import atomic_write
+
+    mocker.patch("os.replace", side_effect=OSError("disk full"))
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"old")
+
+    with pytest.raises(OSError):
+        atomic_write(path, b"new")
+
+    assert path.read_bytes() == b"old"
+    assert list(tmp_path.iterdir()) == [path]
@@ -3,7 +3,58 @@
 __version__ = "0.1.0"
 
 
+import os
+import tempfile
+
 from collections import namedtuple
+from pathlib import Path
 
 
 Size = namedtuple("Size", ["width", "height"])
+FontMetrics = namedtuple(
+    "FontMetrics", ["width", "height", "character_height"]
+)
+
+# directory for persistent caches, like measured font metrics
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "xkcd_display"
+)
+
+
+def atomic_write(path, data):
+    """ writes data to a file, a reader will never see a partial file
+
+    The data is written to a temporary file in the same directory, synced to
+    disk and moved to the destination afterwards. A power loss will not
+    leave a partial file either.
+
+    :param pathlib.Path path: where to write the data
+    :param bytes data: the content of the file
+    """
+    path = Path(path)
+    handle, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as file_handle:
+            file_handle.write(data)
+            file_handle.flush()
+            os.fsync(file_handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    _sync_directory(path.parent)
+
+
+def _sync_directory(directory):
+    """ makes the renaming of a file in a directory durable """
+    try:
+        dir_handle = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_handle)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_handle)
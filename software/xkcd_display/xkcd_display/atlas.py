@@ -0,0 +1,407 @@
+""" composes frames from pre-rasterized glyphs of a font
+
+All panels are rendered in one font, black on white, without antialiasing
+and exported with one bit per pixel. The glyphs of a font are therefore
+rasterized only once per font size and stored as a bitmap atlas in the cache
+directory. Drawing a text copies the glyph bitmaps into the rows of a canvas,
+no rasterizer is needed on the hot path.
+
+The glyphs are rasterized with the FreeType engine of pillow, pillow is only
+needed for building an atlas.
+"""
+
+import itertools
+import json
+import threading
+import zlib
+
+from collections import namedtuple
+from pathlib import Path
+
+from . import CACHE_DIR, FontMetrics, atomic_write
+from .font_table import CHARACTERS, font_file_hash
+
+# must be increased if the file format or the rasterization changes
+ATLAS_VERSION = 1
+ATLAS_SUFFIX = ".atlas"
+
+# a glyph bitmap is stored as a list of rows, every row is an integer with
+# the leftmost pixel in the most significant bit and black pixels as set bits
+Glyph = namedtuple("Glyph", ["advance", "left", "top", "width", "rows"])
+
+# loaded atlases, to read or build them only once per process
+_loaded_atlases = {}
+_lock = threading.Lock()
+
+# pixel intensities of the bits of a byte, used for exporting pixels
+_BYTE_PIXELS = [
+    tuple(float(byte >> (7 - bit) & 1) for bit in range(8))
+    for byte in range(256)
+]
+
+
+class GlyphAtlas:
+    """ the rasterized glyphs of a font at one font size """
+
+    def __init__(
+        self, font_hash, font_size, ascent, descent, glyphs, font_file=None
+    ):
+        """ initialize the atlas
+
+        :param str font_hash: hash of the font file the glyphs are from
+        :param int font_size: font size of the glyphs
+        :param int ascent: ascent of the font in pixels
+        :param int descent: descent of the font in pixels
+        :param dict glyphs: the rasterized glyphs by character
+        :param str font_file: path to the font, used for rasterizing
+            characters not in the atlas
+        """
+        self.font_hash = font_hash
+        self.font_size = font_size
+        self.ascent = ascent
+        self.descent = descent
+        self.line_height = ascent + descent
+        self.glyphs = glyphs
+        self.font_file = font_file
+
+    def glyph(self, character):
+        """ returns the glyph of a character
+
+        Characters that are not in the atlas are rasterized on first use.
+
+        :param str character: the character
+        :returns Glyph: the rasterized glyph
+        """
+        try:
+            return self.glyphs[character]
+        except KeyError:
+            font = _truetype(self.font_file, self.font_size)
+            glyph = rasterize_glyph(font, character)
+            self.glyphs[character] = glyph
+            return glyph
+
+    def line_width(self, line):
+        """ width of a single line of text in pixels
+
+        :param str line: a line of text
+        :returns int: width of the line
+        """
+        return int(sum(self.glyph(character).advance for character in line))
+
+    def measure(self, text):
+        """ measures a (multiline) text
+
+        The height of a line is the sum of ascent and descent of the font and
+        the character height equals the font size, as imagemagick does it.
+
+        :param str text: the text to measure
+        :returns FontMetrics: metrics of the text
+        """
+        lines = text.split("\n")
+        return FontMetrics(
+            width=max(self.line_width(line) for line in lines),
+            height=len(lines) * self.line_height,
+            character_height=self.font_size,
+        )
+
+    def draw(self, canvas, x, y, text):
+        """ draws a (multiline) text on a canvas
+
+        :param BitCanvas canvas: the canvas to draw on
+        :param int x: left position of the text
+        :param int y: baseline of the first line of text
+        :param str text: the text to draw
+        """
+        for line_number, line in enumerate(text.split("\n")):
+            baseline = y + line_number * self.line_height
+            pen = x
+            for character in line:
+                glyph = self.glyph(character)
+                left = int(pen) + glyph.left
+                canvas.blit(glyph, left, baseline + glyph.top)
+                pen += glyph.advance
+
+    def to_bytes(self):
+        """ serializes the atlas
+
+        The glyph bitmaps are placed side by side in one bitmap strip. The
+        file starts with a json header line with the metrics of the glyphs
+        and their positions in the strip, followed by the compressed packed
+        rows of the strip.
+
+        :returns bytes: the serialized atlas
+        """
+        index = {}
+        strip_width = 0
+        strip_height = 0
+        for character, glyph in self.glyphs.items():
+            index[character] = [
+                glyph.advance,
+                glyph.left,
+                glyph.top,
+                glyph.width,
+                len(glyph.rows),
+                strip_width,
+            ]
+            strip_width += glyph.width
+            strip_height = max(strip_height, len(glyph.rows))
+        strip = [0] * strip_height
+        for character, glyph in self.glyphs.items():
+            shift = strip_width - index[character][-1] - glyph.width
+            for row_number, row in enumerate(glyph.rows):
+                strip[row_number] |= row << shift
+        header = {
+            "version": ATLAS_VERSION,
+            "font_hash": self.font_hash,
+            "font_size": self.font_size,
+            "ascent": self.ascent,
+            "descent": self.descent,
+            "strip_width": strip_width,
+            "strip_height": strip_height,
+            "glyphs": index,
+        }
+        header_data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        rows = zlib.compress(_pack_rows(strip, strip_width))
+        return header_data + b"\n" + rows
+
+    @classmethod
+    def from_bytes(cls, data, font_file=None):
+        """ deserializes an atlas
+
+        :param bytes data: a serialized atlas
+        :param str font_file: path to the font, used for rasterizing
+            characters not in the atlas
+        :returns GlyphAtlas: the atlas
+        :raises ValueError: if the data is not a valid atlas
+        """
+        header_data, _, rows = data.partition(b"\n")
+        header = json.loads(header_data.decode("utf-8"))
+        if header.get("version") != ATLAS_VERSION:
+            raise ValueError("Unsupported glyph atlas version")
+        strip_width = header["strip_width"]
+        try:
+            strip = _unpack_rows(zlib.decompress(rows), strip_width)
+        except zlib.error:
+            raise ValueError("Corrupt glyph atlas")
+        if len(strip) != header["strip_height"]:
+            raise ValueError("Truncated glyph atlas")
+        glyphs = {}
+        for character, values in header["glyphs"].items():
+            advance, left, top, width, height, position = values
+            shift = strip_width - position - width
+            mask = (1 << width) - 1
+            glyphs[character] = Glyph(
+                advance=advance,
+                left=left,
+                top=top,
+                width=width,
+                rows=[(row >> shift) & mask for row in strip[:height]],
+            )
+        return cls(
+            header["font_hash"],
+            header["font_size"],
+            header["ascent"],
+            header["descent"],
+            glyphs,
+            font_file=font_file,
+        )
+
+    def save(self, path):
+        """ saves the atlas to a file
+
+        The file is written with atomic_write(), a reader will never see a
+        partial file.
+
+        :param pathlib.Path path: where to save the atlas
+        """
+        atomic_write(path, self.to_bytes())
+
+    @classmethod
+    def load(cls, path, font_file=None):
+        """ loads an atlas from a file
+
+        :param pathlib.Path path: path of the atlas file
+        :param str font_file: path to the font, used for rasterizing
+            characters not in the atlas
+        :returns GlyphAtlas: the atlas
+        """
+        return cls.from_bytes(Path(path).read_bytes(), font_file=font_file)
+
+
+class BitCanvas:
+    """ a one bit canvas to draw glyphs on
+
+    Every row of the canvas is an integer with the leftmost pixel in the
+    most significant bit and black pixels as set bits. A glyph row is drawn
+    with one shift and one bitwise or.
+    """
+
+    def __init__(self, width, height):
+        """ initialize a blank canvas
+
+        :param int width: width of the canvas in pixels
+        :param int height: height of the canvas in pixels
+        """
+        self.width = width
+        self.height = height
+        self.rows = [0] * height
+        self._row_mask = (1 << width) - 1
+
+    def blit(self, glyph, x, y):
+        """ draws a glyph bitmap, parts outside of the canvas are clipped
+
+        :param Glyph glyph: the glyph to draw
+        :param int x: left position of the glyph bitmap
+        :param int y: top position of the glyph bitmap
+        """
+        shift = self.width - x - glyph.width
+        rows = self.rows
+        for row_number, row in enumerate(glyph.rows, start=y):
+            if 0 <= row_number < self.height:
+                if shift >= 0:
+                    rows[row_number] |= (row << shift) & self._row_mask
+                else:
+                    rows[row_number] |= row >> -shift
+
+    def packed_rows(self):
+        """ the rows of the canvas packed with one bit per pixel
+
+        :returns iterator: the packed rows, the first pixel in the most
+            significant bit and white pixels as set bits
+        """
+        stride = (self.width + 7) // 8
+        padding = stride * 8 - self.width
+        white = (1 << (stride * 8)) - 1
+        for row in self.rows:
+            yield (white ^ (row << padding)).to_bytes(stride, "big")
+
+    def to_frame(self):
+        """ exports the canvas as packed frame for the display
+
+        :returns bytes: the packed rows of the canvas
+        """
+        return b"".join(self.packed_rows())
+
+    def to_pixels(self):
+        """ exports the canvas as pixel intensities
+
+        :returns iterator: pixel intensities, 0.0 for black, 1.0 for white
+        """
+        for packed_row in self.packed_rows():
+            pixels = (
+                pixel for byte in packed_row for pixel in _BYTE_PIXELS[byte]
+            )
+            yield from itertools.islice(pixels, self.width)
+
+
+def _pack_rows(rows, width):
+    """ packs bitmap rows with one bit per pixel, rows are padded to bytes """
+    stride = (width + 7) // 8
+    padding = stride * 8 - width
+    return b"".join((row << padding).to_bytes(stride, "big") for row in rows)
+
+
+def _unpack_rows(data, width):
+    """ splits packed bitmap rows into integers, one per row """
+    stride = (width + 7) // 8
+    padding = stride * 8 - width
+    if stride == 0:
+        return []
+    rows = zip(*[iter(data)] * stride)
+    return [int.from_bytes(bytes(row), "big") >> padding for row in rows]
+
+
+def _truetype(font_file, font_size):
+    """ loads a font with pillow """
+    from PIL import ImageFont
+
+    return ImageFont.truetype(str(font_file), font_size)
+
+
+def rasterize_glyph(font, character):
+    """ rasterizes a glyph without antialiasing
+
+    :param PIL.ImageFont.FreeTypeFont font: the font at the right size
+    :param str character: the character to rasterize
+    :returns Glyph: the rasterized glyph
+    """
+    from PIL import Image
+
+    mask, (left, top) = font.getmask2(character, mode="1", anchor="ls")
+    width, height = mask.size
+    advance = font.getlength(character, mode="1")
+    if width <= 0 or height <= 0:
+        return Glyph(advance=advance, left=left, top=top, width=0, rows=[])
+    bitmap = Image.frombytes("L", mask.size, bytes(mask))
+    data = bitmap.convert("1", dither=Image.NONE).tobytes()
+    rows = _unpack_rows(data, width)
+    return Glyph(advance=advance, left=left, top=top, width=width, rows=rows)
+
+
+def build_glyph_atlas(font_file, font_size, characters=CHARACTERS):
+    """ rasterizes the glyphs of a font at a font size
+
+    :param str font_file: path to the font file
+    :param int font_size: font size of the glyphs
+    :param str characters: the characters to rasterize
+    :returns GlyphAtlas: the rasterized glyphs
+    """
+    font = _truetype(font_file, font_size)
+    ascent, descent = font.getmetrics()
+    glyphs = {
+        character: rasterize_glyph(font, character)
+        for character in characters
+    }
+    return GlyphAtlas(
+        font_file_hash(font_file),
+        font_size,
+        ascent,
+        descent,
+        glyphs,
+        font_file=font_file,
+    )
+
+
+def atlas_path(font_file, font_size):
+    """ location of a persisted atlas for a font and font size
+
+    :param str font_file: path to the font file
+    :param int font_size: font size of the glyphs
+    :returns pathlib.Path: path of the atlas file
+    """
+    name = f"{Path(font_file).stem}-{font_size}{ATLAS_SUFFIX}"
+    return CACHE_DIR / "atlas" / name
+
+
+def load_glyph_atlas(font_file, font_size, font_hash=None):
+    """ loads the atlas of a font at a font size, builds it if necessary
+
+    Atlases that were rasterized from a different version of the font file
+    are rebuilt. A newly built atlas is persisted for later use.
+
+    :param str font_file: path to the font file
+    :param int font_size: font size of the glyphs
+    :param str font_hash: hash of the font file, if already known
+    :returns GlyphAtlas: the rasterized glyphs
+    """
+    font_file = str(font_file)
+    font_size = int(font_size)
+    key = (font_file, font_size)
+    with _lock:
+        if key in _loaded_atlases:
+            return _loaded_atlases[key]
+        font_hash = font_hash or font_file_hash(font_file)
+        path = atlas_path(font_file, font_size)
+        try:
+            atlas = GlyphAtlas.load(path, font_file=font_file)
+        except (OSError, ValueError, TypeError, KeyError):
+            atlas = None
+        if atlas is None or atlas.font_hash != font_hash:
+            atlas = build_glyph_atlas(font_file, font_size)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                atlas.save(path)
+            except OSError:
+                pass
+        _loaded_atlases[key] = atlas
+        return atlas
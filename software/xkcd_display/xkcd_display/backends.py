@@ -0,0 +1,337 @@
+""" rasterization backends for rendering texts on images
+
+A backend measures texts, draws them on a canvas and exports the canvas. The
+imagemagick backend produces nicer results, the pillow backend is faster and
+needs less memory. Both need to be installed separately. The atlas backend
+composes frames from glyphs rasterized once with pillow.
+"""
+
+import contextlib
+import io
+import os
+
+from . import FontMetrics
+from .atlas import BitCanvas, load_glyph_atlas
+from .font_table import font_file_hash, load_font_metrics_table
+
+# backend used if none is selected, can be set with an environment variable
+DEFAULT_BACKEND = os.environ.get("XKCD_DISPLAY_BACKEND", "wand")
+
+
+class Backend:
+    """ interface of a rasterization backend """
+
+    name = None
+
+    def __init__(self, font, image_properties, render_properties):
+        """ initialize the backend
+
+        :param str font: path to a font file to use
+        :param dict image_properties: width, height and background color of
+            the canvas
+        :param dict render_properties: keyword arguments of render_text(),
+            only "color" and "antialias" are used by a backend
+        """
+        self.font = font
+        self.width = image_properties["width"]
+        self.height = image_properties["height"]
+        self.background = str(image_properties.get("background", "white"))
+        self.color = render_properties.get("color", "black")
+        self.antialias = render_properties.get("antialias", True)
+
+    def measure(self, text, font_size):
+        """ measures a (multiline) text at a font size
+
+        :param str text: the text to measure
+        :param int font_size: font size of the text
+        :returns FontMetrics: metrics for the text
+        """
+        raise NotImplementedError
+
+    def canvas(self):
+        """ returns a context manager providing a blank canvas """
+        raise NotImplementedError
+
+    def draw_text(self, canvas, x, y, text, font_size):
+        """ draws a (multiline) text on a canvas
+
+        :param canvas: a canvas provided by canvas()
+        :param int x: left position of the text
+        :param int y: baseline of the first line of text
+        :param str text: the text to draw
+        :param int font_size: font size of the text
+        """
+        raise NotImplementedError
+
+    def export_frame(self, canvas):
+        """ exports a canvas as packed frame for the display
+
+        :returns bytes: one bit per pixel, the first pixel in the most
+            significant bit and white pixels as set bits
+        """
+        raise NotImplementedError
+
+    def export_gif(self, canvas):
+        """ exports a canvas as gif blob
+
+        :returns bytes: binary encoded image
+        """
+        raise NotImplementedError
+
+    def export_pixels(self, canvas):
+        """ exports a canvas as pixel intensities
+
+        :returns iterator: pixel intensities between 0.0 and 1.0
+        """
+        raise NotImplementedError
+
+    def font_metrics_table(self):
+        """ table for estimating text metrics, or None if measuring is cheap
+        """
+        return None
+
+    def close(self):
+        """ releases resources held by the backend """
+
+
+class WandBackend(Backend):
+    """ renders with imagemagick using the wand bindings
+
+    A blank template canvas and a drawing with the font style set are
+    created once and cloned for every text.
+    """
+
+    name = "wand"
+
+    def __init__(self, font, image_properties, render_properties):
+        """ initialize the backend, see Backend.__init__ """
+        super().__init__(font, image_properties, render_properties)
+        from wand.color import Color
+        from wand.drawing import Drawing
+        from wand.image import Image
+
+        self._template = Image(
+            width=self.width,
+            height=self.height,
+            background=Color(self.background),
+        )
+        self.sketch = Drawing()
+        self.sketch.fill_color = Color(self.color)
+        self.sketch.font = font
+        self.sketch.text_antialias = self.antialias
+
+    @property
+    def template(self):
+        """ a blank canvas, that is cloned for every rendered text """
+        return self._template
+
+    def measure(self, text, font_size):
+        """ measures a (multiline) text at a font size """
+        from .renderer import eval_text_metrics
+
+        self.sketch.font_size = font_size
+        return eval_text_metrics(self.sketch, self._template, text)
+
+    def canvas(self):
+        """ returns a context manager providing a blank canvas """
+        return self._template.clone()
+
+    def draw_text(self, canvas, x, y, text, font_size):
+        """ draws a (multiline) text on a canvas """
+        with self.sketch.clone() as sketch:
+            sketch.font_size = font_size
+            sketch.text(x, y, text)
+            sketch.draw(canvas)
+
+    def export_frame(self, canvas):
+        """ exports a canvas as packed frame for the display
+
+        Imagemagick exports the image with one bit per pixel as raw gray,
+        which is the buffer format the display expects.
+        """
+        from .frames import FRAME_SIZE, pack_pixels
+
+        canvas.type = "bilevel"
+        canvas.depth = 1
+        frame = canvas.make_blob("gray")
+        if len(frame) != FRAME_SIZE:
+            # unexpected export format, pack the pixels in python instead
+            frame = pack_pixels(canvas.export_pixels(channel_map="I"))
+        return frame
+
+    def export_gif(self, canvas):
+        """ exports a canvas as gif blob """
+        canvas.type = "bilevel"
+        return canvas.make_blob("gif")
+
+    def export_pixels(self, canvas):
+        """ exports a canvas as pixel intensities """
+        return iter(canvas.export_pixels(channel_map="I"))
+
+    def font_metrics_table(self):
+        """ measuring with imagemagick is slow, metrics are estimated """
+        return load_font_metrics_table(self.font)
+
+    def close(self):
+        """ releases the canvas and drawing """
+        self._template.close()
+        self.sketch.destroy()
+
+
+class PillowBackend(Backend):
+    """ renders with the freetype engine of pillow
+
+    Texts are measured and drawn like imagemagick does it: the height of a
+    line is the sum of ascent and descent of the font and the character
+    height equals the font size.
+    """
+
+    name = "pillow"
+
+    def __init__(self, font, image_properties, render_properties):
+        """ initialize the backend, see Backend.__init__ """
+        super().__init__(font, image_properties, render_properties)
+        from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+        self._image_module = Image
+        self._draw_module = ImageDraw
+        self._font_module = ImageFont
+        self._mode = "L" if self.antialias else "1"
+        self._background = ImageColor.getcolor(self.background, self._mode)
+        self._color = ImageColor.getcolor(self.color, self._mode)
+        self._fonts = {}
+
+    def _font(self, font_size):
+        """ loads the font at a size, once per size """
+        font_size = int(font_size)
+        if font_size not in self._fonts:
+            self._fonts[font_size] = self._font_module.truetype(
+                self.font, font_size
+            )
+        return self._fonts[font_size]
+
+    def measure(self, text, font_size):
+        """ measures a (multiline) text at a font size """
+        font = self._font(font_size)
+        ascent, descent = font.getmetrics()
+        lines = text.split("\n")
+        return FontMetrics(
+            width=int(max(font.getlength(line) for line in lines)),
+            height=int(len(lines) * (ascent + descent)),
+            character_height=int(font_size),
+        )
+
+    @contextlib.contextmanager
+    def canvas(self):
+        """ returns a context manager providing a blank canvas """
+        image = self._image_module.new(
+            self._mode, (self.width, self.height), self._background
+        )
+        try:
+            yield image
+        finally:
+            image.close()
+
+    def draw_text(self, canvas, x, y, text, font_size):
+        """ draws a (multiline) text on a canvas """
+        font = self._font(font_size)
+        ascent, descent = font.getmetrics()
+        draw = self._draw_module.Draw(canvas)
+        draw.fontmode = "L" if self.antialias else "1"
+        for line_number, line in enumerate(text.split("\n")):
+            baseline = y + line_number * (ascent + descent)
+            draw.text(
+                (x, baseline), line, font=font, fill=self._color, anchor="ls"
+            )
+
+    def export_frame(self, canvas):
+        """ exports a canvas as packed frame for the display
+
+        Pillow packs bilevel images with one bit per pixel, the first pixel
+        in the most significant bit, which is the format of the display.
+        """
+        return canvas.convert("1", dither=self._image_module.NONE).tobytes()
+
+    def export_gif(self, canvas):
+        """ exports a canvas as gif blob """
+        blob = io.BytesIO()
+        canvas.convert("1", dither=self._image_module.NONE).save(blob, "GIF")
+        return blob.getvalue()
+
+    def export_pixels(self, canvas):
+        """ exports a canvas as pixel intensities """
+        return (value / 255 for value in canvas.convert("L").tobytes())
+
+
+class AtlasBackend(Backend):
+    """ composes frames from pre-rasterized glyphs
+
+    The glyphs are rasterized once per font size and stored in the cache
+    directory, see the atlas module. The text is always drawn in black
+    without antialiasing on a white one bit canvas, color and antialias
+    are ignored.
+    """
+
+    name = "atlas"
+
+    def __init__(self, font, image_properties, render_properties):
+        """ initialize the backend, see Backend.__init__ """
+        super().__init__(font, image_properties, render_properties)
+        self._font_hash = font_file_hash(font)
+
+    def _atlas(self, font_size):
+        """ the glyph atlas for a font size """
+        return load_glyph_atlas(self.font, font_size, self._font_hash)
+
+    def measure(self, text, font_size):
+        """ measures a (multiline) text at a font size """
+        return self._atlas(font_size).measure(text)
+
+    def canvas(self):
+        """ returns a context manager providing a blank canvas """
+        return contextlib.nullcontext(BitCanvas(self.width, self.height))
+
+    def draw_text(self, canvas, x, y, text, font_size):
+        """ draws a (multiline) text on a canvas """
+        self._atlas(font_size).draw(canvas, x, y, text)
+
+    def export_frame(self, canvas):
+        """ exports a canvas as packed frame for the display """
+        return canvas.to_frame()
+
+    def export_gif(self, canvas):
+        """ exports a canvas as gif blob, needs pillow """
+        from PIL import Image
+
+        size = (canvas.width, canvas.height)
+        image = Image.frombytes("1", size, canvas.to_frame())
+        blob = io.BytesIO()
+        image.save(blob, "GIF")
+        return blob.getvalue()
+
+    def export_pixels(self, canvas):
+        """ exports a canvas as pixel intensities """
+        return canvas.to_pixels()
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WandBackend, PillowBackend, AtlasBackend)
+}
+
+
+def create_backend(name, font, image_properties, render_properties):
+    """ creates a backend by its name
+
+    :param str name: name of the backend, None for the default backend
+    :param str font: path to a font file to use
+    :param dict image_properties: width, height and background of the canvas
+    :param dict render_properties: properties for rendering
+    :returns Backend: the backend
+    """
+    name = name or DEFAULT_BACKEND
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend: {name}")
+    return backend_class(font, image_properties, render_properties)
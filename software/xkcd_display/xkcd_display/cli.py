@@ -1,15 +1,21 @@
-""" Command line interface for the xkcd display service """
+""" Command line interface for the xkcd display service
+
+The commands controlling the service only send a signal. Rendering
+dependencies like wand or the epaper driver are imported by the commands
+that need them, importing imagemagick takes seconds on a Raspberry Pi.
+"""
 
 import click
 import contextlib
+import logging
 import signal
 import tempfile
 import time
 
 from pathlib import Path
 
+from . import backends
 from . import dialog
-from . import renderer
 from . import display
 
 
@@ -25,13 +31,28 @@ def xkcd():
         exists=True, file_okay=False, dir_okay=True, readable=True
     ),
 )
-def start(dialogs_dir):
+@click.option(
+    "--backend",
+    type=click.Choice(sorted(backends.BACKENDS)),
+    default=backends.DEFAULT_BACKEND,
+    show_default=True,
+    help="rasterization backend for rendering the images",
+)
+@click.option(
+    "--debug",
+    is_flag=True,
+    help="also log the rendering stats of the frames [default: don't]",
+)
+def start(dialogs_dir, backend, debug):
     """ starts the xkcd display service
 
     This will start the daemon only.
     Follow up with `xkcd play` to show the dialogs on the display
     """
-    xd = display.XKCDDisplayService(dialogs_dir)
+    log_level = logging.DEBUG if debug else logging.INFO
+    xd = display.XKCDDisplayService(
+        dialogs_dir, backend=backend, log_level=log_level
+    )
     if xd.is_running():
         click.echo("xkcd service already running")
     else:
@@ -107,6 +128,66 @@ def reload():
         click.echo("xkcd service not running")
 
 
+@xkcd.command(short_help="render all dialogs ahead of time")
+@click.argument(
+    "dialogs_dir",
+    type=click.Path(
+        exists=True, file_okay=False, dir_okay=True, readable=True
+    ),
+)
+@click.option(
+    "--backend",
+    type=click.Choice(sorted(backends.BACKENDS)),
+    default=backends.DEFAULT_BACKEND,
+    show_default=True,
+    help="rasterization backend for rendering the images",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    help="number of worker processes [default: number of processors]",
+)
+@click.option(
+    "--pairwise-breaks",
+    is_flag=True,
+    help="also render the break pictures in between every two dialogs "
+    "[default: don't]",
+)
+def precompile(dialogs_dir, backend, jobs, pairwise_breaks):
+    """ renders the frames of all dialogs ahead of time
+
+    The panels of all dialogs, the break pictures before the first dialog
+    and the goodbye picture are rendered in parallel and stored where the
+    display service finds them. Dialogs that did not change since the last
+    run are skipped.
+
+    The break pictures in between two dialogs are rendered by the display
+    service while a dialog is shown. With --pairwise-breaks they are
+    rendered ahead of time, for every two dialogs.
+
+    Use the same backend for the display service, frames rendered with a
+    different backend are not used.
+    """
+    from .precompile import precompile_dialogs
+
+    result = precompile_dialogs(
+        Path(dialogs_dir),
+        backend=backend,
+        workers=jobs,
+        pairwise_breaks=pairwise_breaks,
+    )
+    rate = result.rendered / result.seconds if result.seconds else 0
+    click.echo(
+        f"rendered {result.rendered} frames in {result.seconds:.1f}s "
+        f"({rate:.1f} frames/s), {result.unchanged} dialogs unchanged"
+    )
+    for text, reason in result.failed:
+        click.echo(click.style(f"{reason}: {text}", fg="red"))
+    if result.failed:
+        raise click.exceptions.Exit(1)
+
+
 @click.command()
 @click.option(
     "--show", is_flag=True, help="open the generated images [default: don't]"
@@ -119,13 +200,20 @@ def reload():
     ),
     help="output directory",
 )
+@click.option(
+    "--backend",
+    type=click.Choice(sorted(backends.BACKENDS)),
+    default=backends.DEFAULT_BACKEND,
+    show_default=True,
+    help="rasterization backend for rendering the images",
+)
 @click.argument(
     "dialogfile",
     type=click.Path(
         exists=True, file_okay=True, dir_okay=False, readable=True
     ),
 )
-def xkcdtest(show, outdir, dialogfile):
+def xkcdtest(show, outdir, backend, dialogfile):
     """ will render one dialog to panel images in a directory
 
     Use this after a new dialog has been added before using the display service
@@ -137,8 +225,10 @@ def xkcdtest(show, outdir, dialogfile):
     :param click.Context context: command line context
     :param bool show: show the image in the default image viewer
     :param str outdir: where to save the images
+    :param str backend: rasterization backend for rendering the images
     :param str diaglogfile: path to the dialog text file
     """
+    from . import renderer
 
     if not outdir:
         show = True
@@ -148,11 +238,13 @@ def xkcdtest(show, outdir, dialogfile):
     transcript = dialog.adjust_narrators(raw_transcript)
 
     context_manager = _get_directory_context_manager(outdir)
+    xkcd_renderer = renderer.Renderer(backend=backend)
+
+    blobs = xkcd_renderer.render_dialog(transcript, export="gif")
 
     with context_manager as output_dir_name:
         output_dir = Path(output_dir_name)
-        for i, spoken_text in enumerate(transcript):
-            blob = renderer.render_xkcd_image_as_gif(spoken_text.text)
+        for i, (spoken_text, blob) in enumerate(zip(transcript, blobs)):
             panel = i + 1
             image_file = (
                 output_dir
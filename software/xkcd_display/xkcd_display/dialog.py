@@ -5,6 +5,9 @@ from collections import namedtuple
 
 SpokenText = namedtuple("SpokenText", ["speaker", "text"])
 
+# text of the picture shown when the display is paused or stopped
+GOODBYE_TEXT = "Be excellent to each other"
+
 
 def parse_dialog(raw_text):
     """ parses a raw dialog text
@@ -55,3 +58,39 @@ def adjust_narrators(transcript):
         for spoken_line in transcript
     ]
     return adjusted_names
+
+
+def read_transcript(dialog_file):
+    """ reads and parses a dialog file
+
+    :param pathlib.Path dialog_file: path of the dialog text file
+    :returns list: list of SpokenText named tuples
+    """
+    raw_transcript = parse_dialog(dialog_file.read_text())
+    return adjust_narrators(raw_transcript)
+
+
+def dialog_files(dialogs_directory):
+    """ gets all available dialog text files
+
+    :param pathlib.Path dialogs_directory:
+        directory that holds the dialog textfiles
+    :returns list: list of dialog text file paths
+    """
+    all = (f for f in dialogs_directory.iterdir() if f.is_file())
+    visible = (f for f in all if not f.stem.startswith("."))
+    texts = (f for f in visible if f.suffix == ".txt")
+    return list(texts)
+
+
+def break_text(old_selected, new_selected):
+    """ the text of the picture shown in between two dialogs
+
+    :param pathlib.Path old_selected: path to the last shown dialog
+    :param pathlib.Path new_selected: path to the upcoming dialog
+    :returns str: text to show
+    """
+    if old_selected:
+        return f"Goodbye {old_selected.stem}, Hello {new_selected.stem}"
+    else:
+        return f"Starting with {new_selected.stem}"
@@ -1,22 +1,42 @@
 """ shows a xkcd panel image on the dedicated display """
+import concurrent.futures
 import logging
 import random
 import signal
+import threading
 import time
 
 from logging.handlers import SysLogHandler
 from pathlib import Path
 
+from . import CACHE_DIR
 from . import dialog
-from . import renderer
+from .font_size_model import FontSizeModel
+from .frames import FrameCache
 from .service import find_syslog, Service
 
 
 class XKCDDisplayService(Service):
     """ background service to drive and controll the xkcd display"""
 
-    def __init__(self, dialogs_directory=None):
-        """ initialize the display """
+    def __init__(
+        self,
+        dialogs_directory=None,
+        cache_directory=None,
+        backend=None,
+        precompiled_directory=None,
+        log_level=logging.INFO,
+    ):
+        """ initialize the display
+
+        :param str dialogs_directory: directory that holds the dialog files
+        :param str cache_directory: directory to cache rendered frames in
+        :param str backend: name of the rasterization backend for rendering
+        :param str precompiled_directory: directory of the frames rendered
+            by "xkcd precompile"
+        :param int log_level: level of the service log messages, the
+            rendering stats are logged on debug level
+        """
         super().__init__(
             name="xkcdd",
             pid_dir="/tmp",
@@ -24,13 +44,22 @@ class XKCDDisplayService(Service):
         )
         self._epd = None  # instance will be set property function method
         self.dialogs_directory = dialogs_directory
-        self._pointer_pos = {"cueball": 5, "megan": 10, "center": 7.5}
+        self.cache_directory = cache_directory or CACHE_DIR / "frames"
+        self.backend = backend
+        self.precompiled_directory = (
+            precompiled_directory or CACHE_DIR / "precompiled"
+        )
+        self._frame_cache = None  # instance will be set by property method
+        self._precompiled_frames = None  # will be set by property method
+        self._renderer = None  # instance will be set by property method
+        self._prefetch_executor = None  # created on first prefetch
+        self._prefetch = None  # future and cancel event of a running prefetch
         self.logger.addHandler(
             SysLogHandler(
                 address=find_syslog(), facility=SysLogHandler.LOG_DAEMON
             )
         )
-        self.logger.setLevel(logging.INFO)
+        self.logger.setLevel(log_level)
 
     @property
     def epd(self):
@@ -51,6 +80,136 @@ class XKCDDisplayService(Service):
             self._epd = EPD()
         return self._epd
 
+    @property
+    def frame_cache(self):
+        """ the cache for rendered frames, created on first use """
+        if self._frame_cache is None:
+            self._frame_cache = FrameCache(self.cache_directory)
+        return self._frame_cache
+
+    @property
+    def precompiled_frames(self):
+        """ the frames rendered ahead of time, opened on first use
+
+        These frames are never evicted, they are managed by the
+        "xkcd precompile" command.
+        """
+        if self._precompiled_frames is None:
+            self._precompiled_frames = FrameCache(
+                self.precompiled_directory, max_bytes=None
+            )
+        return self._precompiled_frames
+
+    @property
+    def renderer(self):
+        """ the renderer for the frames, created on first use
+
+        The renderer is kept for the lifetime of the service, setting up the
+        canvas and font is done only once. The font size model of the last
+        run is loaded.
+        """
+        if self._renderer is None:
+            from .renderer import Renderer
+
+            xkcd_renderer = Renderer(backend=self.backend)
+            xkcd_renderer.font_size_model = FontSizeModel.load(
+                self._font_size_model_path(xkcd_renderer)
+            )
+            self._renderer = xkcd_renderer
+        return self._renderer
+
+    def _font_size_model_path(self, xkcd_renderer):
+        """ where the font size model of a renderer is stored
+
+        :param renderer.Renderer xkcd_renderer: renderer using the model
+        :returns pathlib.Path: path of the model file
+        """
+        key = xkcd_renderer.frame_key("")
+        return CACHE_DIR / "font_sizes" / f"{key[:16]}.json"
+
+    def _save_font_size_model(self):
+        """ persists what the font size model learned since the last save """
+        if self._renderer is None:
+            return
+        model = self._renderer.font_size_model
+        try:
+            model.save(self._font_size_model_path(self._renderer))
+        except OSError as exception:
+            self.logger.warning(f"could not save font sizes: {exception}")
+
+    def render_frame(self, text):
+        """ renders a text to a packed frame, using the frame cache
+
+        A precompiled or cached frame is used if available, no rendering is
+        necessary then. With debug logging, the rendering stats are logged.
+
+        :param str text: text to render
+        :returns bytes: packed frame for the display
+        """
+        key = self.renderer.frame_key(text)
+        frame = self._cached_frame(key)
+        if frame is None:
+            stats = None
+            if self.logger.isEnabledFor(logging.DEBUG):
+                from .renderer import RenderStats
+
+                stats = RenderStats()
+            frame = self.renderer.render_frame(text, stats=stats)
+            if stats is not None:
+                self.logger.debug(stats.summary())
+            self._cache_frame(key, frame)
+        return frame
+
+    def render_frames(self, texts, cancelled=None):
+        """ renders texts to packed frames in one pass, using the frame cache
+
+        Texts without a precompiled or cached frame are rendered together as
+        a dialog. With debug logging, the rendering stats are logged.
+
+        :param list texts: texts to render
+        :param threading.Event cancelled: if set, the remaining texts are
+            skipped and None is returned for their frames
+        :returns list: packed frames for the display, in the order of texts
+        """
+        keys = [self.renderer.frame_key(text) for text in texts]
+        frames = [self._cached_frame(key) for key in keys]
+        missing = [i for i, frame in enumerate(frames) if frame is None]
+        if missing:
+            stats = [] if self.logger.isEnabledFor(logging.DEBUG) else None
+            rendered = self.renderer.render_dialog(
+                [texts[i] for i in missing], stats=stats, cancelled=cancelled
+            )
+            for text_stats in stats or []:
+                self.logger.debug(text_stats.summary())
+            for i, frame in zip(missing, rendered):
+                if frame is None:
+                    continue  # skipped after a cancellation
+                frames[i] = frame
+                self._cache_frame(keys[i], frame)
+        return frames
+
+    def _cached_frame(self, key):
+        """ looks up a frame in the precompiled frames and the frame cache
+
+        :param str key: key of the frame
+        :returns bytes: packed frame for the display or None if not found
+        """
+        frame = self.precompiled_frames.get(key)
+        if frame is None:
+            frame = self.frame_cache.get(key)
+        return frame
+
+    def _cache_frame(self, key, frame):
+        """ stores a rendered frame in the frame cache
+
+        :param str key: key of the frame
+        :param bytes frame: packed frame for the display
+        """
+        try:
+            self.frame_cache.put(key, frame)
+        except (OSError, ValueError) as exception:
+            self.logger.warning(f"could not cache frame: {exception}")
+
     def run(self):
         """ main (background) function to run the display service
 
@@ -65,14 +224,20 @@ class XKCDDisplayService(Service):
         dialogs_path = Path(self.dialogs_directory)
         dialog_files = self._get_dialog_files(dialogs_path)
         old_selected = None
+        next_selected = None
         is_paused = True
         # main loop
         while not self.got_sigterm():
             # reload dialog files
             if self.got_signal(signal.SIGHUP, clear=True):
+                self._cancel_prefetch()
+                next_selected = None
                 dialog_files = self._get_dialog_files(dialogs_path)
+                self.renderer.fit_cache.clear()
             # getting the "Pause Signal", show goodbye picture if running
             if self.got_signal(signal.SIGUSR2, clear=True):
+                self._cancel_prefetch()
+                next_selected = None
                 if not is_paused:
                     self._show_goodbye_picture()
                 is_paused = True
@@ -82,11 +247,22 @@ class XKCDDisplayService(Service):
             if is_paused:
                 time.sleep(1)
             else:
-                new_selected = random.choice(dialog_files)
+                new_selected = next_selected or random.choice(dialog_files)
+                self._wait_for_prefetch()
+                if self.got_sigterm():
+                    break  # stopped while waiting for the prefetch
+                # the next dialog is rendered while this one is displayed
+                next_selected = random.choice(dialog_files)
                 self._show_break_picture(old_selected, new_selected)
+                self._start_prefetch(new_selected, next_selected)
                 self._display_dialog(new_selected)
+                self._save_font_size_model()
                 old_selected = new_selected
         # main loop exited
+        self._cancel_prefetch()
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=True)
+        self._save_font_size_model()
         if not is_paused:
             self._show_goodbye_picture()
         self.epd.sleep()
@@ -99,10 +275,92 @@ class XKCDDisplayService(Service):
         :returns list: list of dialog text file paths
         """
         self.logger.info("reading dialog files")
-        all = (f for f in dialogs_directory.iterdir() if f.is_file())
-        visible = (f for f in all if not f.stem.startswith("."))
-        texts = (f for f in visible if f.suffix == ".txt")
-        return list(texts)
+        return dialog.dialog_files(dialogs_directory)
+
+    def _read_transcript(self, dialog_file):
+        """ reads and parses a dialog file
+
+        :param pathlib.Path dialog_file: path of the dialog text file
+        :returns list: list of SpokenText named tuples
+        """
+        return dialog.read_transcript(dialog_file)
+
+    def _start_prefetch(self, old_selected, new_selected):
+        """ renders the frames for an upcoming dialog in the background
+
+        The break picture and all panels of the upcoming dialog are rendered
+        into the frame cache on a worker thread, while the current dialog is
+        displayed.
+
+        :param pathlib.Path old_selected: path to the current dialog
+        :param pathlib.Path new_selected: path to the upcoming dialog
+        """
+        self._cancel_prefetch()
+        if self._prefetch_executor is None:
+            self._prefetch_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="prefetch"
+            )
+        cancelled = threading.Event()
+        future = self._prefetch_executor.submit(
+            self._prefetch_frames, old_selected, new_selected, cancelled
+        )
+        self._prefetch = (future, cancelled)
+
+    def _prefetch_frames(self, old_selected, new_selected, cancelled):
+        """ renders the frames for an upcoming dialog
+
+        :param pathlib.Path old_selected: path to the current dialog
+        :param pathlib.Path new_selected: path to the upcoming dialog
+        :param threading.Event cancelled: stops rendering if set
+        """
+        try:
+            transcript = self._read_transcript(new_selected)
+        except (OSError, ValueError) as exception:
+            self.logger.warning(f"could not prefetch dialog: {exception}")
+            return
+        texts = [self._break_text(old_selected, new_selected)]
+        texts.extend(spoken_text.text for spoken_text in transcript)
+        try:
+            self.render_frames(texts, cancelled=cancelled)
+            return
+        except ValueError as exception:
+            self.logger.warning(f"could not prefetch dialog: {exception}")
+        # render the frames one by one, to skip only those that don't fit
+        for text in texts:
+            if cancelled.is_set():
+                return
+            try:
+                self.render_frame(text)
+            except ValueError as exception:
+                self.logger.warning(f"could not prefetch frame: {exception}")
+
+    def _wait_for_prefetch(self):
+        """ waits until the frames of the upcoming dialog are rendered
+
+        The frames would otherwise be rendered twice at the same time.
+        """
+        if self._prefetch is None:
+            return
+        future, cancelled = self._prefetch
+        while not future.done():
+            if self.got_sigterm():
+                cancelled.set()
+                break
+            concurrent.futures.wait([future], timeout=1)
+        self._prefetch = None
+
+    def _cancel_prefetch(self):
+        """ cancels rendering the frames of an upcoming dialog
+
+        A frame that is currently rendered is finished, all other frames
+        are skipped.
+        """
+        if self._prefetch is None:
+            return
+        future, cancelled = self._prefetch
+        cancelled.set()
+        future.cancel()
+        self._prefetch = None
 
     def _display_dialog(self, dialog_file):
         """ displays a dialog
@@ -110,35 +368,50 @@ class XKCDDisplayService(Service):
         A dialog consits of multiple lines with a speaker and the related text.
         Each line will be rendered as one image.
 
-        :param pathlib.Path cache_dir: path of the cache directory
+        The first image is shown before the others are rendered, if they
+        were not prefetched they are rendered while the display refreshes.
+
         :param pathlib.Path dialog_file: path of the dialog text file
         """
         xkcd_id = dialog_file.stem
         self.logger.info(f"displaying dialog {xkcd_id}")
-        raw_transcript = dialog.parse_dialog(dialog_file.read_text())
-        transcript = dialog.adjust_narrators(raw_transcript)
-        for i, spoken_text in enumerate(transcript):
-            self._display_image(spoken_text, image_nr=i)
+        transcript = self._read_transcript(dialog_file)
+        if not transcript:
+            return
+        self._display_image(transcript[0], image_nr=0)
+        shown_at = time.monotonic()
+        texts = [spoken_text.text for spoken_text in transcript[1:]]
+        try:
+            frames = [None] + self.render_frames(texts)
+        except ValueError as exception:
+            # the frames are rendered one by one when displayed
+            self.logger.warning(f"could not render dialog: {exception}")
+            frames = [None] * len(transcript)
+        for i, (spoken_text, frame) in enumerate(zip(transcript, frames)):
+            if i:
+                self._display_image(spoken_text, image_nr=i, frame=frame)
+                shown_at = time.monotonic()
             # wait time is guessed for now...
             wait = 5 + spoken_text.text.count(" ") * 0.5
-            time.sleep(wait)
+            time.sleep(max(0, shown_at + wait - time.monotonic()))
             if self.got_sigterm():
                 break
 
-    def _display_image(self, spoken_text, image_nr):
+    def _display_image(self, spoken_text, image_nr, frame=None):
         """ displays an image on the xkcd display
 
         :param pathlib.Path cache_dir: path of the cache directory
         :param str xkcd_id: unique identifier of the dialog
         :param int img_nr: image number
         :param str spoken_text: text to display
+        :param bytes frame: the rendered frame, rendered if not provided
         """
         self.logger.info("displaying image")
-        pixel_iterator = renderer.render_xkcd_image_as_pixels(spoken_text.text)
-        pos = self._pointer_pos[spoken_text.speaker.lower()]
-        self.epd.show_and_move(
-            pixel_iterator, quick_refresh=bool(image_nr), move_to=pos
-        )
+        if frame is None:
+            frame = self.render_frame(spoken_text.text)
+        # the speakers are named like the positions of the pointer
+        pos = spoken_text.speaker.lower()
+        self._show_frame(frame, quick_refresh=bool(image_nr), move_to=pos)
 
     def _show_break_picture(self, old_selected, new_selected):
         """ displays a picture in between two dialogs
@@ -147,18 +420,20 @@ class XKCDDisplayService(Service):
         :param pathlib.Path new_selected: path to the upcoming dialog
         """
         self.logger.info("rendering break picture")
-        if old_selected:
-            text = f"Goodbye {old_selected.stem}, Hello {new_selected.stem}"
-        else:
-            text = f"Starting with {new_selected.stem}"
-        pixel_iterator = renderer.render_xkcd_image_as_pixels(text)
-        self.epd.show_and_move(
-            pixel_iterator,
-            quick_refresh=False,
-            move_to=self._pointer_pos["center"],
-        )
+        text = self._break_text(old_selected, new_selected)
+        frame = self.render_frame(text)
+        self._show_frame(frame, quick_refresh=False, move_to="center")
         time.sleep(5)  # a random guess
 
+    def _break_text(self, old_selected, new_selected):
+        """ the text of the picture shown in between two dialogs
+
+        :param pathlib.Path old_selected: path to the last shown dialog
+        :param pathlib.Path new_selected: path to the upcoming dialog
+        :returns str: text to show
+        """
+        return dialog.break_text(old_selected, new_selected)
+
     def _show_goodbye_picture(self):
         """ displays a goodbye message
 
@@ -166,10 +441,34 @@ class XKCDDisplayService(Service):
         nice goodbye message or just cleans the screen
         """
         self.logger.info("rendering goodbye picture")
-        text = "Be excellent to each other"
-        pixel_iterator = renderer.render_xkcd_image_as_pixels(text)
-        self.epd.show_and_move(
-            pixel_iterator,
-            quick_refresh=False,
-            move_to=self._pointer_pos["center"],
+        frame = self.render_frame(dialog.GOODBYE_TEXT)
+        self._show_frame(frame, quick_refresh=False, move_to="center")
+
+    def _show_frame(self, frame, quick_refresh, move_to):
+        """ shows a frame on the display, without waiting for the refresh
+
+        The display refreshes on the driver thread of the epaper module,
+        frames shown while it is busy are queued. The service can render the
+        next frames in the meantime.
+
+        :param bytes frame: packed frame for the display
+        :param bool quick_refresh: use a quick or a slow refresh
+        :param str move_to: named position to move the pointer to
+        :returns concurrent.futures.Future: done when the display refreshed
+        """
+        future = self.epd.show_and_move_async(
+            frame, quick_refresh=quick_refresh, move_to=move_to
         )
+        future.add_done_callback(self._log_display_error)
+        return future
+
+    def _log_display_error(self, future):
+        """ logs the error of a failed display update
+
+        :param concurrent.futures.Future future: a finished display update
+        """
+        if future.cancelled():
+            return
+        exception = future.exception()
+        if exception is not None:
+            self.logger.error(f"could not display frame: {exception}")
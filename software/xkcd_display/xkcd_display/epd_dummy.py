@@ -1,5 +1,6 @@
 """ E-Paper dummy interface """
 
+import concurrent.futures
 import logging
 from logging.handlers import SysLogHandler
 
@@ -44,5 +45,29 @@ class EPDummy:
         """ send the display into sleep """
         self.logger.debug("going to sleep")
 
-    def show_and_move(self, pixel_list, quick_refresh=False, move_to=5):
-        """ displays an image and moves the servo """
+    def show_and_move(self, image, quick_refresh=False, move_to=5):
+        """ displays an image and moves the servo
+
+        :image: a packed frame or an iterable of pixel intensities
+        """
+
+    def show_and_move_async(
+        self, image, quick_refresh=False, move_to=5, coalesce=False
+    ):
+        """ displays an image and moves the servo, returns a future
+
+        The dummy has nothing to wait for, the returned future is done.
+
+        :image: a packed frame or an iterable of pixel intensities
+        :returns concurrent.futures.Future: the finished update
+        """
+        future = concurrent.futures.Future()
+        try:
+            self.show_and_move(
+                image, quick_refresh=quick_refresh, move_to=move_to
+            )
+        except Exception as exception:
+            future.set_exception(exception)
+        else:
+            future.set_result(None)
+        return future
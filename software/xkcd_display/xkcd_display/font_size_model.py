@@ -0,0 +1,181 @@
+""" learns the font sizes texts fit at, to start the font size search
+
+The font size search starts at a fixed font size hint, far below the
+font size most panels are rendered at. The model remembers the features of
+rendered texts and the font size they finally fit at. The font size of a
+new text is predicted from the texts with the most similar features.
+
+The model only makes sense for one combination of font, image size and
+render properties, it is stored per renderer.
+"""
+
+import json
+import math
+import threading
+
+from collections import namedtuple, OrderedDict
+from pathlib import Path
+
+from . import atomic_write
+
+MODEL_VERSION = 1
+
+TextFeatures = namedtuple(
+    "TextFeatures", ["characters", "words", "longest_word"]
+)
+Prediction = namedtuple("Prediction", ["font_size", "known"])
+
+
+def text_features(text):
+    """ the features of a text the font size depends on
+
+    :param str text: the text
+    :returns TextFeatures: number of characters and words and the length
+        of the longest word
+    """
+    words = text.split()
+    return TextFeatures(
+        characters=len(text),
+        words=len(words),
+        longest_word=max((len(word) for word in words), default=0),
+    )
+
+
+def _distance(features, other):
+    """ distance of two texts, relative differences count the same """
+    return math.sqrt(
+        sum(
+            (math.log1p(value) - math.log1p(other_value)) ** 2
+            for value, other_value in zip(features, other)
+        )
+    )
+
+
+class FontSizeModel:
+    """ predicts the font size a text will fit at from previous renders
+
+    The font sizes of the nearest texts are scaled with the square root of
+    the ratio of characters, as the area covered by a text grows with its
+    number of characters and the square of its font size. The prediction is
+    a weighted average of these estimates. The model can be used from
+    multiple threads.
+    """
+
+    def __init__(self, max_samples=512, neighbours=3):
+        """ initialize an empty model
+
+        :param int max_samples: number of texts to remember, the least
+            recently rendered are forgotten
+        :param int neighbours: number of texts used for a prediction
+        """
+        self.max_samples = max_samples
+        self.neighbours = neighbours
+        self.changed = False
+        self._samples = OrderedDict()  # TextFeatures -> font size
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+    def learn(self, text, font_size):
+        """ remember the font size a text fit at
+
+        :param str text: the rendered text
+        :param int font_size: the font size the text fit at
+        """
+        features = text_features(text)
+        with self._lock:
+            self._samples[features] = int(font_size)
+            self._samples.move_to_end(features)
+            while len(self._samples) > self.max_samples:
+                self._samples.popitem(last=False)
+            self.changed = True
+
+    def predict(self, text):
+        """ predict the font size a text will fit at
+
+        A text with the same features as a rendered text is known, its
+        prediction is usually exact or off by a few font sizes.
+
+        :param str text: the text to render
+        :returns Prediction: the predicted font size and if the text is
+            known, None without data
+        """
+        features = text_features(text)
+        with self._lock:
+            if features in self._samples:
+                return Prediction(self._samples[features], known=True)
+            nearest = sorted(
+                self._samples.items(),
+                key=lambda sample: _distance(features, sample[0]),
+            )[: self.neighbours]
+        if not nearest:
+            return None
+        total_weight = 0
+        total = 0
+        for sample, font_size in nearest:
+            ratio = max(sample.characters, 1) / max(features.characters, 1)
+            weight = 1 / (_distance(features, sample) + 0.01)
+            total += weight * font_size * ratio ** 0.5
+            total_weight += weight
+        return Prediction(max(int(total / total_weight), 1), known=False)
+
+    def to_dict(self):
+        """ the model as json serializable dictionary """
+        with self._lock:
+            samples = [
+                [*features, font_size]
+                for features, font_size in self._samples.items()
+            ]
+        return {"version": MODEL_VERSION, "samples": samples}
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        """ restores a model from a dictionary
+
+        :param dict data: dictionary created by to_dict()
+        :param kwargs: passed on to the model
+        :returns FontSizeModel: the restored model
+        """
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError("Unsupported font size model version")
+        model = cls(**kwargs)
+        for *features, font_size in data["samples"]:
+            model._samples[TextFeatures(*features)] = int(font_size)
+        return model
+
+    def save(self, path):
+        """ saves the model, if it learned something since the last save
+
+        The file is written with atomic_write(), a reader will never see a
+        partial file.
+
+        :param pathlib.Path path: where to save the model
+        """
+        with self._lock:
+            if not self.changed:
+                return
+            data = self.to_dict()
+            self.changed = False
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, json.dumps(data).encode("utf-8"))
+        except BaseException:
+            self.changed = True
+            raise
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """ loads a model, an empty model is returned if that fails
+
+        :param pathlib.Path path: path of the saved model
+        :param kwargs: passed on to the model
+        :returns FontSizeModel: the loaded model
+        """
+        try:
+            data = json.loads(Path(path).read_text())
+            return cls.from_dict(data, **kwargs)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return cls(**kwargs)
@@ -0,0 +1,238 @@
+""" estimates text metrics from a table of measured glyph advances """
+
+import hashlib
+import itertools
+import json
+import string
+
+from pathlib import Path
+
+from . import CACHE_DIR, FontMetrics, atomic_write
+
+# font size the glyphs are measured at, estimates are scaled from this size
+REFERENCE_SIZE = 100
+# characters to measure, others are estimated with the widest advance
+CHARACTERS = string.ascii_letters + string.digits + string.punctuation
+CHARACTERS += " ’‘“”…–—äöüÄÖÜßéèêáàçñ"
+# a character to enclose a glyph with while measuring its advance, this way
+# the advance of whitespace can be measured, too
+ENCLOSING_CHARACTER = "|"
+
+# loaded tables, to read them only once per process
+_loaded_tables = {}
+
+
+class FontMetricsTable:
+    """ table of glyph metrics of a font, measured at a reference size """
+
+    def __init__(
+        self,
+        font_hash,
+        advances,
+        kerning,
+        ascent,
+        descent,
+        line_height,
+        character_height,
+        reference_size=REFERENCE_SIZE,
+    ):
+        """ initialize the table
+
+        :param str font_hash: sha256 hash of the measured font file
+        :param dict advances: glyph advances by character
+        :param dict kerning: kerning adjustments by character pair
+        :param float ascent: ascent of the font
+        :param float descent: descent of the font, a negative value
+        :param float line_height: height of one line of text
+        :param float character_height: character height reported for the font
+        :param int reference_size: font size the metrics were measured at
+        """
+        self.font_hash = font_hash
+        self.advances = advances
+        self.kerning = kerning
+        self.ascent = ascent
+        self.descent = descent
+        self.line_height = line_height
+        self.character_height = character_height
+        self.reference_size = reference_size
+        self.default_advance = max(advances.values(), default=0)
+
+    def line_width(self, line):
+        """ the width of a line of text at the reference size
+
+        :param str line: the text of one line
+        :returns float: width of the line
+        """
+        width = sum(self.advances.get(c, self.default_advance) for c in line)
+        if self.kerning:
+            pairs = (a + b for a, b in zip(line, line[1:]))
+            width += sum(self.kerning.get(pair, 0) for pair in pairs)
+        return width
+
+    def measure(self, text, font_size):
+        """ estimates the metrics of a (multiline) text at a font size
+
+        The metrics are truncated to integers, like eval_text_metrics() in
+        the renderer module does.
+
+        :param str text: the text to measure
+        :param int font_size: font size of the text
+        :returns FontMetrics: estimated metrics for the text
+        """
+        scale = font_size / self.reference_size
+        lines = text.split("\n")
+        width = max(self.line_width(line) for line in lines)
+        return FontMetrics(
+            width=int(width * scale),
+            height=int(len(lines) * self.line_height * scale),
+            character_height=int(self.character_height * scale),
+        )
+
+    def to_dict(self):
+        """ dictionary representation, used for persisting a table """
+        return {
+            "font_hash": self.font_hash,
+            "reference_size": self.reference_size,
+            "ascent": self.ascent,
+            "descent": self.descent,
+            "line_height": self.line_height,
+            "character_height": self.character_height,
+            "advances": self.advances,
+            "kerning": self.kerning,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """ creates a table from a dictionary representation """
+        return cls(**data)
+
+    def save(self, path):
+        """ saves the table as json file
+
+        The file is written with atomic_write(), a reader will never see a
+        partial file.
+
+        :param pathlib.Path path: where to save the table
+        """
+        data = json.dumps(self.to_dict(), ensure_ascii=False)
+        atomic_write(path, data.encode("utf-8"))
+
+    @classmethod
+    def load(cls, path):
+        """ loads a table from a json file
+
+        :param pathlib.Path path: path to the json file
+        :returns FontMetricsTable: the loaded table
+        """
+        with open(path, "r", encoding="utf-8") as file_handle:
+            return cls.from_dict(json.load(file_handle))
+
+
+def font_file_hash(font_file):
+    """ calculates the sha256 hash of a font file
+
+    :param str font_file: path to the font file
+    :returns str: hex digest of the hash
+    """
+    return hashlib.sha256(Path(font_file).read_bytes()).hexdigest()
+
+
+def build_font_metrics_table(
+    font_file, characters=CHARACTERS, reference_size=REFERENCE_SIZE
+):
+    """ measures the glyphs of a font with imagemagick
+
+    Kerning pairs are only measured, if the width of a text with all
+    characters differs from the sum of the glyph advances.
+
+    :param str font_file: path to the font file
+    :param str characters: the characters to measure
+    :param int reference_size: font size to measure the glyphs at
+    :returns FontMetricsTable: measured metrics
+    """
+    from wand.drawing import Drawing
+    from wand.image import Image
+
+    with Image(width=1, height=1) as img, Drawing() as sketch:
+        sketch.font = font_file
+        sketch.font_size = reference_size
+
+        def text_width(text):
+            return sketch.get_font_metrics(img, text).text_width
+
+        enclosure_width = text_width(ENCLOSING_CHARACTER * 2)
+
+        def width_of(text):
+            enclosed = f"{ENCLOSING_CHARACTER}{text}{ENCLOSING_CHARACTER}"
+            return text_width(enclosed) - enclosure_width
+
+        advances = {c: width_of(c) for c in characters}
+
+        kerning = {}
+        expected_width = sum(advances[c] for c in characters)
+        if abs(width_of(characters) - expected_width) >= 0.5:
+            for a, b in itertools.product(characters, repeat=2):
+                adjustment = width_of(a + b) - advances[a] - advances[b]
+                if abs(adjustment) >= 0.5:
+                    kerning[a + b] = adjustment
+
+        metrics = sketch.get_font_metrics(img, "Ag", multiline=True)
+        return FontMetricsTable(
+            font_hash=font_file_hash(font_file),
+            advances=advances,
+            kerning=kerning,
+            ascent=metrics.ascender,
+            descent=metrics.descender,
+            line_height=metrics.text_height,
+            character_height=metrics.character_height,
+            reference_size=reference_size,
+        )
+
+
+def table_paths(font_file):
+    """ possible locations of a persisted metrics table for a font
+
+    The preferred location is next to the font file, the cache directory is
+    used if the font is installed in a read only location.
+
+    :param str font_file: path to the font file
+    :returns list: paths of metrics table files
+    """
+    table_name = Path(font_file).stem + ".metrics.json"
+    return [Path(font_file).parent / table_name, CACHE_DIR / table_name]
+
+
+def load_font_metrics_table(font_file):
+    """ loads the metrics table for a font, builds it if necessary
+
+    Tables that were measured for a different version of the font file are
+    rebuilt. A newly built table is persisted for later use.
+
+    :param str font_file: path to the font file
+    :returns FontMetricsTable: metrics of the font
+    """
+    font_file = str(font_file)
+    if font_file in _loaded_tables:
+        return _loaded_tables[font_file]
+    font_hash = font_file_hash(font_file)
+    paths = table_paths(font_file)
+    table = None
+    for path in paths:
+        try:
+            table = FontMetricsTable.load(path)
+        except (OSError, ValueError, TypeError):
+            continue
+        if table.font_hash == font_hash:
+            break
+        table = None
+    if table is None:
+        table = build_font_metrics_table(font_file)
+        for path in paths:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                table.save(path)
+                break
+            except OSError:
+                continue
+    _loaded_tables[font_file] = table
+    return table
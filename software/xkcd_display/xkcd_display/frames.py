@@ -0,0 +1,175 @@
+""" packed display frames and a persistent cache for them """
+
+import os
+import threading
+
+from collections import OrderedDict
+from itertools import zip_longest
+from pathlib import Path
+
+from . import atomic_write
+
+# size of a packed frame for the 400 x 300 pixel display, one bit per pixel
+FRAME_SIZE = 400 * 300 // 8
+FRAME_SUFFIX = ".frame"
+
+
+def pack_pixels(pixels):
+    """ packs pixel intensities into a frame as expected by the display
+
+    One byte drives eight pixels, the most significant bit is the first
+    pixel. A pixel intensity of zero is black (bit not set), anything else
+    is white (bit set).
+
+    :param iterable pixels: pixel intensities
+    :returns bytes: the packed frame
+    """
+    groups = zip_longest(*[iter(pixels)] * 8, fillvalue=None)
+    frame = bytearray()
+    for pixel_group in groups:
+        byte = 0xFF
+        for group_pos, pixel_value in enumerate(pixel_group):
+            if pixel_value == 0:
+                byte &= ~(0x80 >> group_pos)
+        frame.append(byte)
+    return bytes(frame)
+
+
+class FrameCache:
+    """ persistent cache for packed frames, with least recently used eviction
+
+    Every frame is stored in its own file named by its key. The modification
+    time of a file is updated on access and used to evict the least recently
+    used frames if the cache grows too large. The cache can be used from
+    multiple threads.
+    """
+
+    def __init__(self, directory, max_bytes=20 * 1024 * 1024):
+        """ initialize the cache
+
+        :param pathlib.Path directory: where to store the frames
+        :param int max_bytes: upper limit for the size of all frames, None
+            for a cache that never evicts frames
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._index = None  # key -> size, ordered from least recent use
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def _path(self, key):
+        return self.directory / f"{key}{FRAME_SUFFIX}"
+
+    def _load_index(self):
+        """ reads the stored frames, ordered by their last access """
+        if self._index is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.directory.glob(f"*{FRAME_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(self._index.values())
+
+    def get(self, key):
+        """ retrieve a frame from the cache
+
+        :param str key: key of the frame
+        :returns bytes: the frame or None if it is not cached
+        """
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            try:
+                frame = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                self._forget(key)
+                return None
+            if len(frame) != FRAME_SIZE:
+                self._forget(key)
+                return None
+            if key not in self._index:
+                # stored by another process, e.g. by precompiling dialogs
+                self._index[key] = len(frame)
+                self._total_bytes += len(frame)
+            self._index.move_to_end(key)
+            return frame
+
+    def put(self, key, frame):
+        """ store a frame in the cache
+
+        The frame is written with atomic_write(), a power loss will not
+        leave a partial frame in the cache.
+
+        :param str key: key of the frame
+        :param bytes frame: the packed frame
+        """
+        if len(frame) != FRAME_SIZE:
+            raise ValueError(f"Frame must have a size of {FRAME_SIZE} bytes")
+        with self._lock:
+            self._load_index()
+            atomic_write(self._path(key), frame)
+            self._forget(key)
+            self._index[key] = len(frame)
+            self._total_bytes += len(frame)
+            self._evict()
+
+    def discard(self, key):
+        """ removes a frame from the cache, if it is cached
+
+        :param str key: key of the frame
+        """
+        with self._lock:
+            self._load_index()
+            self._remove(key)
+
+    def keys(self):
+        """ keys of all cached frames, from least recently used
+
+        :returns list: keys of the frames
+        """
+        with self._lock:
+            self._load_index()
+            return list(self._index)
+
+    def clear(self):
+        """ removes all frames from the cache """
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                self._remove(key)
+
+    def _forget(self, key):
+        """ removes a key from the index """
+        if self._index is not None and key in self._index:
+            self._total_bytes -= self._index.pop(key)
+
+    def _remove(self, key):
+        """ removes a frame from the index and the disk """
+        self._forget(key)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """ removes least recently used frames if the cache is too large """
+        if self.max_bytes is None:
+            return
+        while self._total_bytes > self.max_bytes and self._index:
+            key = next(iter(self._index))
+            self._remove(key)
+
+    def __len__(self):
+        with self._lock:
+            self._load_index()
+            return len(self._index)
+
+    def __contains__(self, key):
+        return self._path(key).is_file()
@@ -0,0 +1,228 @@
+""" renders the frames of a dialogs directory ahead of time
+
+All panels of all dialogs, the break pictures shown before the first
+dialog and the goodbye picture are rendered in parallel worker processes
+and stored in a frame store, where the display service looks them up before
+rendering a frame itself. The break pictures in between every two dialogs
+grow with the square of the number of dialogs, they are only rendered on
+request. Otherwise, the display service renders them while the dialog
+before is shown.
+
+A manifest in the frame store records the content hash and the frame keys
+of every dialog. Dialogs that did not change since the last run are
+skipped, frames that are no longer needed are removed.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+
+from collections import namedtuple
+
+from . import CACHE_DIR, atomic_write
+from . import dialog
+from . import renderer
+from .frames import FrameCache
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+PrecompileResult = namedtuple(
+    "PrecompileResult", ["rendered", "unchanged", "failed", "seconds"]
+)
+
+
+def content_hash(path):
+    """ calculates the sha256 hash of a dialog file
+
+    :param pathlib.Path path: path to the dialog file
+    :returns str: hex digest of the hash
+    """
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_manifest(store_directory, fingerprint):
+    """ loads the manifest of a frame store
+
+    A missing or unreadable manifest, or a manifest written for different
+    renderer settings, results in an empty manifest.
+
+    :param pathlib.Path store_directory: directory of the frame store
+    :param str fingerprint: identifies the renderer settings
+    :returns dict: dialog file name -> {"hash": ..., "keys": [...]}
+    """
+    try:
+        raw = (store_directory / MANIFEST_NAME).read_text()
+        manifest = json.loads(raw)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    if manifest.get("renderer") != fingerprint:
+        return {}
+    return manifest.get("dialogs", {})
+
+
+def save_manifest(store_directory, fingerprint, dialogs):
+    """ saves the manifest of a frame store
+
+    The manifest is written with atomic_write(), a reader will never see a
+    partial file.
+
+    :param pathlib.Path store_directory: directory of the frame store
+    :param str fingerprint: identifies the renderer settings
+    :param dict dialogs: dialog file name -> {"hash": ..., "keys": [...]}
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "renderer": fingerprint,
+        "dialogs": dialogs,
+    }
+    store_directory.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(manifest, indent=1, sort_keys=True)
+    atomic_write(store_directory / MANIFEST_NAME, data.encode("utf-8"))
+
+
+def break_texts(dialog_files, pairwise=False):
+    """ texts that can be shown in between two dialogs
+
+    The display service chooses the next dialog at random, a dialog might
+    follow itself.
+
+    :param list dialog_files: paths of the dialog files
+    :param bool pairwise: include the texts shown in between every two
+        dialogs, not only those shown before the first dialog
+    :returns list: texts of the break pictures and the goodbye picture
+    """
+    texts = []
+    for new_selected in dialog_files:
+        texts.append(dialog.break_text(None, new_selected))
+        if not pairwise:
+            continue
+        for old_selected in dialog_files:
+            texts.append(dialog.break_text(old_selected, new_selected))
+    texts.append(dialog.GOODBYE_TEXT)
+    return texts
+
+
+def _chunks(texts, size):
+    """ splits a list of texts into lists of at most size texts """
+    chunks = []
+    for start in range(0, len(texts), size):
+        end = start + size
+        chunks.append(texts[start:end])
+    return chunks
+
+
+def precompile_dialogs(
+    dialogs_directory,
+    store_directory=None,
+    backend=None,
+    workers=None,
+    chunk_size=16,
+    pairwise_breaks=False,
+):
+    """ renders all frames of a dialogs directory into a frame store
+
+    The panels of a dialog are rendered together in one worker process, the
+    font size search of a panel starts from the fit of the panel before.
+    Break texts are rendered in chunks of chunk_size texts. A text that
+    occurs more than once is only rendered once.
+
+    :param pathlib.Path dialogs_directory: directory with the dialog files
+    :param pathlib.Path store_directory: directory of the frame store,
+        defaults to the directory the display service reads from
+    :param str backend: name of the rasterization backend for rendering
+    :param int workers: number of worker processes, defaults to the number
+        of processors
+    :param int chunk_size: number of break texts rendered in one task
+    :param bool pairwise_breaks: also render the break pictures in between
+        every two dialogs, see break_texts()
+    :returns PrecompileResult: number of rendered frames and unchanged
+        dialogs, a list of (text, reason) tuples that could not be rendered
+        and the time it took in seconds
+    """
+    start_time = time.perf_counter()
+    store_directory = store_directory or CACHE_DIR / "precompiled"
+    xkcd_renderer = renderer.Renderer(backend=backend)
+    fingerprint = xkcd_renderer.frame_key("")
+    store = FrameCache(store_directory, max_bytes=None)
+    old_manifest = load_manifest(store_directory, fingerprint)
+
+    manifest = {}
+    needed = set()
+    failed = []
+    unchanged = 0
+    batches = []  # lists of texts, rendered in one task each
+    scheduled = set()  # keys of the texts in the batches
+    dialog_files = sorted(dialog.dialog_files(dialogs_directory))
+    for dialog_file in dialog_files:
+        try:
+            file_hash = content_hash(dialog_file)
+            old_entry = old_manifest.get(dialog_file.name, {})
+            if old_entry.get("hash") == file_hash and all(
+                key in store for key in old_entry.get("keys", [])
+            ):
+                manifest[dialog_file.name] = old_entry
+                needed.update(old_entry["keys"])
+                unchanged += 1
+                continue
+            transcript = dialog.read_transcript(dialog_file)
+        except (OSError, ValueError) as exception:
+            failed.append((dialog_file.name, str(exception)))
+            continue
+        texts = [spoken_text.text for spoken_text in transcript]
+        keys = [xkcd_renderer.frame_key(text) for text in texts]
+        manifest[dialog_file.name] = {"hash": file_hash, "keys": keys}
+        needed.update(keys)
+        batch = []
+        for text, key in zip(texts, keys):
+            if key not in scheduled:
+                scheduled.add(key)
+                batch.append(text)
+        if batch:
+            batches.append(batch)
+
+    missing_breaks = []
+    for text in break_texts(dialog_files, pairwise_breaks):
+        key = xkcd_renderer.frame_key(text)
+        needed.add(key)
+        if key not in store and key not in scheduled:
+            scheduled.add(key)
+            missing_breaks.append(text)
+    batches.extend(_chunks(missing_breaks, chunk_size))
+
+    rendered = 0
+    if batches:
+        workers = min(workers or os.cpu_count() or 1, len(batches))
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = {
+                executor.submit(
+                    renderer.render_in_worker,
+                    xkcd_renderer.settings,
+                    texts,
+                    "frame",
+                    "skip",
+                ): texts
+                for texts in batches
+            }
+            for future in concurrent.futures.as_completed(futures):
+                texts = futures[future]
+                for text, frame in zip(texts, future.result()):
+                    if frame is None:
+                        reason = "Could not find fitting font size"
+                        failed.append((text, reason))
+                        continue
+                    store.put(xkcd_renderer.frame_key(text), frame)
+                    rendered += 1
+
+    for key in store.keys():
+        if key not in needed:
+            store.discard(key)
+    save_manifest(store_directory, fingerprint, manifest)
+    seconds = time.perf_counter() - start_time
+    return PrecompileResult(rendered, unchanged, failed, seconds)
@@ -1,40 +1,308 @@
 """ renders an text as big as possible in an image """
 
+import concurrent.futures
+import functools
+import hashlib
+import itertools
+import json
 import textwrap
+import threading
+import time
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from pathlib import Path
-from wand.color import Color
-from wand.drawing import Drawing
-from wand.image import Image
+from types import SimpleNamespace
 
-from . import Size
+from . import backends, FontMetrics, Size
+from .font_table import font_file_hash
 
 # set the path to the xkcd font file
 XKCD_FONT_FILE = str(Path(__file__).parent / "xkcd-script.ttf")
 XKCD_IMAGE_PROPERTIES = {
     "width": 400,
     "height": 300,
-    "background": Color("white"),
+    "background": "white",
 }
 XKCD_RENDER_PROPERTIES = {
     "antialias": False,
     "padding": 5,
     "color": "black",
     "font_size_hint": 12,
+    "search": "bisect",
+    "estimate": True,
 }
+# must be increased if a change to the renderer results in different images
+RENDERER_VERSION = 1
 
 
-FontMetrics = namedtuple(
-    "FontMetrics", ["width", "height", "character_height"]
-)
+# probes: the number of font sizes measured by the font size search
 TextFitParameter = namedtuple(
     "TextFitParameter",
-    ["lines", "font_size", "width", "height", "character_height"],
+    ["lines", "font_size", "width", "height", "character_height", "probes"],
+    defaults=[0],
 )
 RenderingFit = namedtuple(
     "RenderingFit", ["lines", "font_size", "x", "y", "character_height"]
 )
+FontSizeSearch = namedtuple(
+    "FontSizeSearch", ["font_size", "metrics", "probes"]
+)
+FitCacheInfo = namedtuple(
+    "FitCacheInfo", ["hits", "misses", "maxsize", "currsize"]
+)
+Probe = namedtuple("Probe", ["text", "font_size", "estimated"])
+
+
+class FitCache:
+    """ size bounded memo of text fits, least recently used are evicted
+
+    Finding the best fit for a text takes a lot of metric calls, rendering
+    the text with a known fit only needs one draw call.
+    """
+
+    def __init__(self, maxsize=256):
+        """ initialize the memo
+
+        :param int maxsize: maximum number of fits to remember
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._fits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ retrieve a remembered fit
+
+        :param tuple key: key of the fit
+        :returns TextFitParameter: the remembered fit or None
+        """
+        with self._lock:
+            fit = self._fits.get(key)
+            if fit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._fits.move_to_end(key)
+            return fit
+
+    def put(self, key, fit):
+        """ remember a fit
+
+        :param tuple key: key of the fit
+        :param TextFitParameter fit: the fit to remember
+        """
+        with self._lock:
+            self._fits[key] = fit
+            self._fits.move_to_end(key)
+            while len(self._fits) > self.maxsize:
+                self._fits.popitem(last=False)
+
+    def clear(self):
+        """ forget all remembered fits and reset the counters """
+        with self._lock:
+            self._fits.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """ returns the hit and miss counters and the size of the memo """
+        with self._lock:
+            return FitCacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._fits)
+            )
+
+
+# memo used for the xkcd images
+FIT_CACHE = FitCache()
+
+
+class RenderStats:
+    """ records what it took to render a text
+
+    Pass an instance to a render method to find out why a text takes long
+    to render. Nothing is recorded, if no instance is passed.
+
+    Every font metric call is counted and timed, the wrap candidate and the
+    font size of every call are recorded as Probe tuples. Calls on the
+    table of estimated metrics are recorded, but not counted as metric
+    calls.
+    """
+
+    def __init__(self):
+        self.text = None
+        self.rendering = None  # RenderingFit of the text
+        self.fit_cached = False
+        self.fit_seconds = 0.0
+        self.font_size_probes = 0  # measurements of the font size search
+        self.metric_calls = 0
+        self.metric_seconds = 0.0
+        self.probes = []
+        self.draw_seconds = 0.0
+        self.export_seconds = 0.0
+
+    def recording_probe(self, probe, estimated=False):
+        """ wraps a probe to record its calls
+
+        :param function probe: called with a text and a font size, returns
+            the FontMetrics of the text
+        :param bool estimated: the probe returns estimated metrics
+        :returns function: the recording probe
+        """
+
+        def recording(text, font_size):
+            self.probes.append(Probe(text, font_size, estimated))
+            if estimated:
+                return probe(text, font_size)
+            start = time.perf_counter()
+            try:
+                return probe(text, font_size)
+            finally:
+                self.metric_calls += 1
+                self.metric_seconds += time.perf_counter() - start
+
+        return recording
+
+    def recording_table(self, table):
+        """ wraps a table of estimated metrics to record its calls
+
+        :param font_table.FontMetricsTable table: table of estimated metrics
+        :returns: an object with a recording measure method
+        """
+        return SimpleNamespace(
+            measure=self.recording_probe(table.measure, estimated=True)
+        )
+
+    @property
+    def wraps_probed(self):
+        """ number of different text wraps that were probed """
+        return len({probe.text for probe in self.probes})
+
+    @property
+    def font_sizes_probed(self):
+        """ the font sizes that were probed, in the order of probing """
+        font_sizes = (probe.font_size for probe in self.probes)
+        return list(OrderedDict.fromkeys(font_sizes))
+
+    def summary(self):
+        """ a one line description of the recorded data
+
+        :returns str: description for logging
+        """
+        font_size = getattr(self.rendering, "font_size", None)
+        if self.fit_cached:
+            fit = "cached fit"
+        else:
+            fit = (
+                f"fit in {1000 * self.fit_seconds:.1f}ms, "
+                f"{self.metric_calls} metric calls "
+                f"({1000 * self.metric_seconds:.1f}ms), "
+                f"{len(self.probes)} probes of {self.wraps_probed} wraps, "
+                f"font sizes {self.font_sizes_probed}, "
+                f"{self.font_size_probes} font size probes"
+            )
+        return (
+            f"rendered {self.text!r} at font size {font_size}: {fit}, "
+            f"draw {1000 * self.draw_seconds:.1f}ms, "
+            f"export {1000 * self.export_seconds:.1f}ms"
+        )
+
+
+class LineMetricsMemo:
+    """ memo of text metrics per line and font size
+
+    Wrap candidates of a text share many lines. The metrics of a multiline
+    text are composed from the metrics of its lines: the width is the width
+    of the widest line, the height is the sum of the line heights and the
+    leading in between. Only lines not measured before at a font size need
+    to be measured.
+
+    The leading of a font size is derived from the height of the first
+    multiline text measured at that size, assuming all lines are of the
+    same height. It is checked by composing the metrics of the second
+    multiline text, that is measured as a whole, too. If they don't match,
+    texts of that size are always measured as a whole. Font sizes that are
+    probed only once, like in the font size search, are never measured
+    line by line.
+    """
+
+    def __init__(self, maxsize=8192):
+        """ initialize the memo
+
+        :param int maxsize: maximum number of line metrics to remember
+        """
+        self.maxsize = maxsize
+        self._lines = OrderedDict()  # (font_size, line) -> FontMetrics
+        self._first = {}  # font size -> first multiline text and metrics
+        self._leading = {}  # font size -> leading, None if not composable
+
+    def measure(self, probe, text, font_size):
+        """ measures a (multiline) text at a font size
+
+        :param function probe: called with a text and a font size, returns
+            the FontMetrics of the text
+        :param str text: the text to measure
+        :param int font_size: font size of the text
+        :returns FontMetrics: metrics for the text
+        """
+        lines = text.split("\n")
+        if len(lines) == 1:
+            return self._line_metrics(probe, text, font_size)
+        if font_size not in self._leading:
+            return self._check_composition(probe, text, lines, font_size)
+        leading = self._leading[font_size]
+        if leading is None:
+            return probe(text, font_size)
+        return self._compose(probe, lines, font_size, leading)
+
+    def clear(self):
+        """ forget all remembered metrics """
+        self._lines.clear()
+        self._first.clear()
+        self._leading.clear()
+
+    def _line_metrics(self, probe, line, font_size):
+        """ the remembered metrics of a line, measured if necessary """
+        key = (font_size, line)
+        metrics = self._lines.get(key)
+        if metrics is None:
+            metrics = probe(line, font_size)
+            self._lines[key] = metrics
+            while len(self._lines) > self.maxsize:
+                self._lines.popitem(last=False)
+        else:
+            self._lines.move_to_end(key)
+        return metrics
+
+    def _compose(self, probe, lines, font_size, leading):
+        """ composes the metrics of a multiline text from its lines """
+        metrics = [
+            self._line_metrics(probe, line, font_size) for line in lines
+        ]
+        return FontMetrics(
+            width=max(line_metrics.width for line_metrics in metrics),
+            height=sum(line_metrics.height for line_metrics in metrics)
+            + leading * (len(lines) - 1),
+            character_height=metrics[0].character_height,
+        )
+
+    def _check_composition(self, probe, text, lines, font_size):
+        """ measures a text as a whole, to check composing its metrics
+
+        :returns FontMetrics: the measured metrics of the text
+        """
+        measured = probe(text, font_size)
+        if font_size not in self._first:
+            self._first[font_size] = (len(lines), measured.height)
+            return measured
+        first_count, first_height = self._first.pop(font_size)
+        line_height = self._line_metrics(probe, lines[0], font_size).height
+        leading = (first_height - first_count * line_height) // (
+            first_count - 1
+        )
+        composed = self._compose(probe, lines, font_size, leading)
+        self._leading[font_size] = leading if composed == measured else None
+        return measured
 
 
 def eval_text_metrics(sketch, img, text):
@@ -55,43 +323,147 @@ def eval_text_metrics(sketch, img, text):
     )
 
 
+def metrics_probe(sketch, img):
+    """ returns a function to measure a text at a given font size
+
+    note: this relies on font properties already set on the sketch, the
+    font size of the sketch is changed by the returned function
+
+    :param wand.drawing.Drawing sketch: a wand.drawing.Drawing instance
+    :param wand.image.Image img: a wand.image.Image instance
+    :returns function: probe(text, font_size) returning FontMetrics
+    """
+
+    def probe(text, font_size):
+        sketch.font_size = font_size
+        return eval_text_metrics(sketch, img, text)
+
+    return probe
+
+
+def fits_into(metrics, max_size):
+    """ checks if rendered text metrics fit into a box
+
+    :param FontMetrics metrics: metrics of the rendered text
+    :param Size max_size: the largest size a text should have
+    :returns bool: True if the text fits into the box
+    """
+    return (
+        metrics.width <= max_size.width and metrics.height <= max_size.height
+    )
+
+
+def text_wrapper(text):
+    """ returns a function to wrap a text at a given width
+
+    The text is split into words (and whitespace) only once, the returned
+    function wraps these chunks the same way as textwrap.wrap() without
+    breaking long words would do.
+
+    :param str text: text to wrap, words a preserved
+    :returns function: wrap_at(width) returning a list of wrapped lines
+    """
+    wrapper = textwrap.TextWrapper(break_long_words=False)
+    chunks = wrapper._split_chunks(text)
+
+    def wrap_at(width):
+        wrapper.width = width
+        # the chunk list is consumed by the wrapping, a copy is used
+        return wrapper._wrap_chunks(list(chunks))
+
+    return wrap_at
+
+
 def unique_text_wraps(text):
     """ Find all unique wraps of a text
 
+    The number of wrapped lines never increases with the wrap width. Instead
+    of wrapping the text at every possible width, the next width that
+    results in fewer lines is searched by bisection.
+
     :param str text: text to wrap, words a preserved
     :returns iterator: uniquely wrapped lines
     """
-    lines_checked = set()
-    for wrap_at in range(1, len(text) + 1):
-        wrapped_lines = textwrap.wrap(text, wrap_at, break_long_words=False)
+    wrap_at = text_wrapper(text)
+    max_width = len(text)
+    if max_width == 0:
+        return
+    width = 1
+    wrapped_lines = wrap_at(width)
+    while True:
+        yield wrapped_lines
         number_of_lines = len(wrapped_lines)
-        if number_of_lines not in lines_checked:
-            lines_checked.add(number_of_lines)
-            yield wrapped_lines
+        # lower: wraps into number_of_lines, upper: wraps into fewer lines
+        lower, upper, fewer_lines = width, max_width + 1, None
+        while upper - lower > 1:
+            middle = (lower + upper) // 2
+            middle_lines = wrap_at(middle)
+            if len(middle_lines) < number_of_lines:
+                upper, fewer_lines = middle, middle_lines
+            else:
+                lower = middle
+        if fewer_lines is None:
+            break
+        width, wrapped_lines = upper, fewer_lines
 
 
-def find_best_fitting_text_wrap(sketch, img, max_size, text):
+def best_text_wrap(probe, font_size, max_size, text, search="linear"):
     """ Find the best fitting way to wrap a text inside a box
 
-    note: this relies on font properties already set on the sketch
-
-    :param wand.drawing.Drawing sketch: a wand.drawing.Drawing instance
-    :param wand.image.Image img: a wand.image.Image instance
+    :param function probe: function to measure a text at a font size
+    :param int font_size: font size to measure the wrapped texts at
     :param Size max_size: the largest size a text should have
     :param str text: the text to render
+    :param str search: "linear" measures one wrap after the other, "bisect"
+        searches the wraps by bisection
     :returns list: the wrapped text lines for the best possible fit
     """
     expected_ratio = max_size.width / max_size.height
-    for wrapped_lines in unique_text_wraps(text):
+
+    def has_fitting_ratio(wrapped_lines):
         wrapped_text = "\n".join(wrapped_lines)
-        rendered_size = eval_text_metrics(sketch, img, wrapped_text)
+        rendered_size = probe(wrapped_text, font_size)
         rendered_ratio = rendered_size.width / rendered_size.height
         fit_ratio = rendered_ratio / expected_ratio
-        if fit_ratio >= 1:
+        return fit_ratio >= 1
+
+    if search == "bisect":
+        # the wraps are ordered by decreasing number of lines, therefore the
+        # ratio of the rendered text increases. The last wrap is used, if
+        # no wrap has a fitting ratio.
+        candidates = list(unique_text_wraps(text))
+        lower, upper = 0, len(candidates) - 1
+        while lower < upper:
+            middle = (lower + upper) // 2
+            if has_fitting_ratio(candidates[middle]):
+                upper = middle
+            else:
+                lower = middle + 1
+        return candidates[lower]
+
+    for wrapped_lines in unique_text_wraps(text):
+        if has_fitting_ratio(wrapped_lines):
             break
     return wrapped_lines
 
 
+def find_best_fitting_text_wrap(sketch, img, max_size, text, search="linear"):
+    """ Find the best fitting way to wrap a text inside a box
+
+    note: this relies on font properties already set on the sketch
+
+    :param wand.drawing.Drawing sketch: a wand.drawing.Drawing instance
+    :param wand.image.Image img: a wand.image.Image instance
+    :param Size max_size: the largest size a text should have
+    :param str text: the text to render
+    :param str search: "linear" measures one wrap after the other, "bisect"
+        searches the wraps by bisection
+    :returns list: the wrapped text lines for the best possible fit
+    """
+    probe = metrics_probe(sketch, img)
+    return best_text_wrap(probe, sketch.font_size, max_size, text, search)
+
+
 def font_sizes(start, stop, factor=1.2):
     """ iterator for gently increasing font sizes
 
@@ -109,7 +481,218 @@ def font_sizes(start, stop, factor=1.2):
         font_size = new_font_size
 
 
-def find_best_text_fit(sketch, img, max_size, text):
+def linear_font_size_search(probe, max_size, text, start):
+    """ finds the largest font size by gently increasing it
+
+    :param function probe: function to measure a text at a font size
+    :param Size max_size: the largest size a text should have
+    :param str text: the (wrapped) text to render
+    :param int start: font size to start the search with
+    :returns FontSizeSearch: largest fitting font size, its metrics and the
+        number of probes used
+    """
+    best_fit = None
+    probes = 0
+    for font_size in font_sizes(start=start, stop=max_size.height):
+        metrics = probe(text, font_size)
+        probes += 1
+        if not fits_into(metrics, max_size):
+            break
+        best_fit = (font_size, metrics)
+    if best_fit is None:
+        raise ValueError("Could not find fitting font size")
+    return FontSizeSearch(*best_fit, probes=probes)
+
+
+def bisect_font_size(
+    probe, max_size, text, start, margin=0.05, extrapolate=True
+):
+    """ finds the largest integer font size by bracketing and bisecting
+
+    The first probe at the start size is used to extrapolate a font size
+    that should just fit, since text metrics scale roughly linearly with the
+    font size. Starting from this guess, a bracket around the largest
+    fitting font size is established with geometrically increasing steps
+    and narrowed down by bisection afterwards.
+
+    A start that is already a good prediction of the font size is used as
+    the guess, without extrapolating.
+
+    As with font_sizes(), the height of the box is an exclusive upper limit.
+
+    :param function probe: function to measure a text at a font size
+    :param Size max_size: the largest size a text should have
+    :param str text: the (wrapped) text to render
+    :param int start: font size to start the search with
+    :param float margin: initial bracket width relative to the guessed size
+    :param bool extrapolate: extrapolate the guess from the start size
+    :returns FontSizeSearch: largest fitting font size, its metrics and the
+        number of probes used
+    """
+    stop = int(max_size.height)
+    if stop <= 1:
+        raise ValueError("Could not find fitting font size")
+    lower = None  # largest font size known to fit, with metrics
+    upper = stop  # smallest font size known not to fit
+    probes = 0
+
+    def measure(font_size):
+        nonlocal lower, upper, probes
+        metrics = probe(text, font_size)
+        probes += 1
+        if fits_into(metrics, max_size):
+            lower = (font_size, metrics)
+        else:
+            upper = font_size
+        return metrics
+
+    # extrapolate a font size that just fits from a first measurement
+    font_size = min(max(int(start), 1), stop - 1)
+    metrics = measure(font_size)
+    guess = font_size
+    if extrapolate:
+        scale = min(
+            max_size.width / max(metrics.width, 1),
+            max_size.height / max(metrics.height, 1),
+        )
+        guess = min(max(int(font_size * scale), 1), stop - 1)
+    if guess != font_size:
+        measure(guess)
+
+    def largest_fitting_size():
+        return 0 if lower is None else lower[0]
+
+    # widen the bracket until it encloses the largest fitting font size
+    step = max(int(guess * margin), 1)
+    if largest_fitting_size() == guess:
+        while upper - guess > step:
+            if not fits_into(measure(guess + step), max_size):
+                break
+            guess, step = guess + step, step * 2
+    else:
+        while upper - step > largest_fitting_size():
+            if fits_into(measure(upper - step), max_size):
+                break
+            step *= 2
+
+    # narrow down the bracket to the largest fitting font size
+    while upper - largest_fitting_size() > 1:
+        measure((largest_fitting_size() + upper) // 2)
+
+    if lower is None:
+        raise ValueError("Could not find fitting font size")
+    return FontSizeSearch(*lower, probes=probes)
+
+
+def confirm_font_size(probe, max_size, text, estimated):
+    """ confirms an estimated font size with real measurements
+
+    The estimate is the first guess of a bisecting search, see
+    bisect_font_size(). If the text fits at the estimated font size, the
+    bracket is widened upwards, otherwise downwards, in steps of one, two,
+    four ... font sizes and narrowed down afterwards. An estimate that is a
+    few font sizes off is confirmed with a few probes.
+
+    :param function probe: function to measure a text at a font size
+    :param Size max_size: the largest size a text should have
+    :param str text: the (wrapped) text to render
+    :param FontSizeSearch estimated: the estimated font size
+    :returns FontSizeSearch: confirmed font size, its metrics and the
+        number of probes used
+    """
+    return bisect_font_size(
+        probe,
+        max_size,
+        text,
+        estimated.font_size,
+        margin=0,
+        extrapolate=False,
+    )
+
+
+FONT_SIZE_SEARCHES = {
+    "linear": linear_font_size_search,
+    "bisect": bisect_font_size,
+}
+
+
+def fit_text(
+    probe,
+    max_size,
+    text,
+    font_size_hint,
+    search="linear",
+    estimate=None,
+    start=None,
+    predicted=False,
+):
+    """ returns the best way for a text to still fit in a area
+
+    If a table of estimated font metrics is provided, the searches for the
+    text wrap and font size are done on the estimated metrics. Only the
+    final fit is confirmed with the probe.
+
+    The text wrap is always chosen at the font size hint. The font size
+    search may be started at a different font size, a good start saves
+    probes. The bisecting search finds the same font size from any start,
+    the linear search depends on its start.
+
+    :param function probe: called with a text and a font size, returns the
+        FontMetrics of the text
+    :param Size max_size: the largest size a text should have
+    :param str text: the text to render
+    :param int font_size_hint: font size used as a starting point for the
+        searches of the text wrap and the font size
+    :param str search: search mode, "linear" increases the font size in
+        steps of 1.2, "bisect" searches text wraps and font sizes by bisection
+        and finds the largest integer font size
+    :param font_table.FontMetricsTable estimate: table for estimating metrics
+    :param int start: font size to start the font size search with,
+        defaults to the font size hint
+    :param bool predicted: the start is a reliable prediction of the font
+        size, the bisecting search brackets the font size closely around it
+    :returns TextFitParameter: parameters needed for rendering a text on a
+        image and the number of probes of the font size search. With
+        estimated metrics, only the probes confirming the estimate are
+        counted.
+    """
+    try:
+        search_font_size = FONT_SIZE_SEARCHES[search]
+    except KeyError:
+        raise ValueError(f"Unknown font size search: {search}")
+    if predicted and search == "bisect":
+        search_font_size = functools.partial(
+            bisect_font_size, margin=0, extrapolate=False
+        )
+    start = start or font_size_hint
+    if estimate is None:
+        # wrap the text in a best fitting style
+        lines = best_text_wrap(probe, font_size_hint, max_size, text, search)
+        wrapped_text = "\n".join(lines)
+        # search for the largest font size that still fits in max_size
+        result = search_font_size(probe, max_size, wrapped_text, start)
+    else:
+        lines = best_text_wrap(
+            estimate.measure, font_size_hint, max_size, text, search
+        )
+        wrapped_text = "\n".join(lines)
+        estimated = search_font_size(
+            estimate.measure, max_size, wrapped_text, start
+        )
+        result = confirm_font_size(probe, max_size, wrapped_text, estimated)
+    return TextFitParameter(
+        lines=lines,
+        font_size=result.font_size,
+        width=result.metrics.width,
+        height=result.metrics.height,
+        character_height=result.metrics.character_height,
+        probes=result.probes,
+    )
+
+
+def find_best_text_fit(
+    sketch, img, max_size, text, search="linear", estimate=None, stats=None
+):
     """ returns the best way for a text to still fit in a area
 
     note: this relies on font properties already set on the sketch
@@ -118,29 +701,59 @@ def find_best_text_fit(sketch, img, max_size, text):
     :param wand.image.Image img: a wand.image.Image instance
     :param Size max_size: the largest size a text should have
     :param str text: the text to render
-    :returns BestTextFit: parameters needed for rendering a text on a image
+    :param str search: search mode, "linear" or "bisect"
+    :param font_table.FontMetricsTable estimate: table for estimating metrics
+    :param RenderStats stats: records the metric calls, if provided
+    :returns TextFitParameter: parameters needed for rendering a text on a
+        image and the number of probes of the font size search
     """
-    # wrap the text in a best fitting style
-    lines = find_best_fitting_text_wrap(sketch, img, max_size, text)
-    wrapped_text = "\n".join(lines)
-    best_fit = None
-    # increase the font size and check if it still fits in max_size
-    for font_size in font_sizes(start=sketch.font_size, stop=max_size.height):
-        sketch.font_size = font_size
-        size = eval_text_metrics(sketch, img, wrapped_text)
-        if max_size.width < size.width or max_size.height < size.height:
-            break
-        else:
-            best_fit = TextFitParameter(
-                lines=lines,
-                font_size=font_size,
-                width=size.width,
-                height=size.height,
-                character_height=size.character_height,
-            )
-    if best_fit is None:
-        raise ValueError("Could not find fitting font size")
-    return best_fit
+    probe = metrics_probe(sketch, img)
+    if stats is not None:
+        probe = stats.recording_probe(probe)
+        if estimate is not None:
+            estimate = stats.recording_table(estimate)
+    probe = functools.partial(LineMetricsMemo().measure, probe)
+    return fit_text(
+        probe, max_size, text, sketch.font_size, search, estimate=estimate
+    )
+
+
+def warm_start_font_size(text, neighbour_text, neighbour_font_size):
+    """ guesses a font size for a text from the fit of a neighbouring text
+
+    The area covered by a text grows with its number of characters and the
+    square of the font size. Both texts are fitted into the same box.
+
+    :param str text: the text to guess a font size for
+    :param str neighbour_text: an already fitted text
+    :param int neighbour_font_size: font size of the fitted text
+    :returns int: the guessed font size
+    """
+    ratio = max(len(neighbour_text), 1) / max(len(text), 1)
+    return max(int(neighbour_font_size * ratio ** 0.5), 1)
+
+
+def text_position(box_size, best_fit):
+    """ calculates the position of a text centered in a box
+
+    The y value used for drawing a text specifies the baseline of the first
+    line of text, this must be adjusted with the character height of the
+    text.
+
+    :param Size box_size: size of the box the text is centered in
+    :param TextFitParameter best_fit: the fit of the text
+    :returns RenderingFit: parameters used to render the text
+    """
+    x = (box_size.width - best_fit.width) // 2
+    unadjusted_y = (box_size.height - best_fit.height) // 2
+    y = unadjusted_y + best_fit.character_height
+    return RenderingFit(
+        lines=best_fit.lines,
+        font_size=best_fit.font_size,
+        x=int(x),
+        y=int(y),
+        character_height=best_fit.character_height,
+    )
 
 
 def render_text(
@@ -151,10 +764,15 @@ def render_text(
     antialias=True,
     padding=0,
     color="black",
-    font_size_hint=12
+    font_size_hint=12,
+    search="linear",
+    estimate=False
 ):
     """ renders a text as large as possible on a provided image
 
+    The text is fitted and drawn by a Renderer with the imagemagick backend,
+    fits are remembered in FIT_CACHE.
+
     :param wand.image.Image img: a wand.image.Image instance
     :param str text: the text to render
     :param str font: path to a font file to use
@@ -166,41 +784,436 @@ def render_text(
     :param int font_size_hint: font
         size used as a starting point for the search of the largest font size,
         also used for finding the best way to wrap a text.
+    :param str search: font size search mode, "linear" or "bisect"
+    :param bool estimate: search the fit on estimated font metrics and
+        confirm only the final fit with imagemagick
     :returns RenderingFit: parameters used to render the text on the image
     """
+    xkcd_renderer = Renderer(
+        font,
+        image_properties={"width": img.width, "height": img.height},
+        render_properties={
+            "antialias": antialias,
+            "padding": padding,
+            "color": color,
+            "font_size_hint": font_size_hint,
+            "search": search,
+            "estimate": estimate,
+        },
+        fit_cache=FIT_CACHE,
+        backend="wand",
+    )
+    try:
+        rendering = xkcd_renderer.fit(text)
+        xkcd_renderer.backend.draw_text(
+            img,
+            rendering.x,
+            rendering.y,
+            "\n".join(rendering.lines),
+            rendering.font_size,
+        )
+    finally:
+        xkcd_renderer.close()
+    return rendering
+
+
+class Renderer:
+    """ renders texts as large as possible on images of the same kind
+
+    The rasterization backend and the memo for text fits are created once
+    and reused for every text rendered. Rendering is serialized, a renderer
+    can be shared between threads.
+    """
 
-    box_size = Size(img.width - 2 * padding, img.height - 2 * padding)
-
-    with Drawing() as sketch:
-        # Set the basic font style
-        sketch.fill_color = Color(color)
-        sketch.font = font
-        sketch.font_size = font_size_hint
-        sketch.text_antialias = antialias
-
-        # search for the largest font size to render the text inside the box
-        best_fit = find_best_text_fit(sketch, img, box_size, text)
-        sketch.font_size = best_fit.font_size
-
-        # calculate the positioning of the text in the image
-        # the y value used in sketch.text() method to render the text
-        # specifies the baseline of the first line of text
-        # this must be adjusted with the character height of the text
-        x = (box_size.width - best_fit.width) // 2
-        unadjusted_y = (box_size.height - best_fit.height) // 2
-        y = unadjusted_y + best_fit.character_height
-
-        # render the text and  return the image
-        sketch.text(x, int(y), "\n".join(best_fit.lines))
-        sketch.draw(img)
-
-        return RenderingFit(
-            lines=best_fit.lines,
-            font_size=best_fit.font_size,
-            x=int(x),
-            y=int(y),
-            character_height=best_fit.character_height,
+    def __init__(
+        self,
+        font=XKCD_FONT_FILE,
+        image_properties=None,
+        render_properties=None,
+        fit_cache=None,
+        backend=None,
+        font_size_model=None,
+    ):
+        """ initialize the renderer
+
+        :param str font: path to a font file to use
+        :param dict image_properties: properties of the images to render on,
+            defaults to XKCD_IMAGE_PROPERTIES
+        :param dict render_properties: keyword arguments for render_text(),
+            defaults to XKCD_RENDER_PROPERTIES
+        :param FitCache fit_cache: memo for text fits, a new one by default
+        :param str backend: name of the rasterization backend, "wand" or
+            "pillow", defaults to backends.DEFAULT_BACKEND
+        :param FontSizeModel font_size_model: predicts the start of the
+            bisecting font size search and learns from every search
+        """
+        self.font = font
+        if image_properties is None:
+            image_properties = XKCD_IMAGE_PROPERTIES
+        if render_properties is None:
+            render_properties = XKCD_RENDER_PROPERTIES
+        self.image_properties = image_properties
+        self.render_properties = render_properties
+        self.fit_cache = FitCache() if fit_cache is None else fit_cache
+        self.line_metrics = LineMetricsMemo()
+        self.backend_name = backend or backends.DEFAULT_BACKEND
+        self.font_size_model = font_size_model
+        self._backend = None  # created on first use
+        self._lock = threading.RLock()
+
+    @property
+    def backend(self):
+        """ the rasterization backend used for measuring and drawing """
+        if self._backend is None:
+            self._backend = backends.create_backend(
+                self.backend_name,
+                self.font,
+                self.image_properties,
+                self.render_properties,
+            )
+        return self._backend
+
+    def fit(self, text, start=None, stats=None):
+        """ finds the best fit and position of a text
+
+        :param str text: the text to render
+        :param int start: font size to start the font size search with, only
+            used with the bisecting search, which finds the same font size
+            from any start. The prediction of the font size model is
+            preferred.
+        :param RenderStats stats: records the search, if provided
+        :returns RenderingFit: parameters used to render the text
+        """
+        padding = self.render_properties.get("padding", 0)
+        box_size = Size(
+            self.image_properties["width"] - 2 * padding,
+            self.image_properties["height"] - 2 * padding,
+        )
+        font_size_hint = self.render_properties.get("font_size_hint", 12)
+        search = self.render_properties.get("search", "linear")
+        estimate = self.render_properties.get("estimate", False)
+        model = self.font_size_model
+        predicted = False
+        if search != "bisect":
+            start = None
+        elif model is not None:
+            prediction = model.predict(text)
+            if prediction is not None:
+                start, predicted = prediction
+        fit_key = (
+            text,
+            self.font,
+            box_size,
+            font_size_hint,
+            search,
+            estimate,
+            self.backend_name,
+        )
+        with self._lock:
+            best_fit = self.fit_cache.get(fit_key)
+            if stats is not None:
+                stats.text = text
+                stats.fit_cached = best_fit is not None
+            if best_fit is None:
+                backend = self.backend
+                probe = backend.measure
+                font_table = backend.font_metrics_table() if estimate else None
+                if stats is not None:
+                    probe = stats.recording_probe(probe)
+                    if font_table is not None:
+                        font_table = stats.recording_table(font_table)
+                probe = functools.partial(self.line_metrics.measure, probe)
+                started = time.perf_counter()
+                best_fit = fit_text(
+                    probe,
+                    box_size,
+                    text,
+                    font_size_hint,
+                    search,
+                    estimate=font_table,
+                    start=start,
+                    predicted=predicted,
+                )
+                if stats is not None:
+                    stats.fit_seconds = time.perf_counter() - started
+                    stats.font_size_probes = best_fit.probes
+                if model is not None:
+                    model.learn(text, best_fit.font_size)
+                self.fit_cache.put(fit_key, best_fit)
+        rendering = text_position(box_size, best_fit)
+        if stats is not None:
+            stats.rendering = rendering
+        return rendering
+
+    def render(self, text, export, start=None, stats=None):
+        """ renders a text on a blank canvas
+
+        :param str text: the text to render
+        :param function export: called with the rendered canvas, the return
+            value is returned
+        :param int start: font size to start the font size search with
+        :param RenderStats stats: records the search, drawing and export,
+            if provided
+        :returns: the exported image
+        """
+        image, _ = self._render(text, export, start, stats)
+        return image
+
+    def _render(self, text, export, start=None, stats=None):
+        """ renders a text on a blank canvas, see render()
+
+        :returns tuple: the exported image and the RenderingFit used
+        """
+        with self._lock:
+            rendering = self.fit(text, start=start, stats=stats)
+            backend = self.backend
+            with backend.canvas() as canvas:
+                started = time.perf_counter()
+                backend.draw_text(
+                    canvas,
+                    rendering.x,
+                    rendering.y,
+                    "\n".join(rendering.lines),
+                    rendering.font_size,
+                )
+                drawn = time.perf_counter()
+                image = export(canvas)
+                if stats is not None:
+                    stats.draw_seconds = drawn - started
+                    stats.export_seconds = time.perf_counter() - drawn
+                return image, rendering
+
+    @property
+    def settings(self):
+        """ the settings needed to set up an equal renderer
+
+        :returns tuple: font, image properties, render properties and the
+            name of the backend
+        """
+        return (
+            self.font,
+            self.image_properties,
+            self.render_properties,
+            self.backend_name,
+        )
+
+    def render_dialog(
+        self,
+        transcript,
+        export="frame",
+        workers=None,
+        errors="raise",
+        stats=None,
+        cancelled=None,
+    ):
+        """ renders all panels of a dialog in one pass
+
+        The font size search of a panel is started from the fit of the
+        panel before. With more than one worker, the dialog is split into
+        consecutive parts, that are rendered in separate processes.
+
+        :param list transcript: SpokenText tuples or texts of the panels
+        :param str export: "frame", "gif" or "pixels"
+        :param int workers: number of worker processes, the panels are
+            rendered in this process by default
+        :param str errors: "raise" raises a ValueError if a text does not
+            fit, "skip" returns None instead of the image for it
+        :param list stats: a RenderStats for every rendered text is appended
+            to this list, if provided
+        :param threading.Event cancelled: if set, the remaining panels are
+            skipped and None is returned for them, only checked if the
+            panels are rendered in this process
+        :returns list: the exported images in the order of the transcript
+        """
+        texts = [getattr(line, "text", line) for line in transcript]
+        if export not in EXPORTS:
+            raise ValueError(f"Unknown export format: {export}")
+        if errors not in ("raise", "skip"):
+            raise ValueError(f"Unknown error handling: {errors}")
+        workers = min(workers or 1, len(texts))
+        if workers <= 1:
+            return self._render_texts(texts, export, errors, stats, cancelled)
+        # consecutive parts, the searches are still warm started
+        size = -(-len(texts) // workers)  # rounded up
+        remaining = iter(texts)
+        parts = [list(itertools.islice(remaining, size)) for _ in texts]
+        parts = [part for part in parts if part]
+        with concurrent.futures.ProcessPoolExecutor(len(parts)) as executor:
+            results = executor.map(
+                render_in_worker,
+                itertools.repeat(self.settings),
+                parts,
+                itertools.repeat(export),
+                itertools.repeat(errors),
+                itertools.repeat(stats is not None),
+            )
+            images = []
+            for part in results:
+                if stats is not None:
+                    part, part_stats = part
+                    stats.extend(part_stats)
+                images.extend(part)
+            return images
+
+    def _render_texts(
+        self, texts, export, errors="raise", stats=None, cancelled=None
+    ):
+        """ renders texts one after the other, warm starting the searches
+
+        :param list texts: the texts to render
+        :param str export: "frame", "gif" or "pixels"
+        :param str errors: "raise" or "skip" texts that do not fit
+        :param list stats: a RenderStats for every text is appended to this
+            list, if provided
+        :param threading.Event cancelled: checked before every text, None
+            is returned for the remaining texts if set
+        :returns list: the exported images
+        """
+        export_function = getattr(self.backend, EXPORTS[export])
+        images = []
+        neighbour = None
+        for text in texts:
+            if cancelled is not None and cancelled.is_set():
+                images.extend([None] * (len(texts) - len(images)))
+                break
+            start = None
+            if neighbour is not None:
+                start = warm_start_font_size(text, *neighbour)
+            text_stats = None
+            if stats is not None:
+                text_stats = RenderStats()
+                stats.append(text_stats)
+            try:
+                image, rendering = self._render(
+                    text, export_function, start=start, stats=text_stats
+                )
+            except ValueError:
+                if errors == "raise":
+                    raise
+                images.append(None)
+                continue
+            neighbour = (text, rendering.font_size)
+            images.append(image)
+        return images
+
+    def render_gif(self, text, stats=None):
+        """ returns a image blob with text rendered as large as possible
+
+        :param str text: the text to render
+        :param RenderStats stats: records the rendering, if provided
+        :returns: binary encoded image
+        """
+        return self.render(text, self.backend.export_gif, stats=stats)
+
+    def render_pixels(self, text, stats=None):
+        """ renders an image and returns an iterator of pixel intensities
+
+        :param str text: the text to render
+        :param RenderStats stats: records the rendering, if provided
+        :returns: iterator of pixel intensities
+        """
+        return self.render(text, self.backend.export_pixels, stats=stats)
+
+    def render_frame(self, text, stats=None):
+        """ renders an image as a packed frame for the display
+
+        :param str text: the text to render
+        :param RenderStats stats: records the rendering, if provided
+        :returns bytes: the packed frame
+        """
+        return self.render(text, self.backend.export_frame, stats=stats)
+
+    def frame_key(self, text):
+        """ returns a key to identify a rendered image
+
+        The key changes, if the text, the font file, the image and render
+        properties, the backend or the renderer version change.
+
+        :param str text: the text to render
+        :returns str: hex digest identifying the rendered image
+        """
+        properties = {
+            "text": text,
+            "font": _cached_font_file_hash(self.font),
+            "image": self.image_properties,
+            "render": self.render_properties,
+            "backend": self.backend_name,
+            "version": RENDERER_VERSION,
+        }
+        serialized = json.dumps(properties, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def close(self):
+        """ releases the resources of the backend """
+        with self._lock:
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+
+
+# export formats for rendering dialogs and the backend methods to use
+EXPORTS = {
+    "frame": "export_frame",
+    "gif": "export_gif",
+    "pixels": "export_pixels",
+}
+
+# renderer of a worker process and its settings, reused for all parts
+_worker_renderer = None
+_worker_settings = None
+
+
+def render_in_worker(
+    settings, texts, export="frame", errors="raise", stats=False
+):
+    """ renders texts in a worker process
+
+    The renderer is set up once per process and reused for all calls with
+    the same settings.
+
+    :param tuple settings: the settings of a renderer, see Renderer.settings
+    :param list texts: the texts to render
+    :param str export: "frame", "gif" or "pixels"
+    :param str errors: "raise" or "skip" texts that do not fit
+    :param bool stats: record the rendering of the texts
+    :returns list: the exported images, and a list of RenderStats if stats
+        are recorded
+    """
+    global _worker_renderer, _worker_settings
+    if _worker_renderer is None or _worker_settings != settings:
+        font, image_properties, render_properties, backend = settings
+        _worker_renderer = Renderer(
+            font, image_properties, render_properties, backend=backend
         )
+        _worker_settings = settings
+    text_stats = [] if stats else None
+    images = _worker_renderer._render_texts(texts, export, errors, text_stats)
+    if export == "pixels":
+        # iterators can't be sent back to the calling process
+        images = [None if px is None else list(px) for px in images]
+    if stats:
+        return images, text_stats
+    return images
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_font_file_hash(font_file):
+    """ the font file is only hashed once per process """
+    return font_file_hash(font_file)
+
+
+_default_renderer = None
+
+
+def default_renderer():
+    """ returns the renderer used by the module level render functions
+
+    The renderer is set up for the xkcd display and uses FIT_CACHE.
+    """
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = Renderer(fit_cache=FIT_CACHE)
+    return _default_renderer
 
 
 def render_xkcd_image_as_gif(text):
@@ -211,10 +1224,7 @@ def render_xkcd_image_as_gif(text):
     :param str text: the text to render
     :returns: binary encoded image
     """
-    with Image(**XKCD_IMAGE_PROPERTIES) as img:
-        render_text(img, text, XKCD_FONT_FILE, **XKCD_RENDER_PROPERTIES)
-        img.type = "bilevel"
-        return img.make_blob("gif")
+    return default_renderer().render_gif(text)
 
 
 def render_xkcd_image_as_pixels(text):
@@ -225,6 +1235,24 @@ def render_xkcd_image_as_pixels(text):
     :param str text: the text to render
     :returns: iterator of pixel intensities
     """
-    with Image(**XKCD_IMAGE_PROPERTIES) as img:
-        render_text(img, text, XKCD_FONT_FILE, **XKCD_RENDER_PROPERTIES)
-        return iter(img.export_pixels(channel_map="I"))
+    return default_renderer().render_pixels(text)
+
+
+def render_xkcd_image_as_frame(text):
+    """ renders an xkcd image as a packed frame for the display
+
+    parameters are fitting the xkcd display
+
+    :param str text: the text to render
+    :returns bytes: the packed frame
+    """
+    return default_renderer().render_frame(text)
+
+
+def xkcd_frame_key(text):
+    """ returns a key to identify a rendered xkcd image
+
+    :param str text: the text to render
+    :returns str: hex digest identifying the rendered image
+    """
+    return default_renderer().frame_key(text)
@@ -0,0 +1,70 @@
+""" micro benchmark: packing pixel intensities into a display buffer
+
+compares the former per pixel implementation of EPD._buffer_from_pixels()
+with the lookup table and numpy implementations in xkcd_epaper.packing
+
+usage: python benchmarks/bench_packing.py [repetitions]
+"""
+
+import importlib.util
+import random
+import sys
+import timeit
+
+from itertools import zip_longest
+from pathlib import Path
+
+# the packing module is loaded directly, importing the xkcd_epaper package
+# would set up the hardware, which is not necessary for this benchmark
+PACKING_PATH = Path(__file__).parent.parent / "xkcd_epaper" / "packing.py"
+spec = importlib.util.spec_from_file_location("packing", PACKING_PATH)
+packing = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(packing)
+
+NUMBER_OF_PIXELS = 400 * 300
+
+
+def per_pixel_buffer(pixels):
+    """ the former implementation of EPD._buffer_from_pixels() """
+    for pixel_group in zip_longest(*[iter(pixels)] * 8, fillvalue=None):
+        byte = 0xFF
+        for group_pos, pixel_value in enumerate(pixel_group):
+            if pixel_value == 0:
+                byte &= ~(0x80 >> group_pos)
+        yield byte
+
+
+def main(repetitions=10):
+    # a text panel is mostly white
+    pixels = [
+        0.0 if random.random() < 0.1 else 1.0 for _ in range(NUMBER_OF_PIXELS)
+    ]
+    pixel_bytes = bytes(int(p) for p in pixels)
+    expected = bytes(per_pixel_buffer(pixels))
+
+    candidates = [
+        ("per pixel, list", lambda: bytes(per_pixel_buffer(pixels))),
+        ("lookup, list", lambda: packing.pack_pixels_lookup(pixels)),
+        ("lookup, bytes", lambda: packing.pack_pixels_lookup(pixel_bytes)),
+    ]
+    if packing.numpy is not None:
+        pixel_array = packing.numpy.array(pixels)
+        candidates += [
+            ("numpy, list", lambda: packing.pack_pixels_numpy(pixels)),
+            ("numpy, bytes", lambda: packing.pack_pixels_numpy(pixel_bytes)),
+            ("numpy, array", lambda: packing.pack_pixels_numpy(pixel_array)),
+        ]
+    else:
+        print("numpy is not installed, skipping numpy benchmarks")
+
+    baseline = None
+    for name, function in candidates:
+        assert function() == expected, f"{name} differs from per pixel"
+        duration = timeit.timeit(function, number=repetitions) / repetitions
+        baseline = baseline or duration
+        speedup = baseline / duration
+        print(f"{name:<18} {duration * 1000:9.2f} ms  {speedup:7.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
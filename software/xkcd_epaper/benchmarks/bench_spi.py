@@ -0,0 +1,95 @@
+""" micro benchmark: writing a frame buffer to the spi device
+
+compares the former implementation of config.send_data_list(), grouping a
+list of ints, with the transfer paths in xkcd_epaper.transfer. A fake spi
+device stands in for spidev: it checks the transfer size like the kernel
+driver does and collects the written bytes. It measures the python side of
+the transfer, not the conversions inside spidev or the speed of the spi bus.
+
+usage: python benchmarks/bench_spi.py [repetitions]
+"""
+
+import importlib.util
+import random
+import sys
+import timeit
+
+from itertools import zip_longest
+from pathlib import Path
+
+# the transfer module is loaded directly, importing the xkcd_epaper package
+# would set up the hardware, which is not necessary for this benchmark
+TRANSFER_PATH = Path(__file__).parent.parent / "xkcd_epaper" / "transfer.py"
+spec = importlib.util.spec_from_file_location("transfer", TRANSFER_PATH)
+transfer = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(transfer)
+
+EPD_BUFFER_SIZE = 400 * 300 // 8
+SPI_BUFFER_SIZE = 4096  # default of the spidev kernel module
+
+
+class FakeSpiDev:
+    """ a spi device providing only writebytes(), like older spidev """
+
+    def __init__(self, buffer_size=SPI_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.written = bytearray()
+
+    def writebytes(self, data):
+        if len(data) > self.buffer_size:
+            raise OSError("Message too long")
+        self.written.extend(data)
+
+
+class FakeSpiDevWritebytes2(FakeSpiDev):
+    """ a spi device providing writebytes2(), like spidev 3.4 and later """
+
+    def writebytes2(self, data):
+        view = memoryview(data)
+        for start in range(0, len(view), self.buffer_size):
+            end = start + self.buffer_size
+            self.writebytes(view[start:end])
+
+
+def former_send_data_list(spi, data, buffer_size):
+    """ the former implementation of config.send_data_list() """
+    args = [iter(data)] * buffer_size
+    for buffer in zip_longest(*args, fillvalue=None):
+        spi.writebytes([b for b in buffer if b is not None])
+
+
+def main(repetitions=10):
+    frame = bytes(random.getrandbits(8) for _ in range(EPD_BUFFER_SIZE))
+    frame_list = list(frame)
+
+    write_data = transfer.write_data
+    candidates = [
+        ("former, list", FakeSpiDev, former_send_data_list, frame_list),
+        ("chunked, list", FakeSpiDev, write_data, frame_list),
+        ("chunked, bytes", FakeSpiDev, write_data, frame),
+        ("writebytes2, list", FakeSpiDevWritebytes2, write_data, frame_list),
+        ("writebytes2, bytes", FakeSpiDevWritebytes2, write_data, frame),
+    ]
+
+    baseline = None
+    for name, device_class, send, data in candidates:
+        spi = device_class()
+
+        def function():
+            spi.written.clear()
+            send(spi, data, SPI_BUFFER_SIZE)
+
+        function()
+        assert spi.written == frame, f"{name} wrote different data"
+        duration = timeit.timeit(function, number=repetitions) / repetitions
+        baseline = baseline or duration
+        speedup = baseline / duration
+        throughput = EPD_BUFFER_SIZE / duration / 1e6
+        print(
+            f"{name:<20} {duration * 1000:9.3f} ms  {throughput:9.1f} MB/s"
+            f"  {speedup:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
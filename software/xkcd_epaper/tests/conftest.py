@@ -0,0 +1,22 @@
+import pytest
+import sys
+
+
+@pytest.fixture(autouse=True)
+def fake_hardware(mocker, monkeypatch):
+    """ replaces RPi.GPIO and spidev, they are imported with xkcd_epaper
+
+    The xkcd_epaper modules are removed afterwards, every test imports
+    xkcd_epaper with a fresh set of mocks. Other modules imported during a
+    test are kept, numpy can't be imported twice.
+    """
+    gpio = mocker.MagicMock()
+    rpi = mocker.MagicMock(GPIO=gpio)
+    spidev = mocker.MagicMock()
+    monkeypatch.setitem(sys.modules, "RPi", rpi)
+    monkeypatch.setitem(sys.modules, "RPi.GPIO", gpio)
+    monkeypatch.setitem(sys.modules, "spidev", spidev)
+    yield gpio
+    for name in list(sys.modules):
+        if name == "xkcd_epaper" or name.startswith("xkcd_epaper."):
+            del sys.modules[name]
@@ -0,0 +1,285 @@
+import pytest
+import threading
+
+from unittest.mock import call
+
+
+class BlockingShow:
+    """ stands in for EPD.show_and_move, blocks until released """
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.released = threading.Event()
+
+    def __call__(self, image, quick_refresh, move_to):
+        self.calls.append(call(image, quick_refresh, move_to))
+        self.started.set()
+        assert self.released.wait(timeout=5)
+
+
+@pytest.fixture
+def show(mocker):
+    from xkcd_epaper import EPD
+
+    blocking_show = BlockingShow()
+    mocker.patch.object(EPD, "show_and_move", side_effect=blocking_show)
+    return blocking_show
+
+
+@pytest.fixture
+def epd(mocker):
+    from xkcd_epaper import EPD
+
+    epd = EPD()
+    # the parts of init() used by show_and_move_async() and sleep()
+    epd._driver_lock = threading.Lock()
+    epd._pending = []
+    epd._idle = None
+    epd.refresh = mocker.Mock()
+    epd.servo_controller = mocker.Mock()
+    epd.servo = mocker.Mock()
+    epd.leds = mocker.Mock()
+    yield epd
+    if epd._driver is not None:
+        epd._driver.shutdown(wait=False)
+
+
+def test_show_and_move_async_keeps_order(epd, show):
+    futures = [
+        epd.show_and_move_async(b"a"),
+        epd.show_and_move_async(b"b", quick_refresh=True, move_to=7),
+        epd.show_and_move_async(b"c", quick_refresh=True),
+    ]
+    show.released.set()
+
+    for future in futures:
+        assert future.result(timeout=5) is None
+    assert show.calls == [
+        call(b"a", False, 5),
+        call(b"b", True, 7),
+        call(b"c", True, 5),
+    ]
+
+
+def test_show_and_move_async_coalesce(epd, show):
+    shown = epd.show_and_move_async(b"a", quick_refresh=True)
+    assert show.started.wait(timeout=5)
+    skipped = epd.show_and_move_async(b"b", quick_refresh=True)
+    latest = epd.show_and_move_async(b"c", quick_refresh=True, coalesce=True)
+    show.released.set()
+
+    latest.result(timeout=5)
+    assert shown.done() and not shown.cancelled()
+    assert skipped.cancelled()
+    assert show.calls == [call(b"a", True, 5), call(b"c", True, 5)]
+
+
+def test_show_and_move_async_coalesce_keeps_slow_refresh(epd, show):
+    epd.show_and_move_async(b"a", quick_refresh=True)
+    assert show.started.wait(timeout=5)
+    skipped = epd.show_and_move_async(b"b", quick_refresh=False)
+    latest = epd.show_and_move_async(b"c", quick_refresh=True, coalesce=True)
+    show.released.set()
+
+    latest.result(timeout=5)
+    assert skipped.cancelled()
+    # the skipped image asked for a slow refresh, to get rid of ghosting
+    assert show.calls[-1] == call(b"c", False, 5)
+
+
+def test_show_and_move_async_copies_bytearray(epd, show):
+    epd.show_and_move_async(b"a")
+    assert show.started.wait(timeout=5)
+    image = bytearray(b"b")
+    future = epd.show_and_move_async(image)
+    image[:] = b"x"
+    show.released.set()
+
+    future.result(timeout=5)
+    assert show.calls[-1] == call(b"b", False, 5)
+
+
+def test_show_and_move_async_prunes_pending(epd, show):
+    show.released.set()
+    first = epd.show_and_move_async(b"a")
+    first.result(timeout=5)
+
+    second = epd.show_and_move_async(b"b")
+
+    assert [future for future, _ in epd._pending] == [second]
+    second.result(timeout=5)
+
+
+def test_sleep_waits_for_queued_images(epd, show):
+    futures = [epd.show_and_move_async(image) for image in (b"a", b"b")]
+    threading.Timer(0.1, show.released.set).start()
+    servo_controller = epd.servo_controller
+
+    epd.sleep()
+
+    assert all(future.done() for future in futures)
+    assert len(show.calls) == 2
+    assert epd._driver is None
+    assert servo_controller.stop.call_count == 1
+
+
+def test_wait_until_idle_waits_for_edge(epd, fake_hardware, mocker):
+    delay_ms = mocker.patch("xkcd_epaper.delay_ms")
+    fake_hardware.input.side_effect = [0, 1]  # busy, idle after the edge
+    epd._idle = threading.Event()
+    threading.Timer(0.05, epd._idle.set).start()
+
+    epd.wait_until_idle()
+
+    assert fake_hardware.input.call_count == 2
+    assert delay_ms.call_count == 0
+
+
+def test_wait_until_idle_polls_after_timeout(epd, fake_hardware, mocker):
+    delay_ms = mocker.patch("xkcd_epaper.delay_ms")
+    mocker.patch("xkcd_epaper.BUSY_TIMEOUT", 0.01)
+    fake_hardware.input.side_effect = [0, 0, 0, 1]  # no edge detected
+    epd._idle = threading.Event()
+
+    epd.wait_until_idle()
+
+    assert fake_hardware.input.call_count == 4
+    assert delay_ms.call_args_list == [call(100), call(100)]
+
+
+def test_wait_until_idle_polls_without_edge_detection(
+    epd, fake_hardware, mocker
+):
+    delay_ms = mocker.patch("xkcd_epaper.delay_ms")
+    fake_hardware.add_event_detect.side_effect = RuntimeError("no edges")
+    fake_hardware.input.side_effect = [0, 0, 1]
+    epd._idle = epd._detect_idle()
+
+    epd.wait_until_idle()
+
+    assert epd._idle is None
+    assert delay_ms.call_args_list == [call(100), call(100)]
+
+
+def test_detect_idle_sets_event_on_rising_edge(epd, fake_hardware):
+    from xkcd_epaper.config import BUSY_PIN
+
+    idle = epd._detect_idle()
+
+    args, kwargs = fake_hardware.add_event_detect.call_args
+    assert args == (BUSY_PIN, fake_hardware.RISING)
+    assert not idle.is_set()
+    kwargs["callback"](BUSY_PIN)
+    assert idle.is_set()
+
+
+def test_init_sets_up_named_pointer_positions(fake_hardware, mocker):
+    from xkcd_epaper import EPD
+    from xkcd_epaper.config import POINTER_POSITIONS
+
+    mocker.patch("xkcd_epaper.delay_ms")
+    fake_hardware.input.return_value = 1  # always idle
+    epd = EPD()
+    epd.init()
+    epd.servo_controller.stop()
+
+    assert epd.servo_controller.positions == POINTER_POSITIONS
+    assert set(POINTER_POSITIONS) == {"cueball", "megan", "center"}
+
+
+def test_show_and_move_to_named_position(fake_hardware, mocker):
+    from xkcd_epaper import EPD
+    from xkcd_epaper.config import EPD_BUFFER_SIZE, POINTER_POSITIONS
+
+    mocker.patch("xkcd_epaper.delay_ms")
+    fake_hardware.input.return_value = 1  # always idle
+    epd = EPD()
+    epd.init()
+
+    epd.show_and_move(bytes(EPD_BUFFER_SIZE), move_to="megan")
+
+    assert epd.servo_controller.wait(timeout=1)
+    epd.servo_controller.stop()
+    assert epd.servo_controller.position == POINTER_POSITIONS["megan"]
+    duty_cycles = epd.servo.ChangeDutyCycle.mock_calls
+    assert call(POINTER_POSITIONS["megan"]) in duty_cycles
+
+
+def test_finish_refresh_records_refresh_times(fake_hardware, mocker):
+    from xkcd_epaper import EPD, RefreshTime
+
+    mocker.patch("xkcd_epaper.delay_ms")
+    mocker.patch("xkcd_epaper.REFRESH_TIMES_KEPT", 3)
+    fake_hardware.input.return_value = 1  # always idle
+    epd = EPD()
+    epd.init()
+
+    for partial in (False, True, False, True, True):
+        epd._start_refresh()
+        epd._finish_refresh(partial=partial)
+    epd.servo_controller.stop()
+
+    times = list(epd.refresh_times)
+    assert [(refresh.mode, refresh.partial) for refresh in times] == [
+        ("slow", False),
+        ("slow", True),
+        ("slow", True),
+    ]
+    assert all(isinstance(refresh, RefreshTime) for refresh in times)
+    assert all(refresh.seconds >= 0 for refresh in times)
+
+
+@pytest.mark.parametrize("kind", ["bytes", "bytearray", "memoryview", "array"])
+def test_buffer_from_image_uses_packed_frames(epd, mocker, kind):
+    import array
+    from xkcd_epaper import EPD
+    from xkcd_epaper.config import EPD_BUFFER_SIZE
+
+    data = bytes(range(256)) * (EPD_BUFFER_SIZE // 256)
+    data += bytes(EPD_BUFFER_SIZE - len(data))
+    frame = {
+        "bytes": data,
+        "bytearray": bytearray(data),
+        "memoryview": memoryview(data),
+        "array": array.array("B", data),
+    }[kind]
+    mocker.spy(EPD, "_buffer_from_pixels")
+
+    buffer = epd._buffer_from_image(frame)
+
+    assert bytes(buffer) == data
+    assert EPD._buffer_from_pixels.call_count == 0
+
+
+def test_buffer_from_image_uses_numpy_frames(epd):
+    numpy = pytest.importorskip("numpy")
+    from xkcd_epaper.config import EPD_HEIGHT, EPD_WIDTH
+
+    frame = numpy.arange(EPD_HEIGHT * EPD_WIDTH // 8, dtype=numpy.uint8)
+    frame = frame.reshape(EPD_HEIGHT, EPD_WIDTH // 8)
+
+    assert bytes(epd._buffer_from_image(frame)) == frame.tobytes()
+    # a non contiguous view is copied
+    columns = numpy.zeros((EPD_HEIGHT, EPD_WIDTH // 4), dtype=numpy.uint8)
+    view = columns[:, ::2]
+
+    assert bytes(epd._buffer_from_image(view)) == view.tobytes()
+
+
+def test_buffer_from_image_packs_pixels(epd):
+    from xkcd_epaper.config import EPD_BUFFER_SIZE, EPD_HEIGHT, EPD_WIDTH
+
+    pixels = [0] * 8 + [255] * (EPD_WIDTH * EPD_HEIGHT - 8)
+
+    buffer = epd._buffer_from_image(pixels)
+
+    assert bytes(buffer) == b"\x00" + b"\xff" * (EPD_BUFFER_SIZE - 1)
+
+
+@pytest.mark.parametrize(
+    "image", [bytes(100), bytearray(15001), [0] * 100, iter([1] * 120008)]
+)
+def test_buffer_from_image_wrong_size(epd, image):
+    with pytest.raises(ValueError):
+        epd._buffer_from_image(image)
@@ -0,0 +1,82 @@
+import pytest
+
+
+@pytest.fixture
+def sent(mocker):
+    """ records the commands sent by the lookup tables """
+    commands = []
+    mocker.patch("xkcd_epaper.lut.send_command", side_effect=commands.append)
+    mocker.patch("xkcd_epaper.lut.send_data_list")
+    return commands
+
+
+@pytest.fixture
+def epd(mocker):
+    from xkcd_epaper import EPD
+
+    mocker.patch("xkcd_epaper.delay_ms")
+    epd = EPD()
+    yield epd
+    if epd.servo_controller is not None:
+        epd.servo_controller.stop()
+
+
+def test_refresh_skips_loaded_tables(sent):
+    from xkcd_epaper.lut import Refresh, LUT_QUICK, LUT_SLOW
+
+    refresh = Refresh()
+
+    assert refresh.mode == "slow"
+    assert sent == [command for command, _ in LUT_SLOW]
+
+    refresh.slow()
+    refresh.quick()
+    refresh.quick()
+
+    assert refresh.mode == "quick"
+    assert refresh.uploads == 2
+    assert refresh.skipped_uploads == 2
+    assert sent == [command for command, _ in LUT_SLOW + LUT_QUICK]
+
+
+def test_refresh_invalidate(sent):
+    from xkcd_epaper.lut import Refresh
+
+    refresh = Refresh()
+
+    refresh.invalidate()
+
+    assert refresh.mode is None
+    refresh.slow()
+    assert refresh.uploads == 2
+    assert refresh.skipped_uploads == 0
+
+
+def test_epd_reset_invalidates_tables(sent, epd):
+    epd.init()
+    assert epd.refresh.mode == "slow"
+
+    epd.reset()
+
+    assert epd.refresh.mode is None
+
+
+def test_epd_sleep_invalidates_tables(sent, epd):
+    epd.init()
+    refresh = epd.refresh
+
+    epd.sleep()
+
+    assert refresh.mode is None
+
+
+def test_epd_second_init_resends_tables(sent, epd):
+    epd.init()
+    epd.refresh.slow()
+    assert epd.refresh.uploads == 1
+    assert epd.refresh.skipped_uploads == 1
+
+    epd.init()
+
+    assert epd.refresh.uploads == 2
+    assert epd.refresh.mode == "slow"
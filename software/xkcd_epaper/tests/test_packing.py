@@ -0,0 +1,82 @@
+import pytest
+import random
+
+from itertools import zip_longest
+
+NUMBER_OF_PIXELS = 400 * 300
+
+
+def per_pixel_buffer(pixels):
+    """ the former implementation of EPD._buffer_from_pixels() """
+    groups = zip_longest(*[iter(pixels)] * 8, fillvalue=None)
+    buffer = bytearray()
+    for pixel_group in groups:
+        byte = 0xFF
+        for group_pos, pixel_value in enumerate(pixel_group):
+            if pixel_value == 0:
+                byte &= ~(0x80 >> group_pos)
+        buffer.append(byte)
+    return bytes(buffer)
+
+
+def random_pixels(length, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice([0, 0.5, 1.0, 255]) for _ in range(length)]
+
+
+@pytest.fixture(params=["lookup", "numpy"])
+def pack(request):
+    from xkcd_epaper import packing
+
+    if request.param == "numpy" and packing.numpy is None:
+        pytest.skip("numpy is not installed")
+    return getattr(packing, f"pack_pixels_{request.param}")
+
+
+@pytest.mark.parametrize("length", [0, 1, 7, 8, 9, 15, 17, NUMBER_OF_PIXELS])
+def test_pack_pixels_matches_per_pixel(pack, length):
+    pixels = random_pixels(length, seed=length)
+
+    assert pack(pixels) == per_pixel_buffer(pixels)
+
+
+@pytest.mark.parametrize("value, byte", [(0, 0x00), (1, 0xFF), (255, 0xFF)])
+def test_pack_pixels_single_color(pack, value, byte):
+    pixels = [value] * NUMBER_OF_PIXELS
+
+    result = pack(pixels)
+
+    assert result == bytes([byte]) * (NUMBER_OF_PIXELS // 8)
+    assert result == per_pixel_buffer(pixels)
+
+
+@pytest.mark.parametrize("kind", ["bytes", "bytearray", "tuple", "iterator"])
+def test_pack_pixels_input_types(pack, kind):
+    pixels = [int(value) for value in random_pixels(1003, seed=3)]
+    data = {
+        "bytes": bytes,
+        "bytearray": bytearray,
+        "tuple": tuple,
+        "iterator": iter,
+    }[kind](pixels)
+
+    assert pack(data) == per_pixel_buffer(pixels)
+
+
+def test_pack_pixels_numpy_array():
+    numpy = pytest.importorskip("numpy")
+    from xkcd_epaper.packing import pack_pixels_numpy
+
+    pixels = random_pixels(NUMBER_OF_PIXELS)
+    array = numpy.array(pixels).reshape(300, 400)
+
+    assert pack_pixels_numpy(array) == per_pixel_buffer(pixels)
+
+
+def test_pack_pixels_uses_available_implementation(mocker):
+    from xkcd_epaper import packing
+
+    pixels = random_pixels(100)
+    mocker.patch.object(packing, "numpy", None)
+
+    assert packing.pack_pixels(pixels) == per_pixel_buffer(pixels)
@@ -0,0 +1,127 @@
+import pytest
+import threading
+import time
+
+
+class FakePWM:
+    """ records the duty cycles set, like a RPi.GPIO.PWM instance """
+
+    def __init__(self):
+        self.changes = []  # tuples of duty cycle and time of the change
+        self.changed = threading.Event()
+
+    def ChangeDutyCycle(self, duty_cycle):
+        self.changes.append((duty_cycle, time.monotonic()))
+        self.changed.set()
+
+    @property
+    def duty_cycles(self):
+        return [duty_cycle for duty_cycle, _ in self.changes]
+
+
+@pytest.fixture
+def pwm():
+    return FakePWM()
+
+
+def test_servo_moves_and_turns_off_after_settling(pwm):
+    from xkcd_epaper.servo import ServoController
+
+    controller = ServoController(pwm, settle_time=0.05)
+
+    controller.move(5)
+
+    assert controller.wait(timeout=1)
+    assert pwm.duty_cycles == [5, 0]
+    (_, moved), (_, turned_off) = pwm.changes
+    assert turned_off - moved >= 0.05
+    assert controller.position == 5
+    assert controller.moves == 1
+    controller.stop()
+
+
+def test_servo_uses_named_positions(pwm):
+    from xkcd_epaper.servo import ServoController
+
+    controller = ServoController(pwm, 0.01, positions={"megan": 10})
+
+    controller.move("megan")
+
+    assert controller.wait(timeout=1)
+    assert pwm.duty_cycles == [10, 0]
+    controller.stop()
+
+
+def test_servo_rejects_unknown_positions(pwm):
+    from xkcd_epaper.servo import ServoController
+
+    controller = ServoController(pwm, 0.01, positions={"megan": 10})
+
+    with pytest.raises(ValueError):
+        controller.move("cueball")
+
+    assert controller.wait(timeout=1)
+    assert pwm.duty_cycles == []
+    controller.stop()
+
+
+def test_servo_skips_duplicate_moves(pwm):
+    from xkcd_epaper.servo import ServoController
+
+    controller = ServoController(pwm, settle_time=0.01)
+
+    controller.move(5)
+    controller.move(5)  # already the target or the position
+    assert controller.wait(timeout=1)
+    controller.move(5)  # the position of the servo
+    assert controller.wait(timeout=1)
+
+    assert pwm.duty_cycles == [5, 0]
+    assert controller.moves == 1
+    assert controller.skipped_moves == 2
+    controller.stop()
+
+
+def test_servo_replaces_pending_target(pwm):
+    from xkcd_epaper.servo import ServoController
+
+    controller = ServoController(pwm, settle_time=0.01)
+
+    # the thread can't start a move while the condition is held
+    with controller._condition:
+        controller.move(5)
+        controller.move(7)
+
+    assert controller.wait(timeout=1)
+    assert pwm.duty_cycles == [7, 0]
+    assert controller.moves == 1
+    controller.stop()
+
+
+def test_servo_moves_on_while_settling(pwm):
+    from xkcd_epaper.servo import ServoController
+
+    controller = ServoController(pwm, settle_time=10)
+
+    controller.move(5)
+    assert pwm.changed.wait(timeout=1)
+    controller.move(7)
+
+    assert not controller.wait(timeout=0.1)
+    assert pwm.duty_cycles == [5, 7]
+    controller.stop()
+
+
+def test_servo_stop_turns_off_and_joins_thread(pwm):
+    from xkcd_epaper.servo import ServoController
+
+    controller = ServoController(pwm, settle_time=10)
+    controller.move(5)
+    assert pwm.changed.wait(timeout=1)
+
+    controller.stop()
+
+    assert pwm.duty_cycles == [5, 0]
+    assert not controller._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        controller.move(7)
@@ -0,0 +1,109 @@
+import array
+import pytest
+
+
+class FakeSpiDev:
+    """ a spi device providing only writebytes(), like older spidev """
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self.chunks = []
+
+    def writebytes(self, data):
+        if len(data) > self.buffer_size:
+            raise OSError("Message too long")
+        self.chunks.append(data)
+
+    @property
+    def written(self):
+        return b"".join(bytes(chunk) for chunk in self.chunks)
+
+
+class FakeSpiDevWritebytes2(FakeSpiDev):
+    """ a spi device providing writebytes2(), like spidev 3.4 and later """
+
+    def writebytes2(self, data):
+        self.chunks.append(data)
+
+
+@pytest.mark.parametrize(
+    "size, chunk_sizes", [(0, []), (4, [4]), (8, [4, 4]), (10, [4, 4, 2])]
+)
+def test_write_chunked_boundaries(size, chunk_sizes):
+    from xkcd_epaper.transfer import data_view, write_chunked
+
+    data = bytes(range(size))
+    spi = FakeSpiDev(buffer_size=4)
+
+    write_chunked(spi, data_view(data), 4)
+
+    assert [len(chunk) for chunk in spi.chunks] == chunk_sizes
+    assert spi.written == data
+
+
+def test_write_data_chunks_without_writebytes2():
+    from xkcd_epaper.transfer import write_data
+
+    data = bytearray(range(10))
+    spi = FakeSpiDev(buffer_size=4)
+
+    write_data(spi, data, 4)
+
+    assert spi.written == data
+    # the chunks are slices of the data, not copies
+    assert all(isinstance(chunk, memoryview) for chunk in spi.chunks)
+    assert all(chunk.obj is data for chunk in spi.chunks)
+
+
+def test_write_data_prefers_writebytes2():
+    from xkcd_epaper.transfer import write_data
+
+    data = bytes(range(10))
+    spi = FakeSpiDevWritebytes2(buffer_size=4)
+
+    write_data(spi, data, 4)
+
+    assert len(spi.chunks) == 1
+    assert spi.chunks[0].obj is data
+    assert spi.written == data
+
+
+@pytest.mark.parametrize("device", [FakeSpiDev, FakeSpiDevWritebytes2])
+def test_write_data_converts_list_once(device):
+    from xkcd_epaper.transfer import write_data
+
+    data = list(range(10))
+    spi = device(buffer_size=4)
+
+    write_data(spi, data, 4)
+
+    assert spi.written == bytes(data)
+    converted = {id(chunk.obj) for chunk in spi.chunks}
+    assert len(converted) == 1
+    assert isinstance(spi.chunks[0].obj, bytes)
+
+
+def test_write_data_passes_memoryview_slices_through():
+    from xkcd_epaper.transfer import write_data
+
+    data = bytes(range(20))
+    view = memoryview(data)[5:15]
+    spi = FakeSpiDev(buffer_size=4)
+
+    write_data(spi, view, 4)
+
+    assert spi.written == data[5:15]
+    assert all(chunk.obj is data for chunk in spi.chunks)
+
+
+def test_data_view_casts_to_unsigned_bytes():
+    from xkcd_epaper.transfer import data_view
+
+    data = array.array("H", [1, 2, 3])
+
+    view = data_view(data)
+
+    assert view.format == "B"
+    assert view.ndim == 1
+    assert len(view) == data.itemsize * 3
+    assert view.obj is data
@@ -0,0 +1,115 @@
+import pytest
+import random
+
+WIDTH = 400
+HEIGHT = 300
+BUFFER_SIZE = WIDTH * HEIGHT // 8
+
+
+def flip_bits(frame, positions):
+    """ a copy of a frame with the bits at (x, y) pixel positions flipped """
+    flipped = bytearray(frame)
+    for x, y in positions:
+        flipped[(y * WIDTH + x) // 8] ^= 0x80 >> (x % 8)
+    return bytes(flipped)
+
+
+def changed_pixels(old, new):
+    """ the (x, y) positions of all pixels that differ, bit by bit """
+    pixels = []
+    for index, (old_byte, new_byte) in enumerate(zip(old, new)):
+        for bit in range(8):
+            if (old_byte ^ new_byte) & (0x80 >> bit):
+                pixels.append(((index * 8 + bit) % WIDTH, index * 8 // WIDTH))
+    return pixels
+
+
+def test_changed_window_unchanged_frame():
+    from xkcd_epaper.window import changed_window
+
+    frame = bytes(random.getrandbits(8) for _ in range(BUFFER_SIZE))
+
+    assert changed_window(frame, bytearray(frame), WIDTH) is None
+
+
+def test_changed_window_different_sizes():
+    from xkcd_epaper.window import changed_window
+
+    with pytest.raises(ValueError):
+        changed_window(bytes(BUFFER_SIZE), bytes(BUFFER_SIZE - 1), WIDTH)
+
+
+@pytest.mark.parametrize("flips", [1, 2, 5, 50])
+def test_changed_window_matches_brute_force(flips):
+    from xkcd_epaper.window import changed_window, Window
+
+    rng = random.Random(flips)
+    old = bytes(rng.getrandbits(8) for _ in range(BUFFER_SIZE))
+    for _ in range(20):
+        positions = [
+            (rng.randrange(WIDTH), rng.randrange(HEIGHT))
+            for _ in range(flips)
+        ]
+        new = flip_bits(old, positions)
+        changed = changed_pixels(old, new)
+        if not changed:  # a bit was flipped twice
+            assert changed_window(old, new, WIDTH) is None
+            continue
+        left = min(x for x, y in changed) // 8 * 8
+        right = max(x for x, y in changed) // 8 * 8 + 8
+        top = min(y for x, y in changed)
+        bottom = max(y for x, y in changed) + 1
+
+        assert changed_window(old, new, WIDTH) == Window(
+            left, top, right - left, bottom - top
+        )
+
+
+def test_window_data():
+    from xkcd_epaper.window import window_data, Window
+
+    frame = bytes(range(256)) * (BUFFER_SIZE // 256) + bytes(
+        BUFFER_SIZE % 256
+    )
+
+    result = window_data(frame, Window(16, 2, 24, 2), WIDTH)
+
+    assert result == bytes([102, 103, 104, 152, 153, 154])
+
+
+@pytest.mark.parametrize(
+    "window, expected",
+    [
+        ((0, 0, 400, 300), "00 00 01 8f 00 00 01 2b 01"),
+        ((392, 299, 8, 1), "01 88 01 8f 01 2b 01 2b 01"),
+        ((8, 16, 16, 4), "00 08 00 17 00 10 00 13 01"),
+    ],
+)
+def test_window_settings(window, expected):
+    from xkcd_epaper.window import window_settings, Window
+
+    assert window_settings(Window(*window)) == bytes.fromhex(expected)
+
+
+@pytest.mark.parametrize(
+    "positions, expected",
+    [
+        ([], None),
+        ([(10, 20), (30, 40)], (8, 20, 24, 21)),
+        ([(0, 0), (399, 149)], (0, 0, 400, 150)),  # half of the display
+        ([(0, 0), (399, 150)], None),  # more than half of the display
+    ],
+)
+def test_partial_window_limit(positions, expected):
+    from xkcd_epaper import EPD
+    from xkcd_epaper.config import PARTIAL_REFRESH_LIMIT, EPD_WHITE_IMAGE
+    from xkcd_epaper.window import Window
+
+    epd = EPD()
+    epd._old_buffer = bytearray(EPD_WHITE_IMAGE)
+    buffer = flip_bits(EPD_WHITE_IMAGE, positions)
+
+    result = epd._partial_window(buffer)
+
+    assert PARTIAL_REFRESH_LIMIT == 0.5
+    assert result == (expected and Window(*expected))
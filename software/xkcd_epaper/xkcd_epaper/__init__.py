@@ -1,11 +1,20 @@
 import RPi.GPIO as GPIO
+import concurrent.futures
+import threading
+import time
+
+from collections import deque, namedtuple
 
 from .config import (
     RST_PIN,
     DC_PIN,
     CS_PIN,
     BUSY_PIN,
+    BUSY_TIMEOUT,
+    REFRESH_TIMES_KEPT,
+    POINTER_POSITIONS,
     SERVO_PIN,
+    SERVO_SETTLE_TIME,
     LED_PIN,
     SPI,
     BOOSTER_SOFT_START,
@@ -14,21 +23,37 @@ from .config import (
     DATA_START_TRANSMISSION_1,
     DATA_START_TRANSMISSION_2,
     DISPLAY_REFRESH,
+    EPD_WIDTH,
+    EPD_HEIGHT,
+    EPD_BUFFER_SIZE,
     EPD_WHITE_IMAGE,
+    PARTIAL_REFRESH_LIMIT,
+    PARTIAL_WINDOW,
+    PARTIAL_IN,
+    PARTIAL_OUT,
     POWER_OFF,
     DEEP_SLEEP,
     delay_ms,
-    grouper,
     send_command,
     send_data_byte,
     send_data_list,
 )
 from .lut import Refresh
+from .packing import pack_pixels
+from .servo import ServoController
+from .window import changed_window, window_data, window_settings
+
+RefreshTime = namedtuple("RefreshTime", ["mode", "partial", "seconds"])
 
 
 class EPD:
     """ Interface for the Waveshare ePaper 4.2" display """
 
+    refresh = None  # lookup tables for the refresh, set up in init()
+    refresh_times = None  # durations of the last refreshes, see init()
+    _driver = None  # thread for asynchronous updates, see show_and_move_async
+    servo_controller = None  # moves the servo, set up in init()
+
     def init(self):
         """ initialize the display """
 
@@ -41,12 +66,23 @@ class EPD:
         GPIO.setup(BUSY_PIN, GPIO.IN)
         GPIO.setup(SERVO_PIN, GPIO.OUT)
         GPIO.setup(LED_PIN, GPIO.OUT)
+        if self.servo_controller is not None:
+            self.servo_controller.stop()
         self.servo = GPIO.PWM(SERVO_PIN, 50)
         self.servo.start(0)
+        self.servo_controller = ServoController(
+            self.servo, SERVO_SETTLE_TIME, POINTER_POSITIONS
+        )
         self.leds = GPIO.PWM(LED_PIN, 60)
         self.leds.start(0)
         SPI.max_speed_hz = 2000000
         SPI.mode = 0b00
+        self._idle = self._detect_idle()
+        if self.refresh_times is None:
+            self.refresh_times = deque(maxlen=REFRESH_TIMES_KEPT)
+        self._refresh_started = None
+        self._driver_lock = threading.Lock()
+        self._pending = []  # futures and refresh mode of submitted images
 
         self.reset()
 
@@ -59,9 +95,13 @@ class EPD:
         send_command(PANEL_SETTING)
         send_data_byte(0x3F)  # 300x400 B/W mode, LUT set by register
 
-        self.refresh = Refresh()
+        if self.refresh is None:
+            self.refresh = Refresh()
+        else:
+            self.refresh.slow()
 
-        self._old_buffer = EPD_WHITE_IMAGE
+        # the frame shown on the display, updated in place on every refresh
+        self._old_buffer = bytearray(EPD_WHITE_IMAGE)
         self._send_white_image(DATA_START_TRANSMISSION_1)
 
     def reset(self):
@@ -72,60 +112,176 @@ class EPD:
         for value in (GPIO.HIGH, GPIO.LOW, GPIO.HIGH):
             GPIO.output(RST_PIN, value)
             delay_ms(200)
+        if self.refresh is not None:
+            self.refresh.invalidate()
 
     def clear(self):
         """ clear the display with a white image """
         self.refresh.slow()
         self._send_white_image(DATA_START_TRANSMISSION_1)
         self._send_white_image(DATA_START_TRANSMISSION_2)
-        send_command(DISPLAY_REFRESH)
-        self.wait_until_idle()
+        self._start_refresh()
+        self._finish_refresh()
 
-    def display(self, pixels):
+    def display(self, image):
         """ display an image
 
-        :pixels iterable:
-            list of pixel intensities, must have a length of 400 x 300 items
+        :image bytes like or iterable:
+            a packed frame of 400 x 300 / 8 bytes or pixel intensities, that
+            must have a length of 400 x 300 items, see _buffer_from_image()
         """
-        send_command(DATA_START_TRANSMISSION_1)
-        send_data_list(self._old_buffer)
-        buffer = list(self._buffer_from_pixels(pixels))
-        send_command(DATA_START_TRANSMISSION_2)
-        send_data_list(buffer)
-        send_command(DISPLAY_REFRESH)
-        self._old_buffer = buffer
-        self.wait_until_idle()
+        self._send_image(self._buffer_from_image(image))
+        self._start_refresh()
+        self._finish_refresh()
 
     def sleep(self):
-        """ send the display into sleep """
+        """ send the display into sleep
+
+        Images submitted with show_and_move_async() are shown before.
+        """
+        if self._driver is not None:
+            self._driver.shutdown(wait=True)
+            self._driver = None
         send_command(POWER_OFF)
         self.wait_until_idle()
         send_command(DEEP_SLEEP)
         send_data_byte(0xA5)
+        self.refresh.invalidate()
+        self.servo_controller.stop()
+        self.servo_controller = None
         self.servo.stop()
         self.leds.stop()
         GPIO.cleanup()
 
     def wait_until_idle(self):
-        """ wait for the display """
-        while GPIO.input(BUSY_PIN) == 0:  # 0: idle, 1: busy
+        """ wait for the display
+
+        Waits for the rising edge of the busy pin, if edge detection is
+        available. The pin is polled if it is not, or if no edge was detected
+        within BUSY_TIMEOUT seconds.
+        """
+        if self._idle is not None:
+            self._idle.clear()
+            if GPIO.input(BUSY_PIN) == 0:
+                self._idle.wait(BUSY_TIMEOUT)
+        while GPIO.input(BUSY_PIN) == 0:  # 0: busy, 1: idle
             delay_ms(100)
 
+    def _detect_idle(self):
+        """ sets up an event for the busy pin signaling the display is idle
+
+        :returns threading.Event: set on the rising edge of the busy pin,
+            None if edge detection is not available
+        """
+        idle = threading.Event()
+        try:
+            GPIO.remove_event_detect(BUSY_PIN)
+            GPIO.add_event_detect(
+                BUSY_PIN, GPIO.RISING, callback=lambda channel: idle.set()
+            )
+        except (RuntimeError, AttributeError):
+            return None
+        return idle
+
+    def _start_refresh(self):
+        """ triggers the refresh of the display """
+        send_command(DISPLAY_REFRESH)
+        self._refresh_started = time.monotonic()
+
+    def _finish_refresh(self, partial=False):
+        """ waits for the refresh of the display and records its duration
+
+        :partial bool: only a window of the display is refreshed
+        """
+        self.wait_until_idle()
+        seconds = time.monotonic() - self._refresh_started
+        self.refresh_times.append(
+            RefreshTime(self.refresh.mode, partial, seconds)
+        )
+
+    def _send_image(self, buffer):
+        """ sends the shown and the new frame, before refreshing the display
+
+        The new frame is copied into the buffer of the shown frame
+        afterwards, no new buffer is allocated.
+
+        :buffer bytes like: the new frame, see _buffer_from_image()
+        """
+        send_command(DATA_START_TRANSMISSION_1)
+        send_data_list(self._old_buffer)
+        send_command(DATA_START_TRANSMISSION_2)
+        send_data_list(buffer)
+        self._old_buffer[:] = buffer
+
+    def _partial_window(self, buffer):
+        """ the window to refresh partially for a new frame
+
+        :buffer bytes like: the new frame, see _buffer_from_image()
+        :returns window.Window: the changed window, None if the display must
+            be refreshed completely
+        """
+        window = changed_window(self._old_buffer, buffer, EPD_WIDTH)
+        if window is None:  # nothing changed
+            return None
+        area = window.width * window.height
+        if area > PARTIAL_REFRESH_LIMIT * EPD_WIDTH * EPD_HEIGHT:
+            return None
+        return window
+
+    def _send_window(self, buffer, window):
+        """ sends a window of the shown and new frame in partial mode
+
+        The display must be refreshed and leave the partial mode afterwards.
+
+        :buffer bytes like: the new frame, see _buffer_from_image()
+        :window window.Window: the window to send
+        """
+        send_command(PARTIAL_IN)
+        send_command(PARTIAL_WINDOW)
+        send_data_list(window_settings(window))
+        send_command(DATA_START_TRANSMISSION_1)
+        send_data_list(window_data(self._old_buffer, window, EPD_WIDTH))
+        send_command(DATA_START_TRANSMISSION_2)
+        send_data_list(window_data(buffer, window, EPD_WIDTH))
+        self._old_buffer[:] = buffer
+
+    def _buffer_from_image(self, image):
+        """ returns the buffer for the epaper display from an image
+
+        :image bytes like or iterable:
+            a packed frame, that is used as it is, or pixel intensities, that
+            will be packed into a buffer. Every object supporting the buffer
+            protocol with a size of EPD_BUFFER_SIZE bytes is a packed frame,
+            e.g. bytes, an array("B") or a numpy array of uint8.
+        :returns: buffer bytes or a memoryview for the epaper display
+        :raises ValueError: if the image is neither a packed frame nor
+            400 x 300 pixel intensities
+        """
+        try:
+            view = memoryview(image)
+        except TypeError:
+            view = None
+        if view is not None and view.nbytes == EPD_BUFFER_SIZE:
+            if not view.c_contiguous:
+                view = memoryview(view.tobytes())
+            return view.cast("B")
+        buffer = self._buffer_from_pixels(image)
+        if len(buffer) != EPD_BUFFER_SIZE:
+            raise ValueError(
+                f"Image must be a frame of {EPD_BUFFER_SIZE} bytes or "
+                f"{EPD_WIDTH} x {EPD_HEIGHT} pixel intensities"
+            )
+        return buffer
+
     def _buffer_from_pixels(self, pixels):
-        """ generator: yield buffer values from pixel list
+        """ transforms pixel intensities into the buffer for the display
 
-        Transforms a list of pixel intensities into a bytes list expected
-        by the epaper display. One byte (eight bits) drive eight pixels
+        One byte (eight bits) drive eight pixels, see packing.pack_pixels()
 
-        :pixels iterable: list of pixel intensities
-        :returns generator: generator of buffer bytes for the epaper display
+        :pixels bytes, array or iterable: pixel intensities
+        :returns bytes: buffer bytes for the epaper display
         """
-        for pixel_group in grouper(pixels, 8):
-            byte = 0xFF
-            for group_pos, pixel_value in enumerate(pixel_group):
-                if pixel_value == 0:
-                    byte &= ~(0x80 >> group_pos)
-            yield byte
+        return pack_pixels(pixels)
 
     def _send_white_image(self, transmission_channel):
         """ sends all white pixels using a transmission channel
@@ -137,11 +293,12 @@ class EPD:
         send_data_list(EPD_WHITE_IMAGE)
 
     def move(self, pos):
-        """ moves the servo to a given position
+        """ moves the servo to a given position, without waiting for it
 
-        :pos int: position to move the servo to
+        :pos float or str: duty cycle or name of a position to move the
+            servo to, see POINTER_POSITIONS
         """
-        self.servo.ChangeDutyCycle(pos)
+        self.servo_controller.move(pos)
 
     def brightness(self, value):
         """ moves the servo to a given position
@@ -150,16 +307,25 @@ class EPD:
         """
         self.leds.ChangeDutyCycle(value)
 
-    def show_and_move(self, pixel_list, quick_refresh=False, move_to=5):
+    def show_and_move(self, image, quick_refresh=False, move_to=5):
         """ display an image and move the servo to a given position
 
         This method tries to synchronize servo movement and image display.
 
-        The pixel list must be a length of 400 x 300 items
+        The image is either a packed frame with one bit per pixel, as
+        returned by xkcd_display.renderer.render_xkcd_image_as_frame(), or an
+        iterable of pixel intensities with a length of 400 x 300 items.
 
-        :pixel_list list: an iterable with pixel intensity values
+        With a quick refresh only the window of the display that changed is
+        sent and refreshed, unless it covers more than the
+        PARTIAL_REFRESH_LIMIT of the display. Nothing is refreshed if the
+        image did not change. A slow refresh always refreshes the whole
+        display, to get rid of ghosting.
+
+        :image bytes like or iterable: a packed frame or pixel intensities
         :quick_refresh bool: use a quick refresh or a slow, flickering one
-        :move_to int: move the servo to this position
+        :move_to float or str: move the servo to this duty cycle or named
+            position, e.g. "megan", see POINTER_POSITIONS
         """
         # set the display refresh method
         if quick_refresh:
@@ -168,21 +334,73 @@ class EPD:
             self.refresh.slow()
 
         # prepare the image data end send it to the display
-        send_command(DATA_START_TRANSMISSION_1)
-        send_data_list(self._old_buffer)
-        buffer = list(self._buffer_from_pixels(pixel_list))
-        send_command(DATA_START_TRANSMISSION_2)
-        send_data_list(buffer)
-        self._old_buffer = buffer
+        buffer = self._buffer_from_image(image)
+        unchanged = quick_refresh and self._old_buffer == buffer
+        window = None
+        if quick_refresh and not unchanged:
+            window = self._partial_window(buffer)
+        if window is not None:
+            self._send_window(buffer, window)
+        elif not unchanged:
+            self._send_image(buffer)
 
         # trigger the display refresh
-        send_command(DISPLAY_REFRESH)
+        if not unchanged:
+            self._start_refresh()
 
-        # move the servo, give it some time to move and turn it of
-        self.servo.ChangeDutyCycle(move_to)
-        delay_ms(250)
-        # turn off the servo
-        self.servo.ChangeDutyCycle(0)
+        # move the servo, it is turned off after settling by its controller
+        self.servo_controller.move(move_to)
 
         # wait until display refresh is done
-        self.wait_until_idle()
+        if not unchanged:
+            self._finish_refresh(partial=window is not None)
+        if window is not None:
+            send_command(PARTIAL_OUT)
+
+    def show_and_move_async(
+        self, image, quick_refresh=False, move_to=5, coalesce=False
+    ):
+        """ display an image and move the servo, without waiting for it
+
+        The image is shown by show_and_move() on a separate driver thread,
+        the caller can go on while the data is sent and the display refreshes.
+        Images submitted while the display is busy are queued and shown one
+        after the other. With coalesce, queued images that are not shown yet
+        are skipped and only the latest one is shown. If a skipped image
+        asked for a slow refresh, the latest one is refreshed slowly, too.
+
+        Don't call the other methods showing images while images are queued,
+        only sleep() waits for them.
+
+        :image bytes like or iterable: a packed frame or pixel intensities,
+            bytearrays and memoryviews are copied, other iterables must not
+            be changed until the image is shown
+        :quick_refresh bool: use a quick refresh or a slow, flickering one
+        :move_to float or str: move the servo to this duty cycle or named
+            position, e.g. "megan", see POINTER_POSITIONS
+        :coalesce bool: skip queued images that are not shown yet
+        :returns concurrent.futures.Future: done when the display refreshed,
+            cancelled if the image was skipped. Use asyncio.wrap_future() to
+            await it in a coroutine.
+        """
+        if isinstance(image, (bytearray, memoryview)):
+            image = bytes(image)
+        with self._driver_lock:
+            if coalesce:
+                for future, pending_quick in self._pending:
+                    if future.cancel():
+                        quick_refresh = quick_refresh and pending_quick
+            if self._driver is None:
+                self._driver = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="epd"
+                )
+            future = self._driver.submit(
+                self.show_and_move, image, quick_refresh, move_to
+            )
+            self._pending = [
+                (pending, pending_quick)
+                for pending, pending_quick in self._pending
+                if not pending.done()
+            ]
+            self._pending.append((future, quick_refresh))
+        return future
@@ -3,7 +3,7 @@ import RPi.GPIO as GPIO
 import time
 import subprocess
 
-from itertools import zip_longest
+from .transfer import write_data
 
 # Pin definition
 RST_PIN = 17
@@ -29,8 +29,25 @@ except Exception:
 EPD_WIDTH = 400
 EPD_HEIGHT = 300
 EPD_BUFFER_SIZE = EPD_WIDTH * EPD_HEIGHT // 8
-EPD_WHITE_IMAGE = [0xFF for i in range(0, EPD_BUFFER_SIZE)]
-EPD_BLACK_IMAGE = [0x00 for i in range(0, EPD_BUFFER_SIZE)]
+EPD_WHITE_IMAGE = b"\xFF" * EPD_BUFFER_SIZE
+EPD_BLACK_IMAGE = bytes(EPD_BUFFER_SIZE)
+
+# seconds to wait for the busy pin to signal the end of a refresh, before
+# falling back to polling the pin
+BUSY_TIMEOUT = 10
+
+# number of refresh durations kept for measuring the lookup tables
+REFRESH_TIMES_KEPT = 100
+
+# seconds the servo gets to reach a position, before its signal is turned off
+SERVO_SETTLE_TIME = 0.25
+
+# duty cycles of the servo pointing at the speakers, used for named moves
+POINTER_POSITIONS = {"cueball": 5, "megan": 10, "center": 7.5}
+
+# quick refreshes of a changed window larger than this fraction of the
+# display are done as full refresh, there's not much to gain otherwise
+PARTIAL_REFRESH_LIMIT = 0.5
 
 # EPD4IN2B commands
 PANEL_SETTING = 0x00
@@ -81,23 +98,6 @@ def delay_ms(delaytime):
     time.sleep(delaytime / 1000.0)
 
 
-def grouper(iterable, n, fillvalue=None):
-    """ split an iterable in groups of n items
-
-    shamelessly copied from https://docs.python.org/3/library/itertools.html
-
-    Example:
-        grouped = grouper(range(10), 3, fillvalue="x")
-        list(grouped) == [(0, 1, 2), (3, 4, 5), (6, 7, 8), (9, 'x', 'x')]
-
-    :iterable iterable: the iterable to group by a number of items
-    :n int: number of items in one group
-    :fillvalue: value to fill an incomplete group with
-    """
-    args = [iter(iterable)] * n
-    return zip_longest(*args, fillvalue=fillvalue)
-
-
 def send_command(command):
     """ send a command to the display via the spi bus
 
@@ -117,13 +117,12 @@ def send_data_byte(data):
 
 
 def send_data_list(data):
-    """ send lot of data to the display via the spie bus
+    """ send lot of data to the display via the spi bus
 
-    the installed version of spidev doesn't have the writebytes2 function;
-    this is a pure python implementation.
+    bytes, bytearrays and memoryviews are sent without copying them, other
+    iterables of ints are converted to bytes first. See transfer.write_data()
 
-    :data iterable: list of bytes to send to the display
+    :data bytes like or iterable: bytes to send to the display
     """
     GPIO.output(DC_PIN, GPIO.HIGH)
-    for buffer in grouper(data, SPI_BUFFER_SIZE):
-        SPI.writebytes([b for b in buffer if b is not None])
+    write_data(SPI, data, SPI_BUFFER_SIZE)
@@ -9,463 +9,111 @@ from .config import (
 )
 
 
-LUT_VCOM0 = [
-    0x40,
-    0x17,
-    0x00,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x17,
-    0x17,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x0A,
-    0x01,
-    0x00,
-    0x00,
-    0x01,
-    0x00,
-    0x0E,
-    0x0E,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_VCOM0 = bytes.fromhex(
+    "40 17 00 00 00 02 "
+    "00 17 17 00 00 02 "
+    "00 0A 01 00 00 01 "
+    "00 0E 0E 00 00 02 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00"
+)
 
-LUT_VCOM0_QUICK = [
-    0x00,
-    0x0E,
-    0x00,
-    0x00,
-    0x00,
-    0x01,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_VCOM0_QUICK = bytes.fromhex(
+    "00 0E 00 00 00 01 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00"
+)
 
 
-LUT_WW = [
-    0x40,
-    0x17,
-    0x00,
-    0x00,
-    0x00,
-    0x02,
-    0x90,
-    0x17,
-    0x17,
-    0x00,
-    0x00,
-    0x02,
-    0x40,
-    0x0A,
-    0x01,
-    0x00,
-    0x00,
-    0x01,
-    0xA0,
-    0x0E,
-    0x0E,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_WW = bytes.fromhex(
+    "40 17 00 00 00 02 "
+    "90 17 17 00 00 02 "
+    "40 0A 01 00 00 01 "
+    "A0 0E 0E 00 00 02 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
-LUT_WW_QUICK = [
-    0xA0,
-    0x0E,
-    0x00,
-    0x00,
-    0x00,
-    0x01,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_WW_QUICK = bytes.fromhex(
+    "A0 0E 00 00 00 01 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
 
-LUT_BW = [
-    0x40,
-    0x17,
-    0x00,
-    0x00,
-    0x00,
-    0x02,
-    0x90,
-    0x17,
-    0x17,
-    0x00,
-    0x00,
-    0x02,
-    0x40,
-    0x0A,
-    0x01,
-    0x00,
-    0x00,
-    0x01,
-    0xA0,
-    0x0E,
-    0x0E,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_BW = bytes.fromhex(
+    "40 17 00 00 00 02 "
+    "90 17 17 00 00 02 "
+    "40 0A 01 00 00 01 "
+    "A0 0E 0E 00 00 02 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
-LUT_BW_QUICK = [
-    0xA0,
-    0x0E,
-    0x00,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_BW_QUICK = bytes.fromhex(
+    "A0 0E 00 00 00 02 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
 
-LUT_BB = [
-    0x80,
-    0x17,
-    0x00,
-    0x00,
-    0x00,
-    0x02,
-    0x90,
-    0x17,
-    0x17,
-    0x00,
-    0x00,
-    0x02,
-    0x80,
-    0x0A,
-    0x01,
-    0x00,
-    0x00,
-    0x01,
-    0x50,
-    0x0E,
-    0x0E,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_BB = bytes.fromhex(
+    "80 17 00 00 00 02 "
+    "90 17 17 00 00 02 "
+    "80 0A 01 00 00 01 "
+    "50 0E 0E 00 00 02 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
-LUT_BB_QUICK = [
-    0x50,
-    0x0E,
-    0x00,
-    0x00,
-    0x00,
-    0x01,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_BB_QUICK = bytes.fromhex(
+    "50 0E 00 00 00 01 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
 
-LUT_WB = [
-    0x80,
-    0x17,
-    0x00,
-    0x00,
-    0x00,
-    0x02,
-    0x90,
-    0x17,
-    0x17,
-    0x00,
-    0x00,
-    0x02,
-    0x80,
-    0x0A,
-    0x01,
-    0x00,
-    0x00,
-    0x01,
-    0x50,
-    0x0E,
-    0x0E,
-    0x00,
-    0x00,
-    0x02,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_WB = bytes.fromhex(
+    "80 17 00 00 00 02 "
+    "90 17 17 00 00 02 "
+    "80 0A 01 00 00 01 "
+    "50 0E 0E 00 00 02 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
-LUT_WB_QUICK = [
-    0x50,
-    0x0E,
-    0x00,
-    0x00,
-    0x00,
-    0x01,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-    0x00,
-]
+LUT_WB_QUICK = bytes.fromhex(
+    "50 0E 00 00 00 01 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00 "
+    "00 00 00 00 00 00"
+)
 
 
 LUT_SLOW = (
@@ -487,10 +135,18 @@ LUT_QUICK = (
 
 
 class Refresh:
-    """ set different lookup taples that effect the screen refresh rate """
+    """ set different lookup taples that effect the screen refresh rate
+
+    The lookup tables loaded into the display controller are remembered,
+    setting them again is skipped. After the controller lost them, e.g. on
+    a reset or in deep sleep, invalidate() must be called.
+    """
 
     def __init__(self):
         """ initialize """
+        self.loaded = None  # the lookup tables held by the controller
+        self.uploads = 0
+        self.skipped_uploads = 0
         self.slow()
 
     def quick(self):
@@ -501,11 +157,31 @@ class Refresh:
         """ sets a slow refresh rate """
         self._send_lut(LUT_SLOW)
 
+    @property
+    def mode(self):
+        """ "quick" or "slow", as set by the loaded tables, None if unknown """
+        if self.loaded is LUT_QUICK:
+            return "quick"
+        if self.loaded is LUT_SLOW:
+            return "slow"
+        return None
+
+    def invalidate(self):
+        """ forget the loaded lookup tables, the next ones are always sent """
+        self.loaded = None
+
     def _send_lut(self, cmd_chain):
         """ sends all commands and data to chane a lookup table
 
+        Nothing is sent if the lookup tables are already loaded.
+
         :cmd_chain tuple: one of LUT_SLOW or LUT_QUICK
         """
+        if self.loaded is cmd_chain:
+            self.skipped_uploads += 1
+            return
         for command, data in cmd_chain:
             send_command(command)
             send_data_list(data)
+        self.loaded = cmd_chain
+        self.uploads += 1
@@ -0,0 +1,71 @@
+""" packs pixel intensities into the buffer format of the display
+
+One byte of the buffer drives eight pixels, the first pixel is the most
+significant bit. A pixel intensity of zero is black (bit not set), anything
+else is white (bit set). An incomplete last byte is filled with white pixels.
+"""
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+# lookup table, maps a pixel intensity byte to the character of its bit
+BIT_CHARACTERS = bytes(
+    ord("0") if intensity == 0 else ord("1") for intensity in range(256)
+)
+
+
+def pack_pixels(pixels):
+    """ packs pixel intensities into a display buffer
+
+    Uses numpy if it is installed, a lookup table otherwise.
+
+    :pixels bytes, array or iterable:
+        pixel intensities, bytes are interpreted as one pixel per byte
+    :returns bytes: the display buffer
+    """
+    if numpy is not None:
+        return pack_pixels_numpy(pixels)
+    return pack_pixels_lookup(pixels)
+
+
+def pack_pixels_numpy(pixels):
+    """ packs pixel intensities into a display buffer using numpy
+
+    :pixels bytes, array or iterable:
+        pixel intensities, bytes are interpreted as one pixel per byte
+    :returns bytes: the display buffer
+    """
+    if isinstance(pixels, (bytes, bytearray)):
+        values = numpy.frombuffer(pixels, dtype=numpy.uint8)
+    elif isinstance(pixels, (numpy.ndarray, memoryview, list, tuple)):
+        values = numpy.asarray(pixels)
+    else:
+        values = numpy.fromiter(pixels, dtype=float)
+    bits = values.ravel() != 0
+    padding = -len(bits) % 8
+    if padding:
+        bits = numpy.concatenate([bits, numpy.ones(padding, dtype=bool)])
+    return numpy.packbits(bits).tobytes()
+
+
+def pack_pixels_lookup(pixels):
+    """ packs pixel intensities into a display buffer using a lookup table
+
+    The pixel intensities are translated to a string of binary digits with
+    a lookup table, which is parsed as one large integer. No python code is
+    run per pixel for bytes; other iterables are converted to bytes first.
+
+    :pixels bytes, array or iterable:
+        pixel intensities, bytes are interpreted as one pixel per byte
+    :returns bytes: the display buffer
+    """
+    if not isinstance(pixels, (bytes, bytearray)):
+        pixels = bytes(map(bool, pixels))
+    digits = pixels.translate(BIT_CHARACTERS)
+    digits += b"1" * (-len(digits) % 8)
+    if not digits:
+        return b""
+    return int(digits, 2).to_bytes(len(digits) // 8, "big")
@@ -0,0 +1,118 @@
+""" moves the servo of the pointer on its own thread
+
+The servo is driven by a pwm signal, the duty cycle sets its position. After
+a move the signal is kept for a settle time and turned off afterwards, the
+servo would jitter otherwise. Moving the servo doesn't block the caller.
+
+This module doesn't import RPi.GPIO, any object with a ChangeDutyCycle()
+method like a RPi.GPIO.PWM instance can be used.
+"""
+
+import threading
+
+
+class ServoController:
+    """ moves a servo to target positions on a separate thread
+
+    A move to the position the servo is at or already moving to is skipped,
+    a move that is not started yet is replaced by a new one. If a new target
+    is set while the servo settles, it moves on directly.
+    """
+
+    def __init__(self, pwm, settle_time=0.25, positions=None):
+        """ starts the thread driving the servo
+
+        :pwm RPi.GPIO.PWM: pwm output of the servo, already started
+        :settle_time float: seconds to keep the signal after a move
+        :positions dict: names of positions and their duty cycles, e.g.
+            {"cueball": 5, "megan": 10, "center": 7.5}
+        """
+        self.pwm = pwm
+        self.settle_time = settle_time
+        self.positions = dict(positions or {})
+        self.position = None  # duty cycle of the last move
+        self.moves = 0
+        self.skipped_moves = 0
+        self._target = None  # duty cycle of the next move
+        self._powered = False
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="servo", daemon=True
+        )
+        self._thread.start()
+
+    def move(self, target):
+        """ moves the servo to a position, without waiting for it
+
+        :target float or str: the duty cycle or the name of a position
+        :raises ValueError: if the name of the position is unknown
+        """
+        duty_cycle = target
+        if isinstance(target, str):
+            try:
+                duty_cycle = self.positions[target]
+            except KeyError:
+                raise ValueError(f"Unknown servo position: {target!r}")
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("Servo controller is stopped")
+            if duty_cycle == self.position:
+                self._target = None  # a move that is not started is cancelled
+                self.skipped_moves += 1
+                return
+            if duty_cycle == self._target:
+                self.skipped_moves += 1
+                return
+            self._target = duty_cycle
+            self._condition.notify()
+
+    def wait(self, timeout=None):
+        """ waits until the servo moved and is turned off
+
+        :timeout float: seconds to wait at most, wait forever if None
+        :returns bool: True if the servo is idle, False on a timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(self._idle, timeout)
+
+    def stop(self):
+        """ cancels a move that is not started, turns off the servo
+
+        The thread is stopped, a stopped controller can't be used again.
+        """
+        with self._condition:
+            self._stopped = True
+            self._target = None
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _idle(self):
+        """ there's no move to start and the servo is turned off """
+        return self._target is None and not self._powered
+
+    def _has_work(self):
+        """ there's a move to start or the thread should stop """
+        return self._target is not None or self._stopped
+
+    def _run(self):
+        """ moves the servo to the targets until the controller is stopped """
+        with self._condition:
+            while True:
+                self._condition.wait_for(self._has_work)
+                if self._stopped:
+                    break
+                duty_cycle, self._target = self._target, None
+                self.pwm.ChangeDutyCycle(duty_cycle)
+                self.position = duty_cycle
+                self.moves += 1
+                self._powered = True
+                if self._condition.wait_for(self._has_work, self.settle_time):
+                    continue  # move on without turning the servo off
+                self.pwm.ChangeDutyCycle(0)
+                self._powered = False
+                self._condition.notify_all()
+            if self._powered:
+                self.pwm.ChangeDutyCycle(0)
+                self._powered = False
+            self._condition.notify_all()
@@ -0,0 +1,58 @@
+""" writes data buffers to the spi device of the display
+
+The kernel driver of the spi bus accepts a limited number of bytes per
+transfer. Newer versions of spidev provide writebytes2(), which takes any
+object supporting the buffer protocol and splits it into transfers itself.
+With older versions, the data is written in chunks of the buffer size. The
+chunks are slices of a memoryview, the data is not copied in python.
+
+This module doesn't import spidev, any object with the methods of a
+spidev.SpiDev instance can be used, e.g. a fake one for benchmarks.
+"""
+
+
+def data_view(data):
+    """ a one dimensional memoryview of unsigned bytes for some data
+
+    :data bytes like or iterable:
+        bytes, bytearray, memoryview or other objects supporting the buffer
+        protocol are used without copying, other iterables of ints are
+        converted to bytes
+    :returns memoryview: the data as unsigned bytes
+    """
+    try:
+        view = memoryview(data)
+    except TypeError:
+        view = memoryview(bytes(data))
+    if view.ndim != 1 or view.format != "B":
+        view = view.cast("B")
+    return view
+
+
+def write_data(spi, data, buffer_size):
+    """ writes data to a spi device with the fastest available method
+
+    :spi spidev.SpiDev: the spi device
+    :data bytes like or iterable: the data to write, see data_view()
+    :buffer_size int: maximum number of bytes in one transfer, only used if
+        the data is written in chunks
+    """
+    view = data_view(data)
+    if hasattr(spi, "writebytes2"):
+        spi.writebytes2(view)
+    else:
+        write_chunked(spi, view, buffer_size)
+
+
+def write_chunked(spi, view, buffer_size):
+    """ writes data to a spi device in chunks of the buffer size
+
+    This works with all versions of spidev.
+
+    :spi spidev.SpiDev: the spi device
+    :view memoryview: the data to write, see data_view()
+    :buffer_size int: maximum number of bytes in one transfer
+    """
+    for start in range(0, len(view), buffer_size):
+        end = start + buffer_size
+        spi.writebytes(view[start:end])
@@ -0,0 +1,93 @@
+""" finds the window of the display that changed between two frames
+
+The frames are display buffers, see packing.pack_pixels(): one byte drives
+eight pixels of a row. The changed window is byte aligned, its horizontal
+position and width are multiples of eight pixels, like the partial window
+of the display controller requires.
+"""
+
+from collections import namedtuple
+
+Window = namedtuple("Window", ["x", "y", "width", "height"])
+
+
+def changed_window(old, new, width):
+    """ the bounding box of the pixels that differ in two frames
+
+    Rows are compared as bytes. The columns of changed rows are found by
+    xor-ing the rows as large integers, no python code is run per byte.
+
+    :old bytes like: the frame shown on the display
+    :new bytes like: the frame to show, must have the size of the old one
+    :width int: width of the display in pixels, a multiple of eight
+    :returns Window: the changed window in pixels, None if nothing changed
+    """
+    old = memoryview(old).cast("B")
+    new = memoryview(new).cast("B")
+    if old.nbytes != new.nbytes:
+        raise ValueError("Frames must have the same size")
+    row_bytes = width // 8
+    changed = []
+    left, right = row_bytes, 0
+    for start in range(0, old.nbytes, row_bytes):
+        end = start + row_bytes
+        if old[start:end] == new[start:end]:
+            continue
+        changed.append(start // row_bytes)
+        diff = int.from_bytes(old[start:end], "big") ^ int.from_bytes(
+            new[start:end], "big"
+        )
+        lowest_bit = (diff & -diff).bit_length() - 1
+        left = min(left, row_bytes - 1 - (diff.bit_length() - 1) // 8)
+        right = max(right, row_bytes - 1 - lowest_bit // 8)
+    if not changed:
+        return None
+    return Window(
+        x=left * 8,
+        y=changed[0],
+        width=(right - left + 1) * 8,
+        height=changed[-1] - changed[0] + 1,
+    )
+
+
+def window_data(frame, window, width):
+    """ the bytes of a frame inside a window, row by row
+
+    :frame bytes like: a display buffer
+    :window Window: a byte aligned window
+    :width int: width of the display in pixels, a multiple of eight
+    :returns bytes: the part of the frame inside the window
+    """
+    frame = memoryview(frame).cast("B")
+    row_bytes = width // 8
+    data = bytearray()
+    for row in range(window.y, window.y + window.height):
+        start = row * row_bytes + window.x // 8
+        end = start + window.width // 8
+        data += frame[start:end]
+    return bytes(data)
+
+
+def window_settings(window):
+    """ the data of the controller command setting the partial window
+
+    The last byte sets the gates to scan inside and outside of the window.
+
+    :window Window: a byte aligned window
+    :returns bytes: data to send after the PARTIAL_WINDOW command
+    """
+    x_end = window.x + window.width - 1
+    y_end = window.y + window.height - 1
+    return bytes(
+        [
+            window.x >> 8,
+            window.x & 0xF8,
+            x_end >> 8,
+            (x_end & 0xFF) | 0x07,
+            window.y >> 8,
+            window.y & 0xFF,
+            y_end >> 8,
+            y_end & 0xFF,
+            0x01,
+        ]
+    )